@@ -0,0 +1,146 @@
+# src/agents/analysis_agent.py
+
+import asyncio
+import json
+import os
+import re
+import sys
+
+# Allow root-level imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from dotenv import load_dotenv
+from src.core.llm_adapter import query_llm, async_query_llm
+from src.core.prompt_engine import get_prompt_engine
+from src.core.chunked_analysis import needs_chunking
+from src.core.retry_handler import CircuitOpenError, RetryError
+from src.agents.code_reviewer_agent import REVIEW_PROMPT, review_source, areview_source
+from src.agents.security_agent import SECURITY_SCAN_PROMPT, run_security_scan, arun_security_scan
+from src.agents.performance_agent import PERFORMANCE_SYSTEM_PROMPT, run_performance_tests, arun_performance_tests
+from src.agents.doc_agent import DOC_SYSTEM_PROMPT, generate_docs, agenerate_docs
+
+load_dotenv()
+
+# Section name → (instructions of the standalone agent, sync fallback, async fallback)
+SECTIONS = {
+    "review": (REVIEW_PROMPT, review_source, areview_source),
+    "security": (SECURITY_SCAN_PROMPT, run_security_scan, arun_security_scan),
+    "performance": (PERFORMANCE_SYSTEM_PROMPT, run_performance_tests, arun_performance_tests),
+    "docs": (DOC_SYSTEM_PROMPT, generate_docs, agenerate_docs),
+}
+
+# One completion carries every section, so it needs more room than a single agent's 1500
+FUSED_MAX_TOKENS = 4096
+
+# An unusable answer, or a fused call that failed (HTTPStatusError and transport errors are OSErrors)
+FUSED_CALL_ERRORS = (ValueError, OSError, RetryError, CircuitOpenError)
+
+FUSED_ANALYSIS_PROMPT = """
+You are a senior Python engineer performing several independent analyses of the same code in one pass.
+
+Return ONLY a JSON object, with no text or code fences around it, containing exactly these string fields:
+{fields}
+
+Write the value of each field exactly as the matching analyst below would write their full answer (Markdown is fine inside the strings).
+{sections}
+"""
+
+
+def build_fused_prompt(code: str, sections: tuple):
+    """Return (system_prompt, user_prompt) asking for every section in one JSON object."""
+    instructions = FUSED_ANALYSIS_PROMPT.format(
+        fields="\n".join(f'- "{name}"' for name in sections),
+        sections="\n".join(f'\n### Field "{name}"\n{SECTIONS[name][0].strip()}' for name in sections),
+    )
+    return get_prompt_engine().assemble("fused_analysis", instructions, code, max_tokens=FUSED_MAX_TOKENS)
+
+
+def parse_fused_response(text: str, sections: tuple) -> dict:
+    """
+    Validate the JSON answer and return {section: text} for every section
+    that is present and non-empty. Raises ValueError if nothing usable came back.
+    """
+    cleaned = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+    try:
+        data = json.loads(cleaned)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Fused analysis is not valid JSON: {e}") from e
+    if not isinstance(data, dict):
+        raise ValueError("Fused analysis is not a JSON object")
+
+    valid = {name: data[name].strip() for name in sections if isinstance(data.get(name), str) and data[name].strip()}
+    if not valid:
+        raise ValueError("Fused analysis contains none of the requested sections")
+    return valid
+
+
+def run_fused_analysis(code: str, sections: tuple = tuple(SECTIONS)) -> dict:
+    """
+    Run several analyses of `code` with one LLM call and return
+    {section: text} with the same strings the standalone agents return.
+    Sections missing from (or invalid in) the answer, or every section when
+    the call fails, are filled in with separate calls to the standalone
+    agents. Files too large for one prompt skip the fused call, since the
+    standalone agents analyse them chunk by chunk.
+    """
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        raise ValueError(f"Unknown analysis sections: {sorted(unknown)}")
+
+    results = {}
+    if needs_chunking(code):
+        print("🧩 Code too large for one fused prompt. Running chunked analyses separately...")
+    else:
+        print(f"🧩 Running fused analysis ({', '.join(sections)})...")
+        try:
+            system_prompt, prompt = build_fused_prompt(code, sections)
+            response = query_llm(prompt, system_prompt=system_prompt, max_tokens=FUSED_MAX_TOKENS, json_mode=True)
+            results = parse_fused_response(response, sections)
+        except FUSED_CALL_ERRORS as e:
+            print(f"⚠️ Fused analysis unusable ({e}). Falling back to separate calls...")
+
+    for name in sections:
+        if name not in results:
+            results[name] = SECTIONS[name][1](code)
+    print("✅ Fused analysis completed.")
+    return results
+
+
+async def arun_fused_analysis(code: str, sections: tuple = tuple(SECTIONS)) -> dict:
+    """Async variant of `run_fused_analysis`; fallback calls run concurrently."""
+    unknown = set(sections) - set(SECTIONS)
+    if unknown:
+        raise ValueError(f"Unknown analysis sections: {sorted(unknown)}")
+
+    results = {}
+    if needs_chunking(code):
+        print("🧩 Code too large for one fused prompt. Running chunked analyses separately...")
+    else:
+        print(f"🧩 Running fused analysis ({', '.join(sections)})...")
+        try:
+            system_prompt, prompt = build_fused_prompt(code, sections)
+            response = await async_query_llm(prompt, system_prompt=system_prompt, max_tokens=FUSED_MAX_TOKENS,
+                                             json_mode=True)
+            results = parse_fused_response(response, sections)
+        except FUSED_CALL_ERRORS as e:
+            print(f"⚠️ Fused analysis unusable ({e}). Falling back to separate calls...")
+
+    missing = [name for name in sections if name not in results]
+    fallbacks = await asyncio.gather(*(SECTIONS[name][2](code) for name in missing))
+    results.update(zip(missing, fallbacks))
+    print("✅ Fused analysis completed.")
+    return results
+
+
+# Optional CLI usage
+if __name__ == "__main__":
+    print("🧩 Fused Analysis Agent Started")
+    path = input("📂 Enter Python file to analyze: ").strip()
+    if not os.path.exists(path):
+        print("❌ File not found.")
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            code = f.read()
+        for name, text in run_fused_analysis(code).items():
+            print(f"\n📋 {name.title()}:\n")
+            print(text)
@@ -0,0 +1,241 @@
+# src/agents/batch_review_agent.py
+
+import argparse
+import asyncio
+import contextvars
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+# Allow root-level imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from dotenv import load_dotenv
+from src.codegen.structure_builder import IGNORE_FOLDERS, IGNORE_FILES
+from src.core.chunked_analysis import CHUNK_ANALYSIS_PROMPT
+from src.agents.code_reviewer_agent import (REVIEW_PROMPT, REVIEW_ROLE, REVIEW_FOCUS, REVIEW_HEADINGS,
+                                            review_source, areview_source)
+from src.agents.self_debugger_agent import (DEBUG_SYSTEM_PROMPT, DEBUG_ROLE, DEBUG_FOCUS, DEBUG_HEADINGS,
+                                            debug_source, adebug_source)
+
+load_dotenv()
+
+# Mode → (sync agent, async agent, prompts that shape its output): the single-call
+# prompt plus everything the chunked path hands to analyze_chunks
+MODES = {
+    "review": (review_source, areview_source,
+               (REVIEW_PROMPT, REVIEW_ROLE, REVIEW_FOCUS, *REVIEW_HEADINGS, CHUNK_ANALYSIS_PROMPT)),
+    "debug": (debug_source, adebug_source,
+              (DEBUG_SYSTEM_PROMPT, DEBUG_ROLE, DEBUG_FOCUS, *DEBUG_HEADINGS, CHUNK_ANALYSIS_PROMPT)),
+}
+
+BATCH_DIR = ".cache/batch_review"
+
+
+def prompt_version(mode: str) -> str:
+    """Short hash of the prompts behind `mode`; editing a prompt invalidates earlier results."""
+    return hashlib.sha256("\n".join(MODES[mode][2]).encode("utf-8")).hexdigest()[:12]
+
+
+def file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def iter_source_files(root_dir: str, extensions: tuple = (".py",)):
+    """Yield paths under `root_dir` in a stable order, skipping what structure_builder ignores."""
+    for root, dirs, files in os.walk(root_dir):
+        dirs[:] = sorted(d for d in dirs if d not in IGNORE_FOLDERS)
+        for file in sorted(files):
+            if file not in IGNORE_FILES and file.endswith(extensions):
+                yield os.path.join(root, file)
+
+
+class ReviewManifest:
+    """
+    JSON file mapping each reviewed file to its content hash, the prompt
+    version it was reviewed with and the resulting record, so re-runs can
+    skip files that have not changed.
+
+    Args:
+        path (str): Manifest location. Written atomically by `save`.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            self.entries = {}
+
+    def lookup(self, rel_path: str, digest: str, version: str):
+        """Return the stored record if `rel_path` was reviewed with this content and prompt version."""
+        entry = self.entries.get(rel_path)
+        if entry and entry.get("sha256") == digest and entry.get("prompt_version") == version:
+            return entry
+        return None
+
+    def update(self, rel_path: str, record: dict):
+        with self._lock:
+            self.entries[rel_path] = record
+
+    def prune(self, rel_paths: set):
+        """Forget files that no longer exist in the tree."""
+        with self._lock:
+            for rel_path in set(self.entries) - rel_paths:
+                del self.entries[rel_path]
+
+    def save(self):
+        if os.path.dirname(self.path):
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with self._lock:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(self.entries, f, indent=2, sort_keys=True)
+            os.replace(tmp_path, self.path)
+
+
+def default_paths(root_dir: str, mode: str):
+    """(manifest_path, report_path) for a tree, keyed by its absolute path."""
+    key = hashlib.sha256(os.path.abspath(root_dir).encode("utf-8")).hexdigest()[:12]
+    name = f"{os.path.basename(os.path.abspath(root_dir)) or 'root'}_{key}_{mode}"
+    return os.path.join(BATCH_DIR, f"{name}_manifest.json"), os.path.join(BATCH_DIR, f"{name}_report.jsonl")
+
+
+class _BatchRun:
+    """State shared by the workers of one batch run."""
+
+    def __init__(self, root_dir, mode, manifest_path, report_path, force):
+        if mode not in MODES:
+            raise ValueError(f"Unknown batch mode: {mode}. Choose from {sorted(MODES)}")
+        default_manifest, default_report = default_paths(root_dir, mode)
+        self.root_dir = root_dir
+        self.mode = mode
+        self.version = prompt_version(mode)
+        self.manifest = ReviewManifest(manifest_path or default_manifest)
+        self.report_path = report_path or default_report
+        self.force = force
+        self.records = {}
+        self.pending = []
+
+        paths = list(iter_source_files(root_dir))
+        self.manifest.prune({os.path.relpath(p, root_dir) for p in paths})
+        for path in paths:
+            rel_path = os.path.relpath(path, root_dir)
+            digest = file_hash(path)
+            cached = None if force else self.manifest.lookup(rel_path, digest, self.version)
+            if cached:
+                self.records[rel_path] = dict(cached, status="cached")
+            else:
+                self.pending.append((path, rel_path, digest))
+
+    def read(self, path: str) -> str:
+        with open(path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def finish(self, rel_path: str, digest: str, started: float, report: str = None, error: Exception = None):
+        record = {
+            "path": rel_path,
+            "mode": self.mode,
+            "sha256": digest,
+            "prompt_version": self.version,
+            "status": "error" if error else "reviewed",
+            "report": report,
+            "error": f"{type(error).__name__}: {error}" if error else None,
+            "duration": round(time.perf_counter() - started, 3),
+            "reviewed_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self.records[rel_path] = record
+        if error:
+            print(f"❌ {rel_path}: {record['error']}")
+        else:
+            # Failed files stay out of the manifest so the next run retries them
+            self.manifest.update(rel_path, record)
+            print(f"✅ {rel_path} ({record['duration']}s)")
+
+    def write_report(self) -> dict:
+        self.manifest.save()
+        if os.path.dirname(self.report_path):
+            os.makedirs(os.path.dirname(self.report_path), exist_ok=True)
+        with open(self.report_path, "w", encoding="utf-8") as f:
+            for rel_path in sorted(self.records):
+                f.write(json.dumps(self.records[rel_path], ensure_ascii=False) + "\n")
+
+        summary = {"files": len(self.records), "report_path": self.report_path, "manifest_path": self.manifest.path}
+        for status in ("reviewed", "cached", "error"):
+            summary[status] = sum(1 for r in self.records.values() if r["status"] == status)
+        print(f"📋 Batch {self.mode}: {summary['reviewed']} reviewed, {summary['cached']} unchanged, "
+              f"{summary['error']} failed → {self.report_path}")
+        return summary
+
+
+def batch_review(root_dir: str, mode: str = "review", workers: int = None, manifest_path: str = None,
+                 report_path: str = None, force: bool = False) -> dict:
+    """
+    Review every Python file under `root_dir` on a pool of `workers` threads
+    (default BATCH_REVIEW_WORKERS, 4) and write one JSONL record per file to
+    the report. Files whose content hash and prompt version match the
+    manifest are not sent again unless `force` is set; their previous
+    record is copied into the report. Returns a summary dict.
+    """
+    run = _BatchRun(root_dir, mode, manifest_path, report_path, force)
+    workers = workers or int(os.getenv("BATCH_REVIEW_WORKERS", "4"))
+    agent = MODES[mode][0]
+    print(f"🗂️ Batch {mode}: {len(run.pending)} files to review, {len(run.records)} unchanged, {workers} workers")
+
+    def review(path, rel_path, digest):
+        started = time.perf_counter()
+        try:
+            run.finish(rel_path, digest, started, report=agent(run.read(path)))
+        except Exception as e:
+            run.finish(rel_path, digest, started, error=e)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(contextvars.copy_context().run, review, *item) for item in run.pending]
+        for future in as_completed(futures):
+            future.result()
+    return run.write_report()
+
+
+async def abatch_review(root_dir: str, mode: str = "review", workers: int = None, manifest_path: str = None,
+                        report_path: str = None, force: bool = False) -> dict:
+    """Async variant of `batch_review`; at most `workers` files are in flight."""
+    run = _BatchRun(root_dir, mode, manifest_path, report_path, force)
+    workers = workers or int(os.getenv("BATCH_REVIEW_WORKERS", "4"))
+    agent = MODES[mode][1]
+    print(f"🗂️ Batch {mode}: {len(run.pending)} files to review, {len(run.records)} unchanged, {workers} workers")
+    slots = asyncio.Semaphore(workers)
+
+    async def review(path, rel_path, digest):
+        async with slots:
+            started = time.perf_counter()
+            try:
+                run.finish(rel_path, digest, started, report=await agent(run.read(path)))
+            except Exception as e:
+                run.finish(rel_path, digest, started, error=e)
+
+    await asyncio.gather(*(review(*item) for item in run.pending))
+    return run.write_report()
+
+
+# CLI usage: python src/agents/batch_review_agent.py generated/ --mode debug --workers 8
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Review or debug every Python file in a directory.")
+    parser.add_argument("root_dir", help="Directory to sweep, e.g. generated/")
+    parser.add_argument("--mode", choices=sorted(MODES), default="review")
+    parser.add_argument("--workers", type=int, default=None, help="Concurrent files (default BATCH_REVIEW_WORKERS or 4)")
+    parser.add_argument("--report", default=None, help="JSONL report path")
+    parser.add_argument("--manifest", default=None, help="Content-hash manifest path")
+    parser.add_argument("--force", action="store_true", help="Review unchanged files again")
+    args = parser.parse_args()
+
+    if not os.path.isdir(args.root_dir):
+        print(f"❌ Directory not found: {args.root_dir}")
+        sys.exit(1)
+    batch_review(args.root_dir, args.mode, args.workers, args.manifest, args.report, args.force)
@@ -6,7 +6,9 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")
 
 from dotenv import load_dotenv
 from pathlib import Path
-from src.core.llm_adapter import query_llm  # Works with Groq
+from src.core.llm_adapter import query_llm, async_query_llm  # Works with Groq
+from src.core.prompt_engine import get_prompt_engine
+from src.core.chunked_analysis import needs_chunking, analyze_chunks, aanalyze_chunks
 from typing import Optional
 
 # Load API key from .env
@@ -21,16 +23,44 @@ def load_code(path: str) -> str:
     except Exception as e:
         return f"❌ Error reading file: {e}"
 
+def build_review_prompt(code: str):
+    """Return (system_prompt, user_prompt), trimmed to the context window."""
+    return get_prompt_engine().assemble("reviewer", REVIEW_PROMPT, code)
+
+REVIEW_ROLE = "You are a senior Python software engineer and code reviewer."
+REVIEW_HEADINGS = ("🔍 **Code Issues**", "💡 **Suggestions**")
+REVIEW_FOCUS = "code smells, bad practices and inefficient patterns, with a concrete refactoring for each"
+
+def review_source(code: str) -> str:
+    """Review a code string (used by the fused analysis fallback)."""
+    if needs_chunking(code):
+        return analyze_chunks(code, "reviewer", REVIEW_ROLE, REVIEW_FOCUS, REVIEW_HEADINGS)
+    system_prompt, prompt = build_review_prompt(code)
+    print("📤 Sending code to LLM...")
+    response = query_llm(prompt, system_prompt=system_prompt)
+    print("🧾 LLM response received.")
+    return response
+
+async def areview_source(code: str) -> str:
+    if needs_chunking(code):
+        return await aanalyze_chunks(code, "reviewer", REVIEW_ROLE, REVIEW_FOCUS, REVIEW_HEADINGS)
+    system_prompt, prompt = build_review_prompt(code)
+    print("📤 Sending code to LLM...")
+    response = await async_query_llm(prompt, system_prompt=system_prompt)
+    print("🧾 LLM response received.")
+    return response
+
 def review_code(path: str) -> str:
     code = load_code(path)
     if code.startswith("❌"):
         return code
+    return review_source(code)
 
-    full_prompt = REVIEW_PROMPT + f"\n\n📂 Code:\n```python\n{code}\n```"
-    print("📤 Sending code to LLM...")
-    response = query_llm(full_prompt)
-    print("🧾 LLM response received.")
-    return response
+async def areview_code(path: str) -> str:
+    code = load_code(path)
+    if code.startswith("❌"):
+        return code
+    return await areview_source(code)
 
 
 REVIEW_PROMPT = """
@@ -7,7 +7,8 @@ import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
 from dotenv import load_dotenv
-from src.core.llm_adapter import query_llm  # Groq-compatible wrapper
+from src.core.llm_adapter import query_llm, async_query_llm  # Groq-compatible wrapper
+from src.core.prompt_engine import get_prompt_engine, format_plan
 
 # Load your GROQ_API_KEY from .env
 load_dotenv()
@@ -22,10 +23,32 @@ If applicable, split the code into functions, handle edge cases, and write docst
 """
 
 # ✅ Core function to generate code
-def run_code_writer(user_prompt: str) -> str:
+def build_code_writer_prompt(user_prompt, references: str = None):
+    """
+    Return (system_prompt, user_prompt), trimmed to the context window.
+    `user_prompt` is the request text or the planner's structured plan.
+    `references` (code from similar past projects) is placed before the
+    closing instruction; its size is bounded by the retriever's token budget.
+    """
+    system_prompt, prompt = get_prompt_engine().assemble(
+        "code_writer", CODE_WRITER_SYSTEM_PROMPT, format_plan(user_prompt), label="📝 User Request", language=None
+    )
+    if references:
+        prompt += "\n\n" + references
+    return system_prompt, prompt + "\n\n💻 Write the Python code below:\n"
+
+def run_code_writer(user_prompt, references: str = None) -> str:
+    print("📤 Generating code from LLM...")
+    system_prompt, prompt = build_code_writer_prompt(user_prompt, references)
+    result = query_llm(prompt, system_prompt=system_prompt)
+    print("✅ LLM response received.")
+    return result
+
+# ✅ Async variant for event-loop callers
+async def arun_code_writer(user_prompt, references: str = None) -> str:
     print("📤 Generating code from LLM...")
-    full_prompt = CODE_WRITER_SYSTEM_PROMPT + f"\n\n📝 User Request:\n{user_prompt}\n\n💻 Write the Python code below:\n"
-    result = query_llm(full_prompt)
+    system_prompt, prompt = build_code_writer_prompt(user_prompt, references)
+    result = await async_query_llm(prompt, system_prompt=system_prompt)
     print("✅ LLM response received.")
     return result
 
@@ -7,7 +7,8 @@ from dotenv import load_dotenv
 # Allow absolute imports from root
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-from src.core.llm_adapter import query_llm  # Groq-compatible wrapper
+from src.core.llm_adapter import query_llm, async_query_llm, astream_llm  # Groq-compatible wrapper
+from src.core.prompt_engine import get_prompt_engine
 
 # ✅ Load environment variables
 load_dotenv()
@@ -36,10 +37,19 @@ def load_code(file_path: str) -> str:
         return f"❌ Error reading file: {e}"
 
 # ✅ Core LLM call with code input (used in orchestrator)
+def build_docs_prompt(code: str):
+    """Return (system_prompt, user_prompt), trimmed to the context window."""
+    return get_prompt_engine().assemble("docs", DOC_SYSTEM_PROMPT, code, label="📂 Python Code")
+
 def generate_docs(code: str) -> str:
     """Generate documentation for code (used by orchestrator)."""
-    prompt = DOC_SYSTEM_PROMPT + f"\n\n📂 Python Code:\n```python\n{code}\n```"
-    return query_llm(prompt)
+    system_prompt, prompt = build_docs_prompt(code)
+    return query_llm(prompt, system_prompt=system_prompt)
+
+async def agenerate_docs(code: str) -> str:
+    """Async variant of `generate_docs`."""
+    system_prompt, prompt = build_docs_prompt(code)
+    return await async_query_llm(prompt, system_prompt=system_prompt)
 
 # ✅ CLI function for file-based use
 def run_doc_agent(path: str) -> str:
@@ -55,20 +65,32 @@ def run_doc_agent(path: str) -> str:
 
 # Add this to the bottom of src/agents/doc_agent.py
 
-def generate_readme_and_gitignore(project_idea: str) -> str:
-    prompt = f"""
-    You are a software architect.
+README_PROMPT = """
+You are a software architect.
 
-    Based on the following project idea, generate:
-    1. A professional `README.md`
-    2. A `.gitignore` file suitable for a Python project
+Based on the following project idea, generate:
+1. A professional `README.md`
+2. A `.gitignore` file suitable for a Python project
 
-    Respond with both files together, separated clearly.
-        
-    💡 Project Idea:
-    {project_idea}
+Respond with both files together, separated clearly.
 """
-    return query_llm(prompt)
+
+def build_readme_prompt(project_idea: str):
+    """Return (system_prompt, user_prompt), trimmed to the context window."""
+    return get_prompt_engine().assemble("readme", README_PROMPT, project_idea, label="💡 Project Idea", language=None)
+
+def generate_readme_and_gitignore(project_idea: str) -> str:
+    system_prompt, prompt = build_readme_prompt(project_idea)
+    return query_llm(prompt, system_prompt=system_prompt)
+
+async def agenerate_readme_and_gitignore(project_idea: str) -> str:
+    system_prompt, prompt = build_readme_prompt(project_idea)
+    return await async_query_llm(prompt, system_prompt=system_prompt)
+
+async def astream_readme_and_gitignore(project_idea: str):
+    system_prompt, prompt = build_readme_prompt(project_idea)
+    async for delta in astream_llm(prompt, system_prompt=system_prompt):
+        yield delta
 
 
 # ✅ CLI entry point
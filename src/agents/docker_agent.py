@@ -5,7 +5,8 @@ import sys
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 from dotenv import load_dotenv
-from src.core.llm_adapter import query_llm
+from src.core.llm_adapter import query_llm, async_query_llm, astream_llm
+from src.core.prompt_engine import get_prompt_engine
 
 load_dotenv()
 
@@ -39,12 +40,18 @@ def run_docker_agent(project_path: str):
     content = load_project_overview(project_path)
     if content.startswith("❌"):
         return content
-    prompt = DOCKER_PROMPT + f"\n\n📂 Project Code or Structure:\n{content}"
+    system_prompt, prompt = get_prompt_engine().assemble(
+        "docker", DOCKER_PROMPT, content, label="📂 Project Code or Structure", language=None
+    )
     print("🚢 Sending to LLM...")
-    dockerfile = query_llm(prompt)
+    dockerfile = query_llm(prompt, system_prompt=system_prompt)
     print("✅ Dockerfile received.")
     return dockerfile
 
+def build_dockerfile_prompt(idea):
+    """Return (system_prompt, user_prompt), trimmed to the context window."""
+    return get_prompt_engine().assemble("docker", DOCKER_PROMPT, idea, label="Create a Dockerfile for this project", language=None)
+
 # ✅ Exported function to orchestrator
 def generate_dockerfile(idea, temperature=0.3, model = "llama-3.1-8b-instant"
 
@@ -52,13 +59,31 @@ def generate_dockerfile(idea, temperature=0.3, model = "llama-3.1-8b-instant"
     print(f"[DOCKER AGENT] Generating Dockerfile for idea: {idea}")
     try:
         # your existing logic using query_llm
-        response = query_llm(f"Create a Dockerfile for this project:\n{idea}", model=model, temperature=temperature)
+        system_prompt, prompt = build_dockerfile_prompt(idea)
+        response = query_llm(prompt, model=model, temperature=temperature, system_prompt=system_prompt)
         print("[DOCKER AGENT] Response:", response)
         return response.strip()
     except Exception as e:
         print(f"[DOCKER AGENT ERROR] {e}")
         return "FROM python:3.10\n# default fallback Dockerfile"
 
+async def agenerate_dockerfile(idea, temperature=0.3, model="llama-3.1-8b-instant"):
+    print(f"[DOCKER AGENT] Generating Dockerfile for idea: {idea}")
+    try:
+        system_prompt, prompt = build_dockerfile_prompt(idea)
+        response = await async_query_llm(prompt, model=model, temperature=temperature, system_prompt=system_prompt)
+        print("[DOCKER AGENT] Response:", response)
+        return response.strip()
+    except Exception as e:
+        print(f"[DOCKER AGENT ERROR] {e}")
+        return "FROM python:3.10\n# default fallback Dockerfile"
+
+
+async def astream_dockerfile(idea, temperature=0.3, model="llama-3.1-8b-instant"):
+    system_prompt, prompt = build_dockerfile_prompt(idea)
+    async for delta in astream_llm(prompt, model=model, temperature=temperature, system_prompt=system_prompt):
+        yield delta
+
 
 # ✅ CLI mode
 if __name__ == "__main__":
@@ -7,7 +7,8 @@ import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
 from dotenv import load_dotenv
-from src.core.llm_adapter import query_llm  # Groq/OpenAI-compatible
+from src.core.llm_adapter import query_llm, async_query_llm  # Groq/OpenAI-compatible
+from src.core.prompt_engine import get_prompt_engine
 
 load_dotenv()
 
@@ -26,13 +27,27 @@ Respond in this format:
 3. ✅ Optional Refactored Snippets (if any)
 """
 
+def build_performance_prompt(code: str):
+    """Return (system_prompt, user_prompt), trimmed to the context window."""
+    return get_prompt_engine().assemble("performance", PERFORMANCE_SYSTEM_PROMPT, code, label=None)
+
 def run_performance_tests(code: str) -> str:
     print("🚀 Running performance analysis...")
     if not code.strip():
         return "❌ No code provided for performance testing."
 
-    prompt = PERFORMANCE_SYSTEM_PROMPT + f"\n\n```python\n{code}\n```"
-    response = query_llm(prompt)
+    system_prompt, prompt = build_performance_prompt(code)
+    response = query_llm(prompt, system_prompt=system_prompt)
+    print("✅ Performance scan completed.")
+    return response
+
+async def arun_performance_tests(code: str) -> str:
+    print("🚀 Running performance analysis...")
+    if not code.strip():
+        return "❌ No code provided for performance testing."
+
+    system_prompt, prompt = build_performance_prompt(code)
+    response = await async_query_llm(prompt, system_prompt=system_prompt)
     print("✅ Performance scan completed.")
     return response
 
@@ -1,6 +1,7 @@
+import asyncio
+import hashlib
 import os
 import sys
-import requests
 from dotenv import load_dotenv
 import re
 from datetime import datetime
@@ -8,15 +9,21 @@ from datetime import datetime
 # Ensure project root is in sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-from src.core.prompt_engine import PromptEngine
+
+from src.core.llm_router import get_llm_router
+from src.core.llm_adapter import astream_llm, tracker
+from src.core.rate_limiter import get_rate_limiter, estimate_request_tokens
+from src.core.prompt_engine import get_prompt_engine
+from src.core.semantic_cache import get_semantic_cache
 from src.core.context_tracker import ContextTracker
 
 # Load API key from .env
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+PLANNER_SYSTEM_PROMPT = "You are a professional AI software project planner. Break down goals into clear steps."
 
 # Initialize prompt engine and context tracker
-prompt_engine = PromptEngine()
+prompt_engine = get_prompt_engine()
 context = ContextTracker()
 
 
@@ -40,93 +47,185 @@ def fallback_plan(user_goal: str):
     return fallback
 
 
-def generate_plan(user_goal: str, temperature: float = 0.3, model: str = "llama-3.1-70b-versatile"):
+def build_plan_request(user_goal: str, temperature: float, model: str, references: str = None):
+    """
+    Build the headers and JSON payload for a planning request.
+    `references` (plans of similar past projects) is appended to the prompt.
+    """
+    headers = {
+        "Authorization": f"Bearer {GROQ_API_KEY}",
+        "Content-Type": "application/json"
+    }
+
+    # Build prompt
+    prompt = prompt_engine.build_planner_prompt(user_goal, references or "")
+
+    messages = [
+        {"role": "system", "content": PLANNER_SYSTEM_PROMPT},
+        {"role": "user", "content": prompt}
+    ]
+
+    payload = {
+        "model": model,
+        "messages": messages,
+        "temperature": temperature,
+        "max_tokens": 2048
+    }
+    prompt_engine.check_fits(messages, model, payload["max_tokens"])
+    prompt_engine.record("planner", PLANNER_SYSTEM_PROMPT, prompt)
+    return headers, payload
+
+
+def extract_plan_text(response):
+    """
+    Return the planner's raw output from a chat-completion response,
+    or None on any API-level error.
+    """
+    if response.status_code != 200:
+        print(f"❌ API Error {response.status_code}: {response.text}")
+        return None
+
+    result = response.json()
+
+    # Safe extraction of choices
+    choices = result.get("choices")
+    if not choices or len(choices) == 0:
+        print("❌ API returned no choices:", result)
+        return None
+
+    message = choices[0].get("message")
+    if not message or "content" not in message:
+        print("❌ API choice has no content:", choices[0])
+        return None
+
+    return message["content"]
+
+
+def parse_plan_response(user_goal: str, response, model: str):
+    """
+    Turn a chat-completion response into a structured plan dict.
+    Falls back to the default plan on any API-level error.
+    """
+    raw_output = extract_plan_text(response)
+    if raw_output is None:
+        return fallback_plan(user_goal)
+    return structure_plan(user_goal, raw_output, model)
+
+
+def plan_cache_context(model: str, temperature: float, references: str = None) -> str:
+    """Cached plans are only reused for the same model, temperature, prompt and past-project references."""
+    references_hash = hashlib.sha256((references or "").encode("utf-8")).hexdigest()
+    return f"{model}|{temperature}|{PLANNER_SYSTEM_PROMPT}|{prompt_engine.build_planner_prompt('')}|{references_hash}"
+
+
+def finish_plan(user_goal: str, response, model: str, context_key: str, cache):
+    """Structure a fresh response and remember it in the semantic cache."""
+    raw_output = extract_plan_text(response)
+    if raw_output is None:
+        return fallback_plan(user_goal)
+    if cache is not None:
+        cache.store("planner", user_goal, raw_output, context_key)
+    return structure_plan(user_goal, raw_output, model)
+
+
+def structure_plan(user_goal: str, raw_output: str, model: str):
+    """
+    Convert the planner's markdown output into {"goal", "tasks"}.
+    """
+    context.update_variable("raw_llm_output", raw_output)
+
+    # Convert output into structured task list
+    task_list = []
+    lines = raw_output.strip().split("\n")
+    for line in lines:
+        match = re.match(r"^\s*(?:\d+\.|-|\*)\s+(.*)", line)
+        if match:
+            task = match.group(1).strip()
+            task_list.append(task)
+
+    # fallback: if nothing parsed, fallback to the whole output as 1 step
+    if not task_list:
+        task_list = [raw_output.strip()]
+
+    structured_plan = {
+        "goal": user_goal,
+        "tasks": task_list
+    }
+
+    context.update_variable("used_model", model)
+    context.update_variable("structured_plan", structured_plan)
+    context.log_event("Plan generated", f"Model: {model}")
+
+    return structured_plan
+
+
+def generate_plan(user_goal: str, temperature: float = 0.3, model: str = "llama-3.1-70b-versatile",
+                  references: str = None):
     """
     Generate a structured plan for the given user goal using Groq API.
     Handles errors safely and always returns a structured plan.
+    `references` are plans of similar past projects to build on.
     """
     try:
-        url = "https://api.groq.com/openai/v1/chat/completions"
-        headers = {
-            "Authorization": f"Bearer {GROQ_API_KEY}",
-            "Content-Type": "application/json"
-        }
-
-        # Build prompt
-        prompt = prompt_engine.build_planner_prompt(user_goal)
-
-        messages = [
-            {
-                "role": "system",
-                "content": "You are a professional AI software project planner. Break down goals into clear steps."
-            },
-            {"role": "user", "content": prompt}
-        ]
+        # Reworded versions of an earlier goal reuse its plan
+        cache, context_key = get_semantic_cache(), plan_cache_context(model, temperature, references)
+        cached = cache.lookup("planner", user_goal, context_key) if cache else None
+        if cached is not None:
+            print("🧲 Reusing plan of a near-identical goal.")
+            return structure_plan(user_goal, cached, model)
+
+        headers, payload = build_plan_request(user_goal, temperature, model, references)
+
+        # The router falls back to another backend/model if `model` is unavailable
+        with get_rate_limiter().reserve(estimate_request_tokens(payload)):
+            response, _, sent_model = get_llm_router().post(headers, payload)
 
-        payload = {
-            "model": model,
-            "messages": messages,
-            "temperature": temperature,
-            "max_tokens": 2048
-        }
-
-        response = requests.post(url, headers=headers, json=payload)
-
-        # Handle model deprecation errors
-        if response.status_code == 400 and "model" in response.text:
-            print(f"⚠️ Model {model} not available. Falling back to llama-3.1-8b-instant...")
-            payload["model"] = "llama-3.1-8b-instant"
-            response = requests.post(url, headers=headers, json=payload)
-
-        if response.status_code != 200:
-            print(f"❌ API Error {response.status_code}: {response.text}")
-            return fallback_plan(user_goal)
-
-        result = response.json()
-
-        # Safe extraction of choices
-        choices = result.get("choices")
-        if not choices or len(choices) == 0:
-            print("❌ API returned no choices:", result)
-            return fallback_plan(user_goal)
-
-        message = choices[0].get("message")
-        if not message or "content" not in message:
-            print("❌ API choice has no content:", choices[0])
-            return fallback_plan(user_goal)
-
-        raw_output = message["content"]
-        context.update_variable("raw_llm_output", raw_output)
-
-        # Convert output into structured task list
-        task_list = []
-        lines = raw_output.strip().split("\n")
-        for line in lines:
-            match = re.match(r"^\s*(?:\d+\.|-|\*)\s+(.*)", line)
-            if match:
-                task = match.group(1).strip()
-                task_list.append(task)
-
-        # fallback: if nothing parsed, fallback to the whole output as 1 step
-        if not task_list:
-            task_list = [raw_output.strip()]
-
-        structured_plan = {
-            "goal": user_goal,
-            "tasks": task_list
-        }
-
-        context.update_variable("used_model", model)
-        context.update_variable("structured_plan", structured_plan)
-        context.log_event("Plan generated", f"Model: {model}")
-
-        return structured_plan
+        return finish_plan(user_goal, response, sent_model, context_key, cache)
 
     except Exception as e:
         print("❌ Error generating plan:", e)
         return fallback_plan(user_goal)
 
 
+async def agenerate_plan(user_goal: str, temperature: float = 0.3, model: str = "llama-3.1-70b-versatile", hedge: str = None,
+                         references: str = None):
+    """
+    Async variant of `generate_plan` that does not block the event loop.
+    `hedge` names the call site when slow calls should be hedged.
+    """
+    try:
+        # Embedding is CPU-bound, so it runs off the event loop
+        cache, context_key = get_semantic_cache(), plan_cache_context(model, temperature, references)
+        cached = await asyncio.to_thread(cache.lookup, "planner", user_goal, context_key) if cache else None
+        if cached is not None:
+            print("🧲 Reusing plan of a near-identical goal.")
+            return structure_plan(user_goal, cached, model)
+
+        headers, payload = build_plan_request(user_goal, temperature, model, references)
+
+        async with get_rate_limiter().areserve(estimate_request_tokens(payload)):
+            response, _, sent_model = await get_llm_router().apost(headers, payload, hedge=hedge, tracker=tracker)
+
+        if cache is None:
+            return finish_plan(user_goal, response, sent_model, context_key, None)
+        return await asyncio.to_thread(finish_plan, user_goal, response, sent_model, context_key, cache)
+
+    except Exception as e:
+        print("❌ Error generating plan:", e)
+        return fallback_plan(user_goal)
+
+
+async def astream_plan(user_goal: str, temperature: float = 0.3, model: str = "llama-3.1-70b-versatile"):
+    """
+    Stream the raw planner output as it is generated. Feed the joined text to
+    `structure_plan` once the stream ends to get the structured plan.
+    """
+    prompt = prompt_engine.build_planner_prompt(user_goal)
+    prompt_engine.record("planner", PLANNER_SYSTEM_PROMPT, prompt)
+    async for delta in astream_llm(prompt, temperature, model, system_prompt=PLANNER_SYSTEM_PROMPT, max_tokens=2048):
+        yield delta
+
+
 # 🔁 Standalone test
 if __name__ == "__main__":
     test_goal = "Build an AI assistant that generates, debugs, and deploys Python code."
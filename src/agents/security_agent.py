@@ -7,7 +7,9 @@ import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
 from dotenv import load_dotenv
-from src.core.llm_adapter import query_llm
+from src.core.llm_adapter import query_llm, async_query_llm
+from src.core.prompt_engine import get_prompt_engine
+from src.core.chunked_analysis import needs_chunking, analyze_chunks, aanalyze_chunks
 
 load_dotenv()
 
@@ -31,12 +33,38 @@ Respond in this format:
 - Fix 2: Description
 """
 
+SECURITY_ROLE = "You are a senior security analyst."
+SECURITY_HEADINGS = ("🚨 Issues Found", "✅ Suggestions")
+SECURITY_FOCUS = ("security issues: unsafe input handling, insecure libraries, hardcoded secrets, "
+                  "insecure configurations and other violations of security best practices")
+
+def build_security_prompt(code: str):
+    """Return (system_prompt, user_prompt), trimmed to the context window."""
+    return get_prompt_engine().assemble("security", SECURITY_SCAN_PROMPT, code, label=None)
+
 def run_security_scan(code: str) -> str:
     print("🔐 Running security scan...")
     if not code.strip():
         return "❌ No code provided for security analysis."
-    prompt = SECURITY_SCAN_PROMPT + f"\n\n```python\n{code}\n```"
-    response = query_llm(prompt)
+    if needs_chunking(code):
+        response = analyze_chunks(code, "security", SECURITY_ROLE, SECURITY_FOCUS, SECURITY_HEADINGS)
+        print("✅ Security scan completed.")
+        return response
+    system_prompt, prompt = build_security_prompt(code)
+    response = query_llm(prompt, system_prompt=system_prompt)
+    print("✅ Security scan completed.")
+    return response
+
+async def arun_security_scan(code: str) -> str:
+    print("🔐 Running security scan...")
+    if not code.strip():
+        return "❌ No code provided for security analysis."
+    if needs_chunking(code):
+        response = await aanalyze_chunks(code, "security", SECURITY_ROLE, SECURITY_FOCUS, SECURITY_HEADINGS)
+        print("✅ Security scan completed.")
+        return response
+    system_prompt, prompt = build_security_prompt(code)
+    response = await async_query_llm(prompt, system_prompt=system_prompt)
     print("✅ Security scan completed.")
     return response
 
@@ -5,7 +5,9 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")
 from dotenv import load_dotenv
 from pathlib import Path
 from typing import List
-from src.core.llm_adapter import query_llm  # Groq-compatible
+from src.core.llm_adapter import query_llm, async_query_llm  # Groq-compatible
+from src.core.prompt_engine import get_prompt_engine
+from src.core.chunked_analysis import needs_chunking, analyze_chunks, aanalyze_chunks
 
 # ✅ Load environment variables
 load_dotenv()
@@ -40,6 +42,14 @@ Return your analysis in the following format:
 # corrected code here
 ```"""
 
+DEBUG_ROLE = "You are a senior software engineer and code reviewer."
+DEBUG_HEADINGS = ("🐞 **Bugs Found**", "🛠️ **Suggested Fixes**")
+DEBUG_FOCUS = "bugs: logic errors, wrong edge cases, unhandled exceptions and misuse of APIs"
+
+def build_debug_prompt(code: str):
+    """Return (system_prompt, user_prompt), trimmed to the context window."""
+    return get_prompt_engine().assemble("debugger", DEBUG_SYSTEM_PROMPT, code, label="📂 Code to debug")
+
 # ✅ Main LLM Debugger Logic (for manual use)
 def run_debug_agent(file_path: str) -> str:
     print("📥 Loading file...")
@@ -49,17 +59,37 @@ def run_debug_agent(file_path: str) -> str:
         print("📛 Error loading code")
         return code
 
-    print("📤 Sending to LLM...")
-    full_prompt = DEBUG_SYSTEM_PROMPT + f"\n\n📂 Code to debug:\n```python\n{code}\n```"
-    result = query_llm(full_prompt)
+    result = debug_source(code)
     print("🧾 LLM response received.")
     return result
 
+# ✅ Bug report for a code string (manual and batch use)
+def debug_source(code: str) -> str:
+    if needs_chunking(code):
+        # Large files are analysed per function/class instead of being trimmed
+        return analyze_chunks(code, "debugger", DEBUG_ROLE, DEBUG_FOCUS, DEBUG_HEADINGS)
+    print("📤 Sending to LLM...")
+    system_prompt, prompt = build_debug_prompt(code)
+    return query_llm(prompt, system_prompt=system_prompt)
+
+async def adebug_source(code: str) -> str:
+    if needs_chunking(code):
+        return await aanalyze_chunks(code, "debugger", DEBUG_ROLE, DEBUG_FOCUS, DEBUG_HEADINGS)
+    print("📤 Sending to LLM...")
+    system_prompt, prompt = build_debug_prompt(code)
+    return await async_query_llm(prompt, system_prompt=system_prompt)
+
 # ✅ Required by orchestrator: accepts code string
 def debug_code(code: str) -> str:
     print("🧠 Debugging code via LLM...")
-    full_prompt = DEBUG_SYSTEM_PROMPT + f"\n\n📂 Code to debug:\n```python\n{code}\n```"
-    return query_llm(full_prompt)
+    system_prompt, prompt = build_debug_prompt(code)
+    return query_llm(prompt, system_prompt=system_prompt)
+
+# ✅ Async variant for event-loop callers
+async def adebug_code(code: str) -> str:
+    print("🧠 Debugging code via LLM...")
+    system_prompt, prompt = build_debug_prompt(code)
+    return await async_query_llm(prompt, system_prompt=system_prompt)
 
 # ✅ CLI Entry Point
 if __name__ == "__main__":
@@ -10,7 +10,8 @@ load_dotenv()
 
 # Import from utils
 from src.utils.file_loader import load_code
-from src.core.llm_adapter import query_llm
+from src.core.llm_adapter import query_llm, async_query_llm, astream_llm
+from src.core.prompt_engine import get_prompt_engine
 
 
 # 🧪 Prompt template
@@ -18,6 +19,10 @@ TEST_SYSTEM_PROMPT = """You are a senior software testing engineer. Generate uni
 Use `pytest` or `unittest`. Return only valid code inside triple backticks. No explanations.
 """
 
+def build_test_prompt(code: str):
+    """Return (system_prompt, user_prompt), trimmed to the context window."""
+    return get_prompt_engine().assemble("tests", TEST_SYSTEM_PROMPT, code, label=None)
+
 # Generate tests from local code file
 def generate_tests(file_path: str) -> str:
     if not os.path.exists(file_path):
@@ -28,8 +33,8 @@ def generate_tests(file_path: str) -> str:
         if code.startswith("❌"):
             return code
 
-        prompt = f"{TEST_SYSTEM_PROMPT}\n\n```python\n{code}\n```"
-        result = query_llm(prompt)
+        system_prompt, prompt = build_test_prompt(code)
+        result = query_llm(prompt, system_prompt=system_prompt)
 
         if not result:
             return "❌ No test output returned."
@@ -38,6 +43,25 @@ def generate_tests(file_path: str) -> str:
     except Exception as e:
         return f"❌ Error generating tests: {e}"
 
+async def agenerate_tests(file_path: str) -> str:
+    if not os.path.exists(file_path):
+        return f"❌ File not found: {file_path}"
+
+    try:
+        code = load_code(file_path)
+        if code.startswith("❌"):
+            return code
+
+        system_prompt, prompt = build_test_prompt(code)
+        result = await async_query_llm(prompt, system_prompt=system_prompt)
+
+        if not result:
+            return "❌ No test output returned."
+
+        return result
+    except Exception as e:
+        return f"❌ Error generating tests: {e}"
+
 # Write tests to file and optionally run them (manual CLI)
 def run_tests(test_code: str) -> str:
     import subprocess
@@ -51,16 +75,38 @@ def run_tests(test_code: str) -> str:
 
 # ✅ MAIN FUNCTION USED BY FastAPI
 
-def generate_tests_for(idea: str) -> str:
+def generated_main_path(idea: str) -> str:
     # Convert idea to path: "AI assistant" -> "./generated/ai_assistant/main.py"
     safe_path = idea.strip().lower().replace(" ", "_")
-    file_path = f"./generated/{safe_path}/main.py"
+    return f"./generated/{safe_path}/main.py"
+
+def generate_tests_for(idea: str) -> str:
+    file_path = generated_main_path(idea)
 
     if not os.path.exists(file_path):
         return f"❌ Code not found: {file_path}"
 
     return generate_tests(file_path)
 
+async def agenerate_tests_for(idea: str) -> str:
+    file_path = generated_main_path(idea)
+
+    if not os.path.exists(file_path):
+        return f"❌ Code not found: {file_path}"
+
+    return await agenerate_tests(file_path)
+
+async def astream_tests_for(idea: str):
+    file_path = generated_main_path(idea)
+
+    if not os.path.exists(file_path):
+        yield f"❌ Code not found: {file_path}"
+        return
+
+    system_prompt, prompt = build_test_prompt(load_code(file_path))
+    async for delta in astream_llm(prompt, system_prompt=system_prompt):
+        yield delta
+
 # ✅ For direct CLI testing
 if __name__ == "__main__":
     print("🧪 Test Agent Started")
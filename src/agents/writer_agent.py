@@ -1,10 +1,13 @@
 # src/agents/writer_agent.py
 
+import asyncio
 import os
 import sys
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-from src.core.llm_adapter import query_llm  # This should exist
+from src.core.llm_adapter import query_llm, async_query_llm, astream_llm  # This should exist
+from src.core.prompt_engine import get_prompt_engine
+from src.core.semantic_cache import get_semantic_cache
 from dotenv import load_dotenv
 
 load_dotenv()
@@ -15,9 +18,40 @@ You are a professional Python developer.
 Generate a clean, modular, and well-documented Python script based on the following project idea:
 """
 
+def build_writer_prompt(idea: str):
+    """Return (system_prompt, user_prompt), trimmed to the context window."""
+    return get_prompt_engine().assemble("writer", CODE_WRITER_PROMPT, idea, label="💡 Project Idea", language=None)
+
 def write_code(idea: str) -> str:
-    prompt = CODE_WRITER_PROMPT + f"\n\n💡 Project Idea:\n{idea}"
-    return query_llm(prompt)
+    # Reworded versions of an earlier idea reuse its code
+    cache = get_semantic_cache()
+    cached = cache.lookup("writer", idea, CODE_WRITER_PROMPT) if cache else None
+    if cached is not None:
+        print("🧲 Reusing code of a near-identical idea.")
+        return cached
+    system_prompt, prompt = build_writer_prompt(idea)
+    code = query_llm(prompt, system_prompt=system_prompt)
+    if cache is not None:
+        cache.store("writer", idea, code, CODE_WRITER_PROMPT)
+    return code
+
+async def awrite_code(idea: str, hedge: str = None) -> str:
+    # Embedding is CPU-bound, so cache calls run off the event loop
+    cache = get_semantic_cache()
+    cached = await asyncio.to_thread(cache.lookup, "writer", idea, CODE_WRITER_PROMPT) if cache else None
+    if cached is not None:
+        print("🧲 Reusing code of a near-identical idea.")
+        return cached
+    system_prompt, prompt = build_writer_prompt(idea)
+    code = await async_query_llm(prompt, system_prompt=system_prompt, hedge=hedge)
+    if cache is not None:
+        await asyncio.to_thread(cache.store, "writer", idea, code, CODE_WRITER_PROMPT)
+    return code
+
+async def astream_write_code(idea: str):
+    system_prompt, prompt = build_writer_prompt(idea)
+    async for delta in astream_llm(prompt, system_prompt=system_prompt):
+        yield delta
 
 if __name__ == "__main__":
     user_idea = input("💡 Enter project idea: ")
@@ -2,6 +2,8 @@ import os
 import subprocess
 import sys
 
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
 def install_packages(requirements_file="requirements.txt"):
     if os.path.exists(requirements_file):
         print(f"📦 Installing dependencies from {requirements_file}...")
@@ -34,9 +36,18 @@ def install_local_packages():
 
 def download_models():
     print("🧠 Downloading required models (optional step)...")
+    from src.vector_store.embedding_service import DEFAULT_EMBEDDING_MODEL, load_model
+    from src.vector_store.embedding_server import DEFAULT_SERVER_URL, EmbeddingClient
+
+    model_name = os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+    server_url = os.getenv("EMBEDDING_SERVER_URL", DEFAULT_SERVER_URL)
+    # A running embedding server already has the model on disk and in memory
+    health = EmbeddingClient(server_url).health() if server_url else None
+    if health is not None and model_name in health.get("models", {}):
+        print(f"✅ Model {model_name} already served at {server_url}.")
+        return
     try:
-        from sentence_transformers import SentenceTransformer
-        SentenceTransformer('all-MiniLM-L6-v2')
+        load_model(model_name)
         print("✅ Model downloaded.")
     except ImportError:
         print("⚠️ SentenceTransformers not installed. Skipping model download.")
@@ -12,6 +12,10 @@ load_dotenv()
 # Core Modules
 from src.core.context_tracker import ContextTracker
 from src.core.memory_manager import MemoryManager
+from src.core.stage_graph import Stage, StageGraph
+from src.core.rate_limiter import llm_priority
+from src.core.prompt_engine import get_prompt_engine
+from src.core.session_retriever import get_session_retriever
 from src.utils.time_utils import Timer, get_current_timestamp
 from src.utils.cost_estimator import estimate_cost
 from src.utils.file_utils import save_json, get_timestamped_filename
@@ -23,13 +27,15 @@ from src.agents.self_debugger_agent import debug_code
 from src.agents.doc_agent import generate_docs
 from src.agents.docker_agent import generate_dockerfile
 
-from src.agents.test_agent import run_tests
+from src.agents.test_agent import run_tests, generated_main_path
 
 from src.agents.security_agent import run_security_scan  # ✅ Add this file if not exists
 from src.agents.performance_agent import run_performance_tests  # ✅ Add this file if not exists
+from src.agents.analysis_agent import run_fused_analysis
 
 # Vector Store
 from src.vector_store.weaviate_adapter import store_context_vector
+from src.vector_store.code_indexer import get_code_indexer
 
 # ✅ Initialize context and memory
 context = ContextTracker()
@@ -44,75 +50,202 @@ def validate_plan_structure(plan):
     return isinstance(plan, dict) and "tasks" in plan
 
 
-def orchestrate_project(user_prompt: str, session_id="latest"):
+def estimate_cost_stage(plan):
+    cost = estimate_cost(plan)
+    context.update_variable("project_cost_estimate", cost)
+    print(f"💰 Estimated Cost: ${cost['estimated_total_cost_usd']} | Team Size: {cost['estimated_team_size']} | Duration: {cost['estimated_duration_weeks']} weeks")
+    log_stage_event("Cost Estimate", cost)
+    return cost
+
+
+def retrieve_references(user_prompt: str) -> dict:
+    """Plans and code of similar past runs, each as a token-budgeted prompt section ("" if none)."""
+    retriever = get_session_retriever()
+    if retriever is None:
+        return {"plan": "", "code": ""}
+    try:
+        references = {kind: retriever.references(user_prompt, kind) for kind in ("plan", "code")}
+    except Exception as e:
+        print(f"⚠️ Retrieval of past sessions failed: {e}")
+        return {"plan": "", "code": ""}
+    found = [kind for kind, text in references.items() if text]
+    context.log_event("Retrieval completed", f"Past {' and '.join(found) or 'runs'}: {'used' if found else 'none similar'}")
+    return references
+
+
+def code_generation_stage(plan, code_references):
+    generated_code = run_code_writer(plan, references=code_references)
+    context.log_event("Code generation completed", "Initial code generated.")
+    log_stage_event("Code Generated", generated_code)
+    return generated_code
+
+
+def debugging_stage(generated_code):
+    debugged_code = debug_code(generated_code)
+    context.log_event("Debugging completed", "Bugs fixed and logic verified.")
+    return debugged_code
+
+
+def unit_testing_stage(debugged_code):
+    test_results = run_tests(debugged_code)
+    context.log_event("Unit Testing completed", f"Results: {test_results}")
+    return test_results
+
+
+def integration_testing_stage(debugged_code):
+    integration_results = run_integration_tests(debugged_code)
+    context.log_event("Integration Tests completed", f"Integration Results: {integration_results}")
+    return integration_results
+
+
+def security_scan_stage(debugged_code):
+    security_report = run_security_scan(debugged_code)
+    context.log_event("Security Scan completed", "Security issues analyzed.")
+    return security_report
+
+
+def performance_stage(debugged_code):
+    perf_report = run_performance_tests(debugged_code)
+    context.log_event("Performance Tests completed", "Performance validated.")
+    return perf_report
+
+
+def documentation_stage(debugged_code):
+    documentation = generate_docs(debugged_code)
+    context.log_event("Documentation generated", "README, API docs created.")
+    return documentation
+
+
+def fused_analysis_stage(debugged_code):
+    # Security, performance and docs from one completion instead of three
+    results = run_fused_analysis(debugged_code, sections=("security", "performance", "docs"))
+    context.log_event("Fused analysis completed", "Security, performance and documentation generated together.")
+    return results["security"], results["performance"], results["docs"]
+
+
+def docker_stage(debugged_code):
+    dockerfile = generate_dockerfile(debugged_code)
+    context.log_event("Dockerfile created", "Docker setup complete.")
+    return dockerfile
+
+
+def github_stage(debugged_code, documentation, dockerfile):
+    repo_url = push_to_github(debugged_code, documentation, dockerfile)
+    context.update_variable("github_repo", repo_url)
+    context.log_event("GitHub Push completed", repo_url)
+    return repo_url
+
+
+def vector_store_stage(repo_url, test_results, integration_results, security_report, perf_report, project_cost_estimate):
+    # Waits for every other stage so the stored context is complete
+    store_context_vector(context.get_context())
+
+
+def session_memory_stage(idea, plan, debugged_code, session_id):
+    """
+    Record this run so future runs on similar ideas start from its plan and
+    code, and index the code at function/class level. It only needs the
+    code, not GitHub or Weaviate, and failures are logged instead of
+    failing the run.
+    """
+    try:
+        retriever = get_session_retriever()
+        if retriever is not None:
+            retriever.record(idea, plan, debugged_code, session_id)
+            context.log_event("Session recorded", "Plan and code stored for retrieval by later runs.")
+    except Exception as e:
+        print(f"⚠️ Recording the session for retrieval failed: {e}")
+
+    try:
+        indexer = get_code_indexer()
+        if indexer is not None:
+            # The project on disk when an earlier step wrote it, otherwise the code of this run;
+            # unchanged files cost nothing either way
+            project_dir = os.path.dirname(generated_main_path(idea))
+            if os.path.isdir(project_dir):
+                indexer.index(project_dir)
+            elif isinstance(debugged_code, str) and debugged_code.strip():
+                indexer.index_source(debugged_code, os.path.basename(project_dir))
+    except Exception as e:
+        print(f"⚠️ Indexing the generated code failed: {e}")
+
+
+def build_project_graph(max_concurrency: int = None, fused_analysis: bool = None) -> StageGraph:
+    """
+    Declarative pipeline for `orchestrate_project`, starting from a validated
+    plan, the idea, the session id and the retrieved code references.
+    With `fused_analysis` (default: ORCHESTRATOR_FUSED_ANALYSIS) the security,
+    performance and docs stages are replaced by a single fused LLM call.
+    """
+    if max_concurrency is None:
+        max_concurrency = int(os.getenv("ORCHESTRATOR_CONCURRENCY", "4"))
+    if fused_analysis is None:
+        fused_analysis = os.getenv("ORCHESTRATOR_FUSED_ANALYSIS", "0") == "1"
+    timeout = float(os.getenv("ORCHESTRATOR_STAGE_TIMEOUT", "300"))
+
+    if fused_analysis:
+        analysis_stages = [
+            Stage("analysis", fused_analysis_stage, ["debugged_code"], ["security_report", "perf_report", "documentation"], timeout, "🧩 Fused Analysis"),
+        ]
+    else:
+        analysis_stages = [
+            Stage("security", security_scan_stage, ["debugged_code"], ["security_report"], timeout, "🔐 Security Scan"),
+            Stage("performance", performance_stage, ["debugged_code"], ["perf_report"], timeout, "🚀 Performance Testing"),
+            Stage("docs", documentation_stage, ["debugged_code"], ["documentation"], timeout, "📄 Documentation"),
+        ]
+
+    return StageGraph([
+        Stage("cost", estimate_cost_stage, ["plan"], ["project_cost_estimate"], label="🧾 Estimating cost"),
+        Stage("code", code_generation_stage, ["plan", "code_references"], ["generated_code"], timeout, "💻 Code generation"),
+        Stage("debug", debugging_stage, ["generated_code"], ["debugged_code"], timeout, "🧠 Debugging"),
+        Stage("unit_tests", unit_testing_stage, ["debugged_code"], ["test_results"], timeout, "✅ Unit Testing"),
+        Stage("integration_tests", integration_testing_stage, ["debugged_code"], ["integration_results"], timeout, "🔁 Integration Testing"),
+        *analysis_stages,
+        Stage("docker", docker_stage, ["debugged_code"], ["dockerfile"], timeout, "🐳 Dockerization"),
+        Stage("github", github_stage, ["debugged_code", "documentation", "dockerfile"], ["repo_url"], timeout, "🐙 GitHub Upload"),
+        Stage("session_memory", session_memory_stage, ["idea", "plan", "debugged_code", "session_id"], [], timeout,
+              "📚 Session memory"),
+        Stage(
+            "vector_store",
+            vector_store_stage,
+            ["repo_url", "test_results", "integration_results", "security_report", "perf_report", "project_cost_estimate"],
+            [],
+            timeout,
+            "🧠 Vector Storage",
+        ),
+    ], max_concurrency=max_concurrency)
+
+
+def orchestrate_project(user_prompt: str, session_id="latest", max_concurrency: int = None):
     print(f"\n🔁 Orchestration started at {get_current_timestamp()}...")
 
+    # 0. 📚 Retrieval of similar past runs, used by planning and code generation
+    with Timer("📚 Retrieval phase"):
+        references = retrieve_references(user_prompt)
+
     # 1. 📌 Planning
     with Timer("📌 Planning phase"):
-        plan = generate_plan(user_prompt)
+        plan = generate_plan(user_prompt, references=references["plan"])
         if not plan or not validate_plan_structure(plan):
             print("❌ Planning failed. Invalid plan structure.")
             return
         context.log_event("Planning completed", "Structured plan received.")
         log_stage_event("Planning", plan)
 
-    # 2. 💰 Estimating cost
-    with Timer("🧾 Estimating cost"):
-        cost = estimate_cost(plan)
-        context.update_variable("project_cost_estimate", cost)
-        print(f"💰 Estimated Cost: ${cost['estimated_total_cost_usd']} | Team Size: {cost['estimated_team_size']} | Duration: {cost['estimated_duration_weeks']} weeks")
-        log_stage_event("Cost Estimate", cost)
-
-    # 3. 💻 Code Generation
-    with Timer("💻 Code generation"):
-        generated_code = run_code_writer(plan)
-        context.log_event("Code generation completed", "Initial code generated.")
-        log_stage_event("Code Generated", generated_code)
-
-    # 4. 🧠 Debugging
-    with Timer("🧠 Debugging"):
-        debugged_code = debug_code(generated_code)
-        context.log_event("Debugging completed", "Bugs fixed and logic verified.")
-
-    # 5. ✅ Testing
-    with Timer("✅ Unit Testing"):
-        test_results = run_tests(debugged_code)
-        context.log_event("Unit Testing completed", f"Results: {test_results}")
-
-    # 6. 🔁 Integration Testing
-    with Timer("🔁 Integration Testing"):
-        integration_results = run_integration_tests(debugged_code)
-        context.log_event("Integration Tests completed", f"Integration Results: {integration_results}")
-
-    # 7. 🔐 Security Scan
-    with Timer("🔐 Security Scan"):
-        security_report = run_security_scan(debugged_code)
-        context.log_event("Security Scan completed", "Security issues analyzed.")
-
-    # 8. 🚀 Performance Testing
-    with Timer("🚀 Performance Testing"):
-        perf_report = run_performance_tests(debugged_code)
-        context.log_event("Performance Tests completed", "Performance validated.")
-
-    # 9. 📄 Documentation
-    with Timer("📄 Documentation"):
-        documentation = generate_docs(debugged_code)
-        context.log_event("Documentation generated", "README, API docs created.")
-
-    # 10. 🐳 Docker
-    with Timer("🐳 Dockerization"):
-        dockerfile = generate_dockerfile(debugged_code)
-        context.log_event("Dockerfile created", "Docker setup complete.")
-
-    # 11. 🐙 GitHub
-    with Timer("🐙 GitHub Upload"):
-        repo_url = push_to_github(debugged_code, documentation, dockerfile)
-        context.update_variable("github_repo", repo_url)
-        context.log_event("GitHub Push completed", repo_url)
-
-    # 12. 🧠 Vector Store
-    with Timer("🧠 Vector Storage"):
-        store_context_vector(context.get_context())
+    # 2-12. Everything after planning runs as a stage graph: stages start as
+    # soon as their inputs exist, so the analysis stages that only need
+    # `debugged_code` run side by side instead of one after another.
+    graph = build_project_graph(max_concurrency=max_concurrency)
+    with llm_priority("batch"):
+        results = graph.run({
+            "plan": plan, "idea": user_prompt, "session_id": session_id, "code_references": references["code"]
+        })
+    graph.print_report()
+    get_prompt_engine().print_report()
+
+    debugged_code = results["debugged_code"]
+    documentation = results["documentation"]
+    repo_url = results["repo_url"]
 
     # 🔒 Save context
     memory.save_context(context, session_id=session_id)
@@ -0,0 +1,179 @@
+# src/core/chunked_analysis.py
+
+import asyncio
+import contextvars
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from src.core.code_chunker import split_code
+from src.core.llm_adapter import query_llm, async_query_llm
+from src.core.prompt_engine import get_prompt_engine, count_tokens
+
+CHUNK_ANALYSIS_PROMPT = """
+{role}
+
+You are analysing one part of a larger Python file. Every line starts with its line number in the original file.
+Lines above "# --- analysed section ---" are context only (imports, enclosing class); report problems in the analysed section.
+
+Look for {focus}.
+
+Return ONLY a JSON object of this shape:
+{{"findings": [{{"line": <line number>, "severity": "high" | "medium" | "low", "issue": "<what is wrong>", "fix": "<how to fix it>"}}]}}
+Return {{"findings": []}} if the section has no problems.
+"""
+
+SEVERITY_ORDER = {"high": 0, "medium": 1, "low": 2}
+
+
+def chunk_tokens() -> int:
+    """Target chunk size: LLM_CHUNK_TOKENS, never more than the prompt budget allows."""
+    return min(int(os.getenv("LLM_CHUNK_TOKENS", "3000")), get_prompt_engine().prompt_budget() - 600)
+
+
+def needs_chunking(code: str) -> bool:
+    """Files above one chunk are analysed with map-reduce instead of a single prompt."""
+    return count_tokens(code) > chunk_tokens()
+
+
+def parse_findings(text: str, chunk) -> list:
+    """
+    Turn one chunk's JSON answer into finding dicts. Line numbers outside
+    the chunk (and its context) are dropped to None rather than trusted.
+    """
+    cleaned = re.sub(r"^```(?:json)?\s*|\s*```$", "", text.strip())
+    data = json.loads(cleaned)
+    findings = data.get("findings", []) if isinstance(data, dict) else []
+    context_lines = {n for n, _ in chunk.context}
+
+    parsed = []
+    for item in findings:
+        if not isinstance(item, dict) or not str(item.get("issue", "")).strip():
+            continue
+        try:
+            line = int(item.get("line"))
+        except (TypeError, ValueError):
+            line = None
+        if line is not None and not chunk.contains(line) and line not in context_lines:
+            line = None
+        severity = str(item.get("severity", "medium")).lower()
+        parsed.append({
+            "line": line,
+            "severity": severity if severity in SEVERITY_ORDER else "medium",
+            "issue": str(item["issue"]).strip(),
+            "fix": str(item.get("fix", "")).strip(),
+            "chunk": chunk.name,
+        })
+    return parsed
+
+
+def _normalize(text: str) -> str:
+    return " ".join(re.sub(r"[^a-z0-9]+", " ", text.lower()).split())[:80]
+
+
+def merge_findings(findings: list) -> list:
+    """
+    De-duplicate findings (the same issue on the same line is often reported
+    by every chunk that sees a shared import) and sort them by line.
+    """
+    merged = {}
+    for finding in findings:
+        key = (finding["line"], _normalize(finding["issue"]))
+        current = merged.get(key)
+        if current is None or SEVERITY_ORDER[finding["severity"]] < SEVERITY_ORDER[current["severity"]]:
+            merged[key] = finding
+    return sorted(merged.values(), key=lambda f: (f["line"] is None, f["line"] or 0, SEVERITY_ORDER[f["severity"]]))
+
+
+def format_findings(findings: list, headings: tuple, failed_chunks: list = ()) -> str:
+    """Render merged findings in the two-section Markdown layout the agents already use."""
+    issues_title, fixes_title = headings
+
+    def where(finding):
+        return f"Line {finding['line']}" if finding["line"] is not None else finding["chunk"]
+
+    issues = [f"- {where(f)} ({f['severity']}): {f['issue']}" for f in findings] or ["- None found"]
+    fixes = [f"- {where(f)}: {f['fix']}" for f in findings if f["fix"]] or ["- None"]
+    report = [f"1. {issues_title}:", *issues, "", f"2. {fixes_title}:", *fixes]
+    if failed_chunks:
+        report += ["", "⚠️ Not analysed (LLM call failed or invalid answer): " + ", ".join(failed_chunks)]
+    return "\n".join(report)
+
+
+def _chunk_prompts(code: str, agent: str, role: str, focus: str):
+    system_prompt = CHUNK_ANALYSIS_PROMPT.format(role=role.strip(), focus=focus).strip()
+    chunks = split_code(code, max_tokens=chunk_tokens())
+    prompts = [f"```python\n{chunk.numbered()}\n```" for chunk in chunks]
+    engine = get_prompt_engine()
+    for prompt in prompts:
+        engine.record(agent, system_prompt, prompt, chunks=len(prompts))
+    return system_prompt, chunks, prompts
+
+
+def _reduce(chunks: list, answers: list, headings: tuple) -> str:
+    """
+    Merge the chunk answers into one report. An answer may be the exception
+    its LLM call raised: that chunk is listed as not analysed and the other
+    findings are kept. Only when every call failed is the first error raised.
+    """
+    findings, failed, errors = [], [], []
+    for chunk, answer in zip(chunks, answers):
+        span = f"lines {chunk.start_line}-{chunk.end_line}"
+        if isinstance(answer, BaseException):
+            if not isinstance(answer, Exception):
+                raise answer  # cancellation, KeyboardInterrupt
+            print(f"⚠️ Chunk {span} failed: {answer}")
+            errors.append(answer)
+            failed.append(f"{span} ({type(answer).__name__})")
+            continue
+        try:
+            findings.extend(parse_findings(answer, chunk))
+        except (ValueError, AttributeError):
+            failed.append(span)
+    if errors and len(errors) == len(chunks):
+        raise errors[0]
+    return format_findings(merge_findings(findings), headings, failed)
+
+
+def _result_or_error(future):
+    try:
+        return future.result()
+    except Exception as e:
+        return e
+
+
+def analyze_chunks(code: str, agent: str, role: str, focus: str, headings: tuple, workers: int = None) -> str:
+    """
+    Map-reduce analysis of a large file: split it with `split_code`, send
+    the chunks to the LLM on `workers` threads (default LLM_CHUNK_WORKERS),
+    then merge and de-duplicate the findings into one report. A chunk whose
+    call fails is reported as not analysed instead of losing the report.
+    """
+    workers = workers or int(os.getenv("LLM_CHUNK_WORKERS", "4"))
+    system_prompt, chunks, prompts = _chunk_prompts(code, agent, role, focus)
+    print(f"🧩 {agent}: analysing {len(chunks)} chunks with {workers} workers...")
+
+    def analyze(prompt):
+        return query_llm(prompt, system_prompt=system_prompt, json_mode=True)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # Copy the caller's context so settings such as llm_priority reach the workers
+        futures = [pool.submit(contextvars.copy_context().run, analyze, prompt) for prompt in prompts]
+        answers = [_result_or_error(future) for future in futures]
+    return _reduce(chunks, answers, headings)
+
+
+async def aanalyze_chunks(code: str, agent: str, role: str, focus: str, headings: tuple, workers: int = None) -> str:
+    """Async variant of `analyze_chunks`; at most `workers` chunks are in flight."""
+    workers = workers or int(os.getenv("LLM_CHUNK_WORKERS", "4"))
+    system_prompt, chunks, prompts = _chunk_prompts(code, agent, role, focus)
+    print(f"🧩 {agent}: analysing {len(chunks)} chunks with {workers} workers...")
+    slots = asyncio.Semaphore(workers)
+
+    async def analyze(prompt):
+        async with slots:
+            return await async_query_llm(prompt, system_prompt=system_prompt, json_mode=True)
+
+    answers = await asyncio.gather(*(analyze(prompt) for prompt in prompts), return_exceptions=True)
+    return _reduce(chunks, answers, headings)
@@ -0,0 +1,152 @@
+# src/core/code_chunker.py
+
+import ast
+
+from src.core.prompt_engine import count_tokens
+
+
+class CodeChunk:
+    """
+    A contiguous slice of a source file plus the context it needs.
+
+    Args:
+        name (str): Definitions in the slice, for logs and reports.
+        start_line (int): First line of the slice in the original file (1-based).
+        end_line (int): Last line of the slice, inclusive.
+        source (str): The slice itself.
+        context (list): (line_number, text) pairs shown before the slice, such
+            as the file's imports or the signature of the enclosing class.
+    """
+
+    def __init__(self, name: str, start_line: int, end_line: int, source: str, context=()):
+        self.name = name
+        self.start_line = start_line
+        self.end_line = end_line
+        self.source = source
+        self.context = list(context)
+
+    def contains(self, line: int) -> bool:
+        return self.start_line <= line <= self.end_line
+
+    def numbered(self) -> str:
+        """Context, then the slice, each line prefixed with its original line number."""
+        width = len(str(self.end_line))
+        parts = [f"{n:>{width}} | {text}" for n, text in self.context]
+        if parts:
+            parts.append("# --- analysed section ---")
+        parts.extend(f"{n:>{width}} | {text}" for n, text in enumerate(self.source.splitlines(), self.start_line))
+        return "\n".join(parts)
+
+    def __repr__(self):
+        return f"CodeChunk({self.name!r}, lines {self.start_line}-{self.end_line})"
+
+
+def _cost(lines: list, start: int, end: int) -> int:
+    # Text plus the line-number margin added by `numbered`
+    return count_tokens("\n".join(lines[start - 1:end])) + 2 * (end - start + 1)
+
+
+def _node_name(node) -> str:
+    return getattr(node, "name", None) or ""
+
+
+def _units(body: list, first_line: int, last_line: int) -> list:
+    """
+    (name, start, end, node) for each statement in `body`, stretched so the
+    units are contiguous and cover first_line..last_line (comments and blank
+    lines belong to the definition that follows them).
+    """
+    units, prev_end = [], first_line - 1
+    for node in body:
+        units.append([_node_name(node), prev_end + 1, node.end_lineno, node])
+        prev_end = node.end_lineno
+    if units:
+        units[-1][2] = max(units[-1][2], last_line)
+    return units
+
+
+def _split_lines(lines: list, start: int, end: int, budget: int, name: str, context: list) -> list:
+    """Fallback for code without usable structure: cut on line boundaries."""
+    chunks, chunk_start, used = [], start, 0
+    for n in range(start, end + 1):
+        cost = _cost(lines, n, n)
+        if n > chunk_start and used + cost > budget:
+            chunks.append(CodeChunk(name, chunk_start, n - 1, "\n".join(lines[chunk_start - 1:n - 1]), context))
+            chunk_start, used = n, 0
+        used += cost
+    chunks.append(CodeChunk(name, chunk_start, end, "\n".join(lines[chunk_start - 1:end]), context))
+    return chunks
+
+
+def _group(lines: list, units: list, budget: int, context: list, prefix: str = "") -> list:
+    """Pack consecutive units into chunks of at most `budget` tokens, splitting oversized ones."""
+    chunks, group = [], []
+
+    def flush():
+        if group:
+            names = [f"{prefix}{u[0]}" for u in group if u[0]] or [f"{prefix}module code" if not prefix else prefix.rstrip(".")]
+            start, end = group[0][1], group[-1][2]
+            chunks.append(CodeChunk(", ".join(names), start, end, "\n".join(lines[start - 1:end]), context))
+            group.clear()
+
+    for unit in units:
+        name, start, end, node = unit
+        cost = _cost(lines, start, end)
+        if cost > budget:
+            flush()
+            chunks.extend(_split_unit(lines, unit, budget, context, prefix))
+            continue
+        if group and _cost(lines, group[0][1], end) > budget:
+            flush()
+        group.append(unit)
+    flush()
+    return chunks
+
+
+def _split_unit(lines: list, unit: list, budget: int, context: list, prefix: str) -> list:
+    name, start, end, node = unit
+    if isinstance(node, ast.ClassDef) and node.body:
+        # Methods become the units; the class signature travels along as context
+        body_start = node.body[0].lineno
+        decorators = [d.lineno for d in node.decorator_list]
+        signature_start = min([node.lineno] + decorators)
+        signature = [(n, lines[n - 1]) for n in range(signature_start, body_start)]
+        head_end = body_start - 1
+        sub_units = _units(node.body, body_start, end)
+        if head_end >= start:
+            # The signature lines themselves are analysed with the first methods
+            sub_units.insert(0, ["", start, head_end, None])
+        sub_budget = max(budget - _cost(lines, signature_start, head_end), budget // 2)
+        return _group(lines, sub_units, sub_budget, context + signature, f"{prefix}{name}.")
+    return _split_lines(lines, start, end, budget, f"{prefix}{name}" if name else f"{prefix}module code", context)
+
+
+def split_code(code: str, max_tokens: int = 1500) -> list:
+    """
+    Split Python source into CodeChunks of roughly `max_tokens` tokens at
+    function/class boundaries. Every chunk carries the file's imports as
+    context; classes too large for one chunk are split by method with the
+    class signature as context. Code that does not parse is split by lines.
+    """
+    lines = code.splitlines()
+    if not lines:
+        return []
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return _split_lines(lines, 1, len(lines), max_tokens, "lines", [])
+    if not tree.body:
+        return [CodeChunk("module code", 1, len(lines), code)]
+
+    import_lines = [
+        n for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))
+        for n in range(node.lineno, node.end_lineno + 1)
+    ]
+    imports = [(n, lines[n - 1]) for n in import_lines]
+    budget = max(max_tokens - sum(_cost(lines, n, n) for n in import_lines), max_tokens // 2)
+
+    chunks = _group(lines, _units(tree.body, 1, len(lines)), budget, imports)
+    # A chunk doesn't need the imports it already contains
+    for chunk in chunks:
+        chunk.context = [(n, text) for n, text in chunk.context if not chunk.contains(n)]
+    return chunks
@@ -0,0 +1,408 @@
+# src/core/http_client.py
+
+import asyncio
+import os
+import threading
+import weakref
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+# httpx (+ h2) is optional: it gives us HTTP/2 multiplexing when installed
+try:
+    import httpx
+except ImportError:
+    httpx = None
+
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = httpx is not None
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class HTTPStatusError(requests.exceptions.HTTPError):
+    """Non-2xx response; keeps the status and headers so callers can classify it."""
+
+    def __init__(self, status_code: int, text: str, headers=None):
+        super().__init__(f"HTTP Error {status_code}: {text}")
+        self.status_code = status_code
+        self.text = text
+        self.headers = dict(headers or {})
+
+
+def raise_for_status(response):
+    """Raise HTTPStatusError for any non-200 response (requests or httpx)."""
+    if response.status_code != 200:
+        raise HTTPStatusError(response.status_code, response.text, response.headers)
+
+
+class PoolStats:
+    """
+    Thread-safe counters for connection pool reuse.
+
+    A request that had to open a new TCP/TLS connection is a "miss",
+    every other request reused a kept-alive connection and is a "hit".
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.new_connections = 0
+        self.per_host = {}
+
+    def reset(self):
+        with self._lock:
+            self.requests = 0
+            self.new_connections = 0
+            self.per_host = {}
+
+    def record_request(self, host: str):
+        with self._lock:
+            self.requests += 1
+            self._host(host)["requests"] += 1
+
+    def record_new_connection(self, host: str):
+        with self._lock:
+            self.new_connections += 1
+            self._host(host)["new_connections"] += 1
+
+    def _host(self, host: str) -> dict:
+        return self.per_host.setdefault(host, {"requests": 0, "new_connections": 0})
+
+    def summary(self) -> dict:
+        with self._lock:
+            misses = min(self.new_connections, self.requests)
+            hits = self.requests - misses
+            return {
+                "requests": self.requests,
+                "pool_hits": hits,
+                "pool_misses": misses,
+                "hit_rate": round(hits / self.requests, 4) if self.requests else 0.0,
+                "per_host": {host: dict(counts) for host, counts in self.per_host.items()},
+            }
+
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter whose connection pools report every new connection they open."""
+
+    def __init__(self, on_new_connection, **kwargs):
+        self._on_new_connection = on_new_connection
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        on_new_connection = self._on_new_connection
+
+        class _CountingHTTPPool(HTTPConnectionPool):
+            def _new_conn(self):
+                on_new_connection(self.host)
+                return super()._new_conn()
+
+        class _CountingHTTPSPool(HTTPSConnectionPool):
+            def _new_conn(self):
+                on_new_connection(self.host)
+                return super()._new_conn()
+
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPPool,
+            "https": _CountingHTTPSPool,
+        }
+
+
+class HTTPClient:
+    """
+    Shared, thread-safe HTTP client with connection pooling and keep-alive.
+
+    Uses httpx with HTTP/2 when httpx and h2 are installed, otherwise a pooled
+    requests.Session. Transport errors are always raised as
+    requests.exceptions.RequestException subclasses so existing retry logic
+    keeps working regardless of the backend.
+
+    Args:
+        pool_size (int): Maximum number of pooled connections overall.
+        per_host_limit (int): Maximum concurrent requests to a single host.
+        keepalive_expiry (float): Seconds an idle connection is kept (httpx only).
+        http2 (bool): Use HTTP/2 if it is available.
+        timeout (float): Default request timeout in seconds.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = None,
+        per_host_limit: int = None,
+        keepalive_expiry: float = None,
+        http2: bool = None,
+        timeout: float = None,
+    ):
+        self.pool_size = pool_size or int(os.getenv("LLM_HTTP_POOL_SIZE", "20"))
+        self.per_host_limit = per_host_limit or int(os.getenv("LLM_HTTP_PER_HOST_LIMIT", "10"))
+        self.keepalive_expiry = keepalive_expiry or float(os.getenv("LLM_HTTP_KEEPALIVE", "30"))
+        self.timeout = timeout or float(os.getenv("LLM_HTTP_TIMEOUT", "60"))
+        if http2 is None:
+            http2 = os.getenv("LLM_HTTP2", "1") == "1"
+        self.http2 = bool(http2) and HTTP2_AVAILABLE
+
+        self.stats = PoolStats()
+        self._host_slots = {}
+        self._slots_lock = threading.Lock()
+
+        if self.http2:
+            self.backend = "httpx"
+            self._client = httpx.Client(
+                http2=True,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+            )
+        else:
+            self.backend = "requests"
+            self._client = requests.Session()
+            adapter = _CountingAdapter(
+                self.stats.record_new_connection,
+                pool_connections=self.pool_size,
+                pool_maxsize=self.per_host_limit,
+                pool_block=True,
+            )
+            self._client.mount("http://", adapter)
+            self._client.mount("https://", adapter)
+
+    def _host_slot(self, host: str) -> threading.BoundedSemaphore:
+        with self._slots_lock:
+            if host not in self._host_slots:
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host_limit)
+            return self._host_slots[host]
+
+    def post(self, url: str, headers: dict = None, json: dict = None, timeout: float = None):
+        """
+        POST a JSON payload over a pooled connection.
+
+        Returns a response object exposing status_code, text, headers and json().
+        """
+        host = urlsplit(url).hostname or ""
+        timeout = timeout or self.timeout
+        self.stats.record_request(host)
+
+        with self._host_slot(host):
+            if self.backend == "requests":
+                return self._client.post(url, headers=headers, json=json, timeout=timeout)
+            return self._httpx_post(url, host, headers, json, timeout)
+
+    def _httpx_post(self, url, host, headers, json, timeout):
+        def trace(event_name, info):
+            if event_name == "connection.connect_tcp.started":
+                self.stats.record_new_connection(host)
+
+        try:
+            return self._client.post(
+                url, headers=headers, json=json, timeout=timeout, extensions={"trace": trace}
+            )
+        except httpx.TimeoutException as e:
+            raise requests.exceptions.Timeout(str(e)) from e
+        except httpx.TransportError as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+
+    def stream_lines(self, url: str, headers: dict = None, json: dict = None, timeout: float = None):
+        """
+        POST a JSON payload and yield the response body line by line as it
+        arrives (e.g. server-sent events). Non-200 responses raise
+        HTTPStatusError with the response status, body and headers.
+        """
+        host = urlsplit(url).hostname or ""
+        timeout = timeout or self.timeout
+        self.stats.record_request(host)
+
+        with self._host_slot(host):
+            if self.backend == "requests":
+                with self._client.post(url, headers=headers, json=json, timeout=timeout, stream=True) as response:
+                    raise_for_status(response)
+                    for line in response.iter_lines(decode_unicode=True):
+                        yield line
+                return
+
+            def trace(event_name, info):
+                if event_name == "connection.connect_tcp.started":
+                    self.stats.record_new_connection(host)
+
+            try:
+                with self._client.stream(
+                    "POST", url, headers=headers, json=json, timeout=timeout, extensions={"trace": trace}
+                ) as response:
+                    if response.status_code != 200:
+                        response.read()
+                        raise_for_status(response)
+                    for line in response.iter_lines():
+                        yield line
+            except httpx.TimeoutException as e:
+                raise requests.exceptions.Timeout(str(e)) from e
+            except httpx.TransportError as e:
+                raise requests.exceptions.ConnectionError(str(e)) from e
+
+    def get_stats(self) -> dict:
+        summary = self.stats.summary()
+        summary["backend"] = self.backend
+        summary["http2"] = self.http2
+        return summary
+
+    def close(self):
+        self._client.close()
+
+
+_shared_client = None
+_shared_lock = threading.Lock()
+
+
+def get_http_client() -> HTTPClient:
+    """Return the process-wide HTTPClient, creating it on first use."""
+    global _shared_client
+    if _shared_client is None:
+        with _shared_lock:
+            if _shared_client is None:
+                _shared_client = HTTPClient()
+    return _shared_client
+
+
+def get_pool_stats() -> dict:
+    """Pool hit/miss statistics of the shared client."""
+    return get_http_client().get_stats()
+
+
+class AsyncHTTPClient:
+    """
+    asyncio counterpart of HTTPClient built on httpx.AsyncClient.
+
+    Without httpx installed the request is delegated to the shared sync
+    client in a worker thread, so callers never block the event loop.
+    """
+
+    def __init__(
+        self,
+        pool_size: int = None,
+        per_host_limit: int = None,
+        keepalive_expiry: float = None,
+        http2: bool = None,
+        timeout: float = None,
+    ):
+        self.pool_size = pool_size or int(os.getenv("LLM_HTTP_POOL_SIZE", "20"))
+        self.per_host_limit = per_host_limit or int(os.getenv("LLM_HTTP_PER_HOST_LIMIT", "10"))
+        self.keepalive_expiry = keepalive_expiry or float(os.getenv("LLM_HTTP_KEEPALIVE", "30"))
+        self.timeout = timeout or float(os.getenv("LLM_HTTP_TIMEOUT", "60"))
+        if http2 is None:
+            http2 = os.getenv("LLM_HTTP2", "1") == "1"
+        self.http2 = bool(http2) and HTTP2_AVAILABLE
+
+        self.stats = PoolStats()
+        self._host_slots = {}
+
+        if httpx is not None:
+            self.backend = "httpx"
+            self._client = httpx.AsyncClient(
+                http2=self.http2,
+                timeout=self.timeout,
+                limits=httpx.Limits(
+                    max_connections=self.pool_size,
+                    max_keepalive_connections=self.pool_size,
+                    keepalive_expiry=self.keepalive_expiry,
+                ),
+            )
+        else:
+            self.backend = "thread"
+            self._client = None
+
+    def _host_slot(self, host: str) -> asyncio.Semaphore:
+        if host not in self._host_slots:
+            self._host_slots[host] = asyncio.Semaphore(self.per_host_limit)
+        return self._host_slots[host]
+
+    async def post(self, url: str, headers: dict = None, json: dict = None, timeout: float = None):
+        """Async POST of a JSON payload over a pooled connection."""
+        if self._client is None:
+            return await asyncio.to_thread(
+                get_http_client().post, url, headers=headers, json=json, timeout=timeout
+            )
+
+        host = urlsplit(url).hostname or ""
+        self.stats.record_request(host)
+
+        async def trace(event_name, info):
+            if event_name == "connection.connect_tcp.started":
+                self.stats.record_new_connection(host)
+
+        async with self._host_slot(host):
+            try:
+                return await self._client.post(
+                    url,
+                    headers=headers,
+                    json=json,
+                    timeout=timeout or self.timeout,
+                    extensions={"trace": trace},
+                )
+            except httpx.TimeoutException as e:
+                raise requests.exceptions.Timeout(str(e)) from e
+            except httpx.TransportError as e:
+                raise requests.exceptions.ConnectionError(str(e)) from e
+
+    async def stream_lines(self, url: str, headers: dict = None, json: dict = None, timeout: float = None):
+        """
+        Async generator over the response body lines as they arrive.
+        Without httpx the whole body is read in a worker thread first.
+        """
+        if self._client is None:
+            lines = await asyncio.to_thread(
+                lambda: list(get_http_client().stream_lines(url, headers=headers, json=json, timeout=timeout))
+            )
+            for line in lines:
+                yield line
+            return
+
+        host = urlsplit(url).hostname or ""
+        self.stats.record_request(host)
+
+        async def trace(event_name, info):
+            if event_name == "connection.connect_tcp.started":
+                self.stats.record_new_connection(host)
+
+        async with self._host_slot(host):
+            try:
+                async with self._client.stream(
+                    "POST", url, headers=headers, json=json,
+                    timeout=timeout or self.timeout, extensions={"trace": trace}
+                ) as response:
+                    if response.status_code != 200:
+                        await response.aread()
+                        raise_for_status(response)
+                    async for line in response.aiter_lines():
+                        yield line
+            except httpx.TimeoutException as e:
+                raise requests.exceptions.Timeout(str(e)) from e
+            except httpx.TransportError as e:
+                raise requests.exceptions.ConnectionError(str(e)) from e
+
+    def get_stats(self) -> dict:
+        summary = self.stats.summary()
+        summary["backend"] = self.backend
+        summary["http2"] = self.http2
+        return summary
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+
+
+# httpx.AsyncClient is bound to the loop it first ran on, so keep one per loop
+_async_clients = weakref.WeakKeyDictionary()
+
+
+def get_async_http_client() -> AsyncHTTPClient:
+    """Return the AsyncHTTPClient for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncHTTPClient()
+        _async_clients[loop] = client
+    return client
@@ -1,3 +1,4 @@
+import json
 import os
 import sys
 import requests
@@ -6,7 +7,12 @@ import logging
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-from src.core.retry_handler import retry_on_exception
+from src.core.http_client import raise_for_status
+from src.core.llm_router import get_llm_router
+from src.core.prompt_engine import get_prompt_engine
+from src.core.rate_limiter import get_rate_limiter, estimate_request_tokens
+from src.core.response_cache import get_response_cache
+from src.core.retry_handler import retry_on_exception, async_retry_on_exception
 from src.utils.token_tracker import TokenTracker
 
 # Load GROQ API key
@@ -17,13 +23,11 @@ tracker = TokenTracker()
 SUPPORTED_MODEL = "llama-3.1-8b-instant"
 # Always use a supported model
 
-@retry_on_exception(
-    retries=3,
-    delay=2,
-    backoff=2,
-    allowed_exceptions=(requests.exceptions.RequestException,)
-)
-def query_llm(prompt: str, temperature: float = 0.3, model: str = SUPPORTED_MODEL, role: str = "system") -> str:
+SYSTEM_PROMPT = "You are an expert AI assistant for code planning, debugging, and development."
+COST_PER_1K_TOKENS = 0.002
+
+
+def _build_request(prompt: str, temperature: float, model: str, system_prompt: str = SYSTEM_PROMPT, max_tokens: int = 1500, stream: bool = False, json_mode: bool = False):
     # Check for empty prompt
     if not prompt.strip():
         raise ValueError("Prompt cannot be empty")
@@ -31,7 +35,6 @@ def query_llm(prompt: str, temperature: float = 0.3, model: str = SUPPORTED_MODE
     if not api_key:
         raise KeyError("GROQ_API_KEY is not set. Please define it in your .env file.")
 
-    url = "https://api.groq.com/openai/v1/chat/completions"
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json"
@@ -39,24 +42,33 @@ def query_llm(prompt: str, temperature: float = 0.3, model: str = SUPPORTED_MODE
     payload = {
         "model": model,
         "messages": [
-            {"role": "system", "content": "You are an expert AI assistant for code planning, debugging, and development."},
+            {"role": "system", "content": system_prompt},
             {"role": "user", "content": prompt}
         ],
         "temperature": temperature,
-        "max_tokens": 1500
+        "max_tokens": max_tokens
     }
+    if stream:
+        payload["stream"] = True
+    if json_mode:
+        # OpenAI-compatible JSON mode: the completion is guaranteed to be a JSON object
+        payload["response_format"] = {"type": "json_object"}
 
-    response = requests.post(url, headers=headers, json=payload)
+    # Fail before paying for a round trip the provider would reject
+    get_prompt_engine().check_fits(payload["messages"], model, max_tokens)
+    return headers, payload
 
+
+def _parse_response(response):
     if response.status_code != 200:
         logging.error(f"HTTP Error {response.status_code}: {response.text}")
-        raise requests.exceptions.RequestException(f"HTTP Error {response.status_code}: {response.text}")
+        raise_for_status(response)
 
     result = response.json()
 
     # Track tokens safely
     tokens_used = result.get("usage", {}).get("total_tokens", 0)
-    tracker.log_usage(tokens_used, cost_per_1k_tokens=0.002)
+    tracker.log_usage(tokens_used, cost_per_1k_tokens=COST_PER_1K_TOKENS)
 
     # Safe parsing of "choices"
     choices = result.get("choices")
@@ -69,6 +81,145 @@ def query_llm(prompt: str, temperature: float = 0.3, model: str = SUPPORTED_MODE
         logging.error("First choice missing 'content': %s", result)
         raise ValueError("No content in first choice from LLM response")
 
-    return message_content
+    return message_content, tokens_used
+
+
+def _cache_key(cache, payload: dict, model: str) -> str:
+    system_prompt, user_prompt = (m["content"] for m in payload["messages"])
+    return cache.make_key(model, payload["temperature"], system_prompt, user_prompt)
+
+
+def _cache_lookup(payload: dict, use_cache: bool):
+    """
+    Return (cache, cached_content). cache is None when the call must not
+    be cached; cached_content is None on a miss.
+    """
+    cache = get_response_cache() if use_cache else None
+    if cache is None or cache.should_bypass(payload["temperature"]):
+        return None, None
+
+    entry = cache.get(_cache_key(cache, payload, payload["model"]))
+    if entry is None:
+        tracker.log_cache_miss()
+        return cache, None
+
+    tracker.log_cache_hit(entry.get("tokens", 0), cost_per_1k_tokens=COST_PER_1K_TOKENS)
+    return cache, entry["content"]
 
 
+def _cache_store(cache, payload: dict, model: str, content: str, tokens_used: int):
+    # Keyed on the model that answered: a fallback model's answer must not pose as the requested one's
+    if cache is not None and content:
+        cache.set(_cache_key(cache, payload, model or payload["model"]), content, tokens_used)
+
+
+@retry_on_exception(
+    retries=3,
+    delay=2,
+    allowed_exceptions=(requests.exceptions.RequestException,)
+)
+def query_llm(prompt: str, temperature: float = 0.3, model: str = SUPPORTED_MODEL, role: str = "system", use_cache: bool = True, system_prompt: str = SYSTEM_PROMPT, max_tokens: int = 1500, json_mode: bool = False) -> str:
+    headers, payload = _build_request(prompt, temperature, model, system_prompt, max_tokens, json_mode=json_mode)
+    cache, cached = _cache_lookup(payload, use_cache)
+    if cached is not None:
+        return cached
+
+    with get_rate_limiter().reserve(estimate_request_tokens(payload)) as reservation:
+        response, _, sent_model = get_llm_router().post(headers, payload)
+        content, tokens_used = _parse_response(response)
+        reservation.actual_tokens = tokens_used
+    _cache_store(cache, payload, sent_model, content, tokens_used)
+    return content
+
+
+@async_retry_on_exception(
+    retries=3,
+    delay=2,
+    allowed_exceptions=(requests.exceptions.RequestException,)
+)
+async def async_query_llm(prompt: str, temperature: float = 0.3, model: str = SUPPORTED_MODEL, role: str = "system", use_cache: bool = True, system_prompt: str = SYSTEM_PROMPT, max_tokens: int = 1500, json_mode: bool = False, hedge: str = None) -> str:
+    """
+    Non-blocking `query_llm` for use inside an event loop. Pass a call-site
+    name as `hedge` to race slow calls against a duplicate request.
+    """
+    headers, payload = _build_request(prompt, temperature, model, system_prompt, max_tokens, json_mode=json_mode)
+    cache, cached = _cache_lookup(payload, use_cache)
+    if cached is not None:
+        return cached
+
+    async with get_rate_limiter().areserve(estimate_request_tokens(payload)) as reservation:
+        response, _, sent_model = await get_llm_router().apost(headers, payload, hedge=hedge, tracker=tracker)
+        content, tokens_used = _parse_response(response)
+        reservation.actual_tokens = tokens_used
+    _cache_store(cache, payload, sent_model, content, tokens_used)
+    return content
+
+
+def _parse_sse_line(line: str, usage: dict):
+    """
+    Return the content delta carried by one SSE line of an OpenAI-compatible
+    stream ("" for keep-alives/role chunks, None for the final `[DONE]`).
+    Token usage, when the provider sends it, is copied into `usage`.
+    """
+    if not line or not line.startswith("data:"):
+        return ""
+    data = line[len("data:"):].strip()
+    if data == "[DONE]":
+        return None
+
+    chunk = json.loads(data)
+    chunk_usage = chunk.get("usage") or chunk.get("x_groq", {}).get("usage")
+    if chunk_usage:
+        usage.update(chunk_usage)
+
+    choices = chunk.get("choices") or [{}]
+    return choices[0].get("delta", {}).get("content") or ""
+
+
+def stream_llm(prompt: str, temperature: float = 0.3, model: str = SUPPORTED_MODEL, system_prompt: str = SYSTEM_PROMPT, max_tokens: int = 1500, use_cache: bool = True):
+    """
+    Generator version of `query_llm` yielding content deltas as the model
+    produces them. Cached answers are yielded as a single delta.
+    """
+    headers, payload = _build_request(prompt, temperature, model, system_prompt, max_tokens, stream=True)
+    cache, cached = _cache_lookup(payload, use_cache)
+    if cached is not None:
+        yield cached
+        return
+
+    usage, parts, route = {}, [], {}
+    with get_rate_limiter().reserve(estimate_request_tokens(payload)) as reservation:
+        for line in get_llm_router().stream_lines(headers, payload, route):
+            delta = _parse_sse_line(line, usage)
+            if delta:
+                parts.append(delta)
+                yield delta
+        reservation.actual_tokens = usage.get("total_tokens")
+
+    _finish_stream(cache, payload, route.get("model"), parts, usage)
+
+
+async def astream_llm(prompt: str, temperature: float = 0.3, model: str = SUPPORTED_MODEL, system_prompt: str = SYSTEM_PROMPT, max_tokens: int = 1500, use_cache: bool = True):
+    """Async iterator version of `stream_llm`."""
+    headers, payload = _build_request(prompt, temperature, model, system_prompt, max_tokens, stream=True)
+    cache, cached = _cache_lookup(payload, use_cache)
+    if cached is not None:
+        yield cached
+        return
+
+    usage, parts, route = {}, [], {}
+    async with get_rate_limiter().areserve(estimate_request_tokens(payload)) as reservation:
+        async for line in get_llm_router().astream_lines(headers, payload, route):
+            delta = _parse_sse_line(line, usage)
+            if delta:
+                parts.append(delta)
+                yield delta
+        reservation.actual_tokens = usage.get("total_tokens")
+
+    _finish_stream(cache, payload, route.get("model"), parts, usage)
+
+
+def _finish_stream(cache, payload: dict, model: str, parts: list, usage: dict):
+    tokens_used = usage.get("total_tokens", 0)
+    tracker.log_usage(tokens_used, cost_per_1k_tokens=COST_PER_1K_TOKENS)
+    _cache_store(cache, payload, model, "".join(parts), tokens_used)
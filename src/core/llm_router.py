@@ -0,0 +1,447 @@
+# src/core/llm_router.py
+
+import asyncio
+import json
+import os
+import random
+import threading
+import time
+from collections import deque
+
+from src.core.http_client import get_http_client, get_async_http_client, raise_for_status
+from src.core.rate_limiter import get_rate_limiter, estimate_request_tokens
+from src.core.retry_handler import CircuitBreaker, CircuitOpenError, RetryBudget, get_status_code, is_retryable
+
+GROQ_CHAT_URL = "https://api.groq.com/openai/v1/chat/completions"
+
+# Used when LLM_BACKENDS is not set: one entry per Groq model the agents ask for.
+# A request for the retired 70b model falls back to 8b after Groq's model error.
+DEFAULT_BACKENDS = [
+    {"name": "groq-70b", "url": GROQ_CHAT_URL, "model": "llama-3.1-70b-versatile", "api_key_env": "GROQ_API_KEY"},
+    {"name": "groq-8b", "url": GROQ_CHAT_URL, "model": "llama-3.1-8b-instant", "api_key_env": "GROQ_API_KEY"},
+]
+
+
+def is_model_error(exc: Exception) -> bool:
+    """Groq answers 400 with a model error for deprecated/unknown models."""
+    return get_status_code(exc) == 400 and "model" in getattr(exc, "text", str(exc))
+
+
+class LatencyWindow:
+    """Rolling window of the last `size` call outcomes for one backend."""
+
+    def __init__(self, size: int = 100):
+        self.latencies = deque(maxlen=size)
+        self.outcomes = deque(maxlen=size)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float = None, ok: bool = True):
+        with self._lock:
+            if latency is not None:
+                self.latencies.append(latency)
+            self.outcomes.append(ok)
+
+    def percentile(self, q: float):
+        with self._lock:
+            if not self.latencies:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    def error_rate(self) -> float:
+        with self._lock:
+            if not self.outcomes:
+                return 0.0
+            return self.outcomes.count(False) / len(self.outcomes)
+
+    def __len__(self):
+        return len(self.outcomes)
+
+
+class Backend:
+    """
+    One OpenAI-compatible chat endpoint serving one model.
+
+    Args:
+        name (str): Label used in logs and stats.
+        url (str): Full chat-completions URL.
+        model (str): Model this entry serves; None serves whatever model is requested.
+        api_key (str): Bearer token; falls back to `api_key_env`, then to the
+            Authorization header the caller already built.
+        api_key_env (str): Environment variable holding the key.
+        pin_model (bool): The endpoint only runs `model`, so it is sent
+            whatever the caller asked for (e.g. a single-model local server).
+    """
+
+    def __init__(self, name: str, url: str, model: str = None, api_key: str = None, api_key_env: str = None,
+                 pin_model: bool = False, window: int = 100, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.url = url
+        self.model = model
+        self.api_key = api_key
+        self.api_key_env = api_key_env
+        self.pin_model = pin_model and model is not None
+        self.stats = LatencyWindow(window)
+        self.breaker = CircuitBreaker(name, failure_threshold, reset_timeout)
+
+    def serves(self, model: str) -> bool:
+        """True when a request for `model` can go here without substituting a fallback model."""
+        return self.model is None or self.model == model or self.pin_model
+
+    def prepare(self, headers: dict, payload: dict, substitute: bool = False):
+        """
+        Copies of headers/payload addressed to this backend. The requested
+        model is kept unless the backend pins its own or `substitute` asks
+        for this backend's model as a fallback.
+        """
+        headers = dict(headers or {})
+        key = self.api_key or (os.getenv(self.api_key_env) if self.api_key_env else None)
+        if key:
+            headers["Authorization"] = f"Bearer {key}"
+        if self.model is not None and (self.pin_model or substitute):
+            payload = dict(payload, model=self.model)
+        return headers, dict(payload)
+
+    def score(self, min_samples: int = 3) -> float:
+        """
+        Expected seconds per successful call: p95 latency inflated by the
+        error rate. Backends with too few samples score 0 so they get probed.
+        """
+        p95 = self.stats.percentile(0.95)
+        if len(self.stats) < min_samples or p95 is None:
+            return 0.0
+        return p95 / max(0.05, 1.0 - self.stats.error_rate())
+
+    def summary(self) -> dict:
+        p50, p95 = self.stats.percentile(0.5), self.stats.percentile(0.95)
+        return {
+            "url": self.url,
+            "model": self.model,
+            "calls": len(self.stats),
+            "p50_ms": round(p50 * 1000, 1) if p50 is not None else None,
+            "p95_ms": round(p95 * 1000, 1) if p95 is not None else None,
+            "error_rate": round(self.stats.error_rate(), 3),
+            "circuit": self.breaker.state,
+        }
+
+
+class HedgePolicy:
+    """
+    Hedging settings and counters for one call site (e.g. "plan", "write").
+
+    A duplicate request is fired once the primary has been running longer
+    than the `percentile` latency of its backend. Hedges are capped at
+    `max_ratio` of the site's recent calls; the cap can't exceed 1.0 so
+    hedging never more than doubles cost.
+    """
+
+    def __init__(self, site: str, percentile: float = 0.95, max_ratio: float = 0.2, min_samples: int = 5):
+        if not 0 <= max_ratio <= 1:
+            raise ValueError("Hedge max_ratio must be between 0 and 1")
+        self.site = site
+        self.percentile = percentile
+        self.min_samples = min_samples
+        self.budget = RetryBudget(ratio=max_ratio, min_retries=0)
+        self.calls = 0
+        self.fired = 0
+        self.wins = 0
+
+    def delay(self, backend: Backend):
+        """Seconds to wait before hedging a call to `backend`, None when its latency is unknown."""
+        if len(backend.stats.latencies) < self.min_samples:
+            return None
+        return backend.stats.percentile(self.percentile)
+
+    def summary(self) -> dict:
+        return {"calls": self.calls, "fired": self.fired, "wins": self.wins}
+
+
+class LLMRouter:
+    """
+    Sends each chat completion to the best healthy backend and falls back to
+    the next one on transient errors or "model unavailable" answers.
+
+    Backends serving the requested model are tried first, ranked by
+    `Backend.score()`, and are sent that model. Only after one of them
+    answers with a model error, or while all their circuits are open, are
+    backends of other models tried, with their own model substituted. A
+    model error means "wrong model", so it never counts against a circuit. A model no backend lists is sent as-is to
+    the best backend first. With probability `explore` the ranking is
+    shuffled so slow backends keep fresh stats. Any other 4xx is the
+    caller's fault and is raised straight away.
+
+    Usage:
+        router = LLMRouter([Backend("groq", GROQ_CHAT_URL, "llama-3.1-8b-instant")])
+        response, backend, model = router.post(headers, payload)
+    """
+
+    def __init__(self, backends: list, explore: float = 0.05, min_samples: int = 3):
+        if not backends:
+            raise ValueError("LLMRouter needs at least one backend")
+        self.backends = list(backends)
+        self.explore = explore
+        self.min_samples = min_samples
+        self.hedge_policies = {}
+
+    def candidates(self, model: str = None) -> list:
+        """Backends in the order they should be tried for `model`."""
+        order = {id(b): i for i, b in enumerate(self.backends)}
+
+        def rank(backends):
+            return sorted(backends, key=lambda b: (b.score(self.min_samples), order[id(b)]))
+
+        preferred = rank([b for b in self.backends if b.serves(model)])
+        others = rank([b for b in self.backends if not b.serves(model)])
+        ranked = preferred + others
+        if len(ranked) > 1 and random.random() < self.explore:
+            random.shuffle(ranked)
+        return ranked
+
+    def _failed(self, backend: Backend, exc: Exception, model: str) -> bool:
+        """Record a failure; True when the next backend should be tried."""
+        if is_model_error(exc):
+            # The endpoint answered; the model is wrong, so this says nothing against its health
+            backend.breaker.record_success()
+            return True
+        backend.stats.record(ok=False)
+        if is_retryable(exc):
+            backend.breaker.record_failure()
+            return True
+        backend.breaker.record_success()
+        return False
+
+    @staticmethod
+    def _split(model: str, ranked: list, avoid: Backend = None):
+        """(backends serving `model`, the others), in `ranked` order with `avoid` last."""
+        ranked = list(ranked)
+        if avoid in ranked:
+            ranked.remove(avoid)
+            ranked.append(avoid)
+        serving = [b for b in ranked if b.serves(model)]
+        return serving, [b for b in ranked if b not in serving]
+
+    def _attempts(self, headers: dict, payload: dict, errors: list, ranked: list = None, avoid: Backend = None):
+        """
+        Yield (backend, headers, payload) for every backend whose circuit
+        admits a call, in `ranked` order (default `candidates()`), `avoid`
+        last. Backends of other models are only yielded once the caller has
+        appended a model error to `errors`, or when every backend serving
+        the model has an open circuit.
+        """
+        model = payload.get("model")
+        serving, fallbacks = self._split(model, ranked if ranked is not None else self.candidates(model), avoid)
+        admitted = False
+        for backend in serving or fallbacks[:1]:
+            if self._admits(backend):
+                admitted = True
+                yield (backend,) + backend.prepare(headers, payload)
+        if admitted and not any(is_model_error(e) for e in errors):
+            return
+        for backend in fallbacks:
+            if self._admits(backend):
+                print(f"⚠️ Model {model} not available. Falling back to {backend.model}...")
+                yield (backend,) + backend.prepare(headers, payload, substitute=True)
+
+    @staticmethod
+    def _admits(backend: Backend) -> bool:
+        try:
+            backend.breaker.before_call()
+        except CircuitOpenError:
+            return False
+        return True
+
+    def _give_up(self, errors: list):
+        if not errors:
+            raise CircuitOpenError("Every LLM backend circuit is open; failing fast.")
+        raise errors[-1]
+
+    def post(self, headers: dict, payload: dict):
+        """
+        POST a chat completion; returns (response, backend, model) for the
+        first 200 answer, `model` being the one that was actually sent.
+        """
+        errors = []
+        for backend, b_headers, b_payload in self._attempts(headers, payload, errors):
+            started = time.perf_counter()
+            try:
+                response = get_http_client().post(backend.url, headers=b_headers, json=b_payload)
+                raise_for_status(response)
+            except Exception as e:
+                if not self._failed(backend, e, b_payload.get("model")):
+                    raise
+                print(f"⚠️ Backend {backend.name} failed ({e}). Trying next backend...")
+                errors.append(e)
+                continue
+            backend.stats.record(time.perf_counter() - started)
+            backend.breaker.record_success()
+            return response, backend, b_payload.get("model")
+        self._give_up(errors)
+
+    async def apost(self, headers: dict, payload: dict, hedge: str = None, tracker=None):
+        """
+        Async version of `post`. With `hedge` set to a call-site name, a slow
+        call is raced against a duplicate sent to the next best backend
+        (see HedgePolicy); the loser is cancelled. Hedge outcomes are logged
+        to `tracker` (a TokenTracker) when given. A primary cancelled because
+        the hedge won still adds its elapsed time to its backend's latency
+        window, so a slow backend's p95 and score keep up with reality.
+        """
+        if hedge is None:
+            return await self._apost(headers, payload)
+
+        policy = self.hedge_policy(hedge)
+        policy.calls += 1
+        policy.budget.record_call()
+        # One ranking for both requests, so the hedge avoids the backend the primary actually called
+        ranked = self.candidates(payload.get("model"))
+        serving, fallbacks = self._split(payload.get("model"), ranked)
+        primary_backend = (serving or fallbacks)[0]
+        delay = policy.delay(primary_backend)
+
+        started = time.perf_counter()
+        primary = asyncio.ensure_future(self._apost(headers, payload, ranked))
+        if delay is None:
+            return await primary
+        done, _ = await asyncio.wait({primary}, timeout=delay)
+        if done or not policy.budget.try_spend():
+            return await primary
+
+        policy.fired += 1
+        hedged = asyncio.ensure_future(self._ahedge(headers, payload, ranked, primary_backend))
+        is_hedge = {primary: False, hedged: True}
+        pending, last_error = set(is_hedge), None
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        continue
+                    won = is_hedge[task]
+                    policy.wins += won
+                    if tracker is not None:
+                        tracker.log_hedge(won)
+                    return task.result()
+            raise last_error
+        finally:
+            for task, hedged_task in is_hedge.items():
+                if task.done():
+                    continue
+                task.cancel()
+                if not hedged_task:
+                    # A lower bound, but without it the backend the hedges route around never looks slow
+                    primary_backend.stats.record(time.perf_counter() - started)
+
+    async def _ahedge(self, headers: dict, payload: dict, ranked: list, avoid: Backend):
+        # The duplicate is a real extra request, so it waits for its own rate-limit slot
+        async with get_rate_limiter().areserve(estimate_request_tokens(payload)):
+            return await self._apost(headers, payload, ranked, avoid)
+
+    async def _apost(self, headers: dict, payload: dict, ranked: list = None, avoid: Backend = None):
+        errors = []
+        for backend, b_headers, b_payload in self._attempts(headers, payload, errors, ranked, avoid):
+            started = time.perf_counter()
+            try:
+                response = await get_async_http_client().post(backend.url, headers=b_headers, json=b_payload)
+                raise_for_status(response)
+            except Exception as e:
+                if not self._failed(backend, e, b_payload.get("model")):
+                    raise
+                print(f"⚠️ Backend {backend.name} failed ({e}). Trying next backend...")
+                errors.append(e)
+                continue
+            backend.stats.record(time.perf_counter() - started)
+            backend.breaker.record_success()
+            return response, backend, b_payload.get("model")
+        self._give_up(errors)
+
+    def stream_lines(self, headers: dict, payload: dict, route: dict = None):
+        """
+        Stream response lines from the best backend. Falls back only while
+        nothing has been yielded; a stream cut mid-way is raised as-is.
+        Streams feed the error rate but not the latency percentiles.
+        `route`, when given, is filled with the "backend" and "model" used.
+        """
+        errors = []
+        for backend, b_headers, b_payload in self._attempts(headers, payload, errors):
+            started = False
+            try:
+                for line in get_http_client().stream_lines(backend.url, headers=b_headers, json=b_payload):
+                    if not started and route is not None:
+                        route.update(backend=backend, model=b_payload.get("model"))
+                    started = True
+                    yield line
+            except Exception as e:
+                fallback = self._failed(backend, e, b_payload.get("model"))
+                if started or not fallback:
+                    raise
+                print(f"⚠️ Backend {backend.name} failed ({e}). Trying next backend...")
+                errors.append(e)
+                continue
+            backend.stats.record()
+            backend.breaker.record_success()
+            return
+        self._give_up(errors)
+
+    async def astream_lines(self, headers: dict, payload: dict, route: dict = None):
+        """Async version of `stream_lines`."""
+        errors = []
+        for backend, b_headers, b_payload in self._attempts(headers, payload, errors):
+            started = False
+            try:
+                async for line in get_async_http_client().stream_lines(backend.url, headers=b_headers, json=b_payload):
+                    if not started and route is not None:
+                        route.update(backend=backend, model=b_payload.get("model"))
+                    started = True
+                    yield line
+            except Exception as e:
+                fallback = self._failed(backend, e, b_payload.get("model"))
+                if started or not fallback:
+                    raise
+                print(f"⚠️ Backend {backend.name} failed ({e}). Trying next backend...")
+                errors.append(e)
+                continue
+            backend.stats.record()
+            backend.breaker.record_success()
+            return
+        self._give_up(errors)
+
+    def hedge_policy(self, site: str) -> HedgePolicy:
+        """Per-call-site policy configured from LLM_HEDGE_PERCENTILE/LLM_HEDGE_BUDGET."""
+        if site not in self.hedge_policies:
+            self.hedge_policies[site] = HedgePolicy(
+                site,
+                percentile=float(os.getenv("LLM_HEDGE_PERCENTILE", "0.95")),
+                max_ratio=float(os.getenv("LLM_HEDGE_BUDGET", "0.2")),
+            )
+        return self.hedge_policies[site]
+
+    def get_stats(self) -> dict:
+        stats = {backend.name: backend.summary() for backend in self.backends}
+        if self.hedge_policies:
+            stats["hedging"] = {site: policy.summary() for site, policy in self.hedge_policies.items()}
+        return stats
+
+
+def load_backends() -> list:
+    """
+    Backends from the LLM_BACKENDS env var, a JSON list such as
+    [{"name": "groq", "url": "...", "model": "...", "api_key_env": "GROQ_API_KEY"}].
+    """
+    raw = os.getenv("LLM_BACKENDS")
+    specs = json.loads(raw) if raw else DEFAULT_BACKENDS
+    return [Backend(**spec) for spec in specs]
+
+
+_shared_router = None
+_shared_lock = threading.Lock()
+
+
+def get_llm_router() -> LLMRouter:
+    """Return the process-wide LLMRouter configured from LLM_BACKENDS."""
+    global _shared_router
+    if _shared_router is None:
+        with _shared_lock:
+            if _shared_router is None:
+                _shared_router = LLMRouter(load_backends())
+    return _shared_router
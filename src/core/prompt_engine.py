@@ -1,13 +1,237 @@
 # src/core/prompt_engine.py
 
+import os
 import textwrap
+import threading
+
+# tiktoken is optional: without it token counts fall back to ~4 characters per token
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Total tokens (prompt + completion) each model accepts
+MODEL_CONTEXT_WINDOWS = {
+    "llama-3.1-8b-instant": 131072,
+    "llama-3.3-70b-versatile": 131072,
+    "llama-3.1-70b-versatile": 131072,
+}
+# Used for unknown models; the router may send a call to any backend, so stay conservative
+DEFAULT_CONTEXT_WINDOW = 8192
+
+TRIM_MARKER = "\n# ... [{lines} lines trimmed to fit the context window] ...\n"
+
+_encoding = None
+_encoding_lock = threading.Lock()
+
+
+def _get_encoding():
+    global _encoding
+    if _encoding is None and tiktoken is not None:
+        with _encoding_lock:
+            if _encoding is None:
+                try:
+                    # cl100k is not Llama's tokenizer but is within a few percent on English/code
+                    _encoding = tiktoken.get_encoding("cl100k_base")
+                except Exception:
+                    _encoding = False  # e.g. no network to fetch the BPE file
+    return _encoding or None
+
+
+def count_tokens(text: str) -> int:
+    """Count tokens locally, without an API round trip."""
+    encoding = _get_encoding()
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def format_plan(plan) -> str:
+    """Plain-text form of a structured plan ({"goal", "tasks"}) for use inside a prompt."""
+    if not isinstance(plan, dict):
+        return str(plan)
+    lines = []
+    for key, value in plan.items():
+        if isinstance(value, (list, tuple)):
+            lines.append(f"{str(key).capitalize()}:")
+            lines.extend(f"- {item}" for item in value)
+        else:
+            lines.append(f"{str(key).capitalize()}: {value}")
+    return "\n".join(lines)
+
 
 class PromptEngine:
-    def __init__(self):
-        pass
+    """
+    Builds agent prompts and keeps them inside the model's context window.
 
-    def build_planner_prompt(self, user_goal: str) -> str:
-        return textwrap.dedent(f"""
+    `assemble` puts the agent's fixed instructions in the system message and
+    the variable input (code, idea) in the user message. The system message
+    is then an identical prefix on every call an agent makes, which
+    providers with prefix caching can reuse. Oversized inputs are trimmed
+    (or split with `assemble_chunks`) before anything is sent, and prompt
+    sizes are recorded per agent.
+
+    Args:
+        max_prompt_tokens (int): Extra cap on prompt size (e.g. a provider
+            tokens-per-minute limit). Defaults to LLM_MAX_PROMPT_TOKENS.
+    """
+
+    def __init__(self, max_prompt_tokens: int = None):
+        self.max_prompt_tokens = max_prompt_tokens or int(os.getenv("LLM_MAX_PROMPT_TOKENS", "0")) or None
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    # --- budgeting ---
+
+    def context_window(self, model: str = None) -> int:
+        return MODEL_CONTEXT_WINDOWS.get(model, int(os.getenv("LLM_CONTEXT_WINDOW", DEFAULT_CONTEXT_WINDOW)))
+
+    def prompt_budget(self, model: str = None, max_tokens: int = 1500) -> int:
+        """Tokens available for the whole prompt once the completion is reserved."""
+        budget = self.context_window(model) - max_tokens
+        if self.max_prompt_tokens:
+            budget = min(budget, self.max_prompt_tokens)
+        return budget
+
+    def _content_budget(self, instructions: str, label: str, model: str, max_tokens: int) -> int:
+        # Small allowance for chat-format overhead (role markers) and the code fence
+        overhead = count_tokens(instructions) + count_tokens(label or "") + 16
+        budget = self.prompt_budget(model, max_tokens) - overhead
+        if budget <= 0:
+            raise ValueError(f"Instructions alone exceed the prompt budget for {model or 'the default model'}")
+        return budget
+
+    def trim(self, text: str, budget: int) -> str:
+        """
+        Fit `text` into `budget` tokens, keeping lines from both the start
+        (imports, definitions) and the end (entry point) around a marker.
+        """
+        if count_tokens(text) <= budget:
+            return text
+        lines = text.splitlines()
+        remaining = budget - count_tokens(TRIM_MARKER.format(lines=len(lines)))
+        head, tail = [], []
+        start, end = 0, len(lines) - 1
+        from_head = True
+        while start <= end:
+            line = lines[start] if from_head else lines[end]
+            cost = count_tokens(line) + 1
+            if cost > remaining:
+                break
+            remaining -= cost
+            if from_head:
+                head.append(line)
+                start += 1
+            else:
+                tail.append(line)
+                end -= 1
+            from_head = not from_head
+        dropped = len(lines) - len(head) - len(tail)
+        return "\n".join(head) + TRIM_MARKER.format(lines=dropped) + "\n".join(reversed(tail))
+
+    def chunk(self, text: str, budget: int) -> list:
+        """Split `text` on line boundaries into pieces of at most `budget` tokens."""
+        chunks, current, used = [], [], 0
+        for line in text.splitlines():
+            cost = count_tokens(line) + 1
+            if cost > budget:
+                # A single huge line (minified data, long strings): cut it by characters
+                step = max(1, budget * 3)
+                pieces = [line[i:i + step] for i in range(0, len(line), step)]
+            else:
+                pieces = [line]
+            for piece in pieces:
+                cost = count_tokens(piece) + 1
+                if current and used + cost > budget:
+                    chunks.append("\n".join(current))
+                    current, used = [], 0
+                current.append(piece)
+                used += cost
+        if current:
+            chunks.append("\n".join(current))
+        return chunks or [""]
+
+    # --- assembly ---
+
+    @staticmethod
+    def _format_content(content: str, label: str, language: str) -> str:
+        block = f"```{language}\n{content}\n```" if language else content
+        return f"{label}:\n{block}" if label else block
+
+    def assemble(self, agent: str, instructions: str, content: str, label: str = "📂 Code",
+                 language: str = "python", model: str = None, max_tokens: int = 1500):
+        """
+        Return (system_prompt, user_prompt) for one agent call, trimming
+        `content` if the prompt would not fit the model window.
+        """
+        instructions = instructions.strip()
+        budget = self._content_budget(instructions, label, model, max_tokens)
+        fitted = self.trim(content, budget)
+        if fitted is not content:
+            print(f"✂️ {agent}: input trimmed to fit the {budget}-token prompt budget.")
+        user_prompt = self._format_content(fitted, label, language)
+        self.record(agent, instructions, user_prompt, trimmed=fitted is not content)
+        return instructions, user_prompt
+
+    def assemble_chunks(self, agent: str, instructions: str, content: str, label: str = "📂 Code",
+                        language: str = "python", model: str = None, max_tokens: int = 1500):
+        """
+        Like `assemble` but splits oversized `content` into several user
+        prompts instead of trimming it. Returns (system_prompt, [user_prompt, ...]).
+        """
+        instructions = instructions.strip()
+        budget = self._content_budget(instructions, label, model, max_tokens)
+        pieces = self.chunk(content, budget) if count_tokens(content) > budget else [content]
+        prompts = [self._format_content(piece, label, language) for piece in pieces]
+        for prompt in prompts:
+            self.record(agent, instructions, prompt, chunks=len(prompts))
+        return instructions, prompts
+
+    def check_fits(self, messages: list, model: str = None, max_tokens: int = 1500):
+        """Raise ValueError before sending a request the model would reject as too long."""
+        prompt_tokens = sum(count_tokens(m.get("content", "")) for m in messages)
+        window = self.context_window(model)
+        if prompt_tokens + max_tokens > window:
+            raise ValueError(
+                f"Prompt of ~{prompt_tokens} tokens plus {max_tokens} completion tokens "
+                f"exceeds the {window}-token context window of {model}"
+            )
+        return prompt_tokens
+
+    # --- reporting ---
+
+    def record(self, agent: str, system_prompt: str, user_prompt: str, trimmed: bool = False, chunks: int = 1):
+        """Record the size of one prompt sent by `agent`."""
+        system_tokens, user_tokens = count_tokens(system_prompt), count_tokens(user_prompt)
+        with self._lock:
+            entry = self.stats.setdefault(agent, {
+                "calls": 0, "system_tokens": 0, "user_tokens": 0, "max_tokens": 0, "trimmed": 0, "chunked": 0,
+            })
+            entry["calls"] += 1
+            entry["system_tokens"] += system_tokens
+            entry["user_tokens"] += user_tokens
+            entry["max_tokens"] = max(entry["max_tokens"], system_tokens + user_tokens)
+            entry["trimmed"] += int(trimmed)
+            entry["chunked"] += int(chunks > 1)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                agent: dict(entry, avg_tokens=round((entry["system_tokens"] + entry["user_tokens"]) / entry["calls"]))
+                for agent, entry in self.stats.items()
+            }
+
+    def print_report(self):
+        stats = self.get_stats()
+        if not stats:
+            return
+        print("\n🧾 Prompt sizes per agent (tokens):")
+        for agent, entry in sorted(stats.items()):
+            print(f"   → {agent}: {entry['calls']} calls, avg {entry['avg_tokens']}, max {entry['max_tokens']}"
+                  f" (system {entry['system_tokens']}, user {entry['user_tokens']}, trimmed {entry['trimmed']})")
+
+    def build_planner_prompt(self, user_goal: str, references: str = "") -> str:
+        prompt = textwrap.dedent(f"""
             You are a professional AI software architect.
 
             Your job is to create a detailed project plan for the following goal:
@@ -26,6 +250,7 @@ class PromptEngine:
 
             Respond in clean Markdown format.
         """)
+        return f"{prompt}\n{references}\n" if references else prompt
 
     def build_code_writer_prompt(self, plan: dict, task_description: str = "") -> str:
         plan_summary = "\n".join([f"- **{k}**: {v}" for k, v in plan.items()])
@@ -77,3 +302,15 @@ class PromptEngine:
         """)
 
 
+_shared_engine = None
+_shared_lock = threading.Lock()
+
+
+def get_prompt_engine() -> PromptEngine:
+    """Return the process-wide PromptEngine so prompt stats cover every agent."""
+    global _shared_engine
+    if _shared_engine is None:
+        with _shared_lock:
+            if _shared_engine is None:
+                _shared_engine = PromptEngine()
+    return _shared_engine
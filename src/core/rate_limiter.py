@@ -0,0 +1,310 @@
+# src/core/rate_limiter.py
+
+import asyncio
+import contextvars
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, asynccontextmanager
+
+from src.core.prompt_engine import count_tokens
+
+try:
+    import fcntl  # POSIX only; used to share budgets between processes
+except ImportError:
+    fcntl = None
+
+# Lower value = served first
+PRIORITIES = {"interactive": 0, "normal": 1, "batch": 2}
+
+_current_priority = contextvars.ContextVar("llm_priority", default="normal")
+
+
+@contextmanager
+def llm_priority(name: str):
+    """
+    Run LLM calls made inside the block with the given priority class.
+
+    Usage:
+        with llm_priority("batch"):
+            orchestrate_project(idea)
+    """
+    if name not in PRIORITIES:
+        raise ValueError(f"Unknown priority `{name}`. Use one of {list(PRIORITIES)}")
+    token = _current_priority.set(name)
+    try:
+        yield
+    finally:
+        _current_priority.reset(token)
+
+
+def current_priority() -> str:
+    return _current_priority.get()
+
+
+def estimate_tokens(text: str) -> int:
+    """Local token count (tiktoken when installed, else ~4 characters per token)."""
+    return count_tokens(text)
+
+
+def estimate_request_tokens(payload: dict) -> int:
+    """
+    Tokens a chat-completion request can consume: prompt plus the full
+    `max_tokens` completion. The difference is refunded once usage is known.
+    """
+    prompt_tokens = sum(estimate_tokens(m.get("content", "")) for m in payload.get("messages", []))
+    return prompt_tokens + payload.get("max_tokens", 0)
+
+
+class TokenBucket:
+    """
+    Classic token bucket: holds up to `capacity` and refills continuously at
+    `capacity` per `period` seconds. A capacity of 0 means unlimited.
+    """
+
+    def __init__(self, capacity: float, period: float = 60.0):
+        self.capacity = capacity
+        self.rate = capacity / period if capacity else 0.0
+        self.level = capacity
+        self.updated = time.time()
+
+    def refill(self, now: float):
+        if self.capacity:
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount: float) -> float:
+        """Seconds until `amount` is available (0 if it already is)."""
+        if not self.capacity:
+            return 0.0
+        amount = min(amount, self.capacity)
+        if self.level >= amount:
+            return 0.0
+        return (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        if self.capacity:
+            self.level -= min(amount, self.capacity)
+
+    def give(self, amount: float):
+        if self.capacity:
+            self.level = min(self.capacity, self.level + amount)
+
+
+class Reservation:
+    """Handle for one admitted request; set `actual_tokens` once usage is known."""
+
+    def __init__(self, tokens: int, priority: str):
+        self.tokens = tokens
+        self.priority = priority
+        self.actual_tokens = None
+        self.granted = False
+
+
+class RateLimiter:
+    """
+    Admits LLM requests against requests-per-minute and tokens-per-minute
+    budgets plus a cap on in-flight requests. Waiting callers are served
+    strictly by priority class, then arrival order.
+
+    With `state_file` set the RPM/TPM buckets live in that file under an
+    exclusive lock, so several processes (API server, bots, CLI) share one
+    budget. Priority ordering and the concurrency cap stay per-process.
+
+    Args:
+        rpm (int): Requests per minute, 0 for unlimited.
+        tpm (int): Tokens per minute, 0 for unlimited.
+        max_concurrency (int): Maximum in-flight requests in this process.
+        state_file (str): Optional path for cross-process bucket state.
+    """
+
+    poll_interval = 0.05
+
+    def __init__(self, rpm: int = 30, tpm: int = 6000, max_concurrency: int = 8, state_file: str = None):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.state_file = state_file if fcntl is not None else None
+        self.in_flight = 0
+
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._waiters = []
+        self._seq = itertools.count()
+
+        self.metrics = {
+            "granted": 0,
+            "total_wait_seconds": 0.0,
+            "max_queue_depth": 0,
+            "refunded_tokens": 0,
+        }
+
+    # --- bucket state (optionally shared through a locked file) ---
+
+    @contextmanager
+    def _buckets(self):
+        if not self.state_file:
+            now = time.time()
+            self.requests.refill(now)
+            self.tokens.refill(now)
+            yield
+            return
+
+        with open(self.state_file, "a+", encoding="utf-8") as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                f.seek(0)
+                raw = f.read()
+                if raw:
+                    state = json.loads(raw)
+                    for name, bucket in (("requests", self.requests), ("tokens", self.tokens)):
+                        bucket.level = state[name]["level"]
+                        bucket.updated = state[name]["updated"]
+                now = time.time()
+                self.requests.refill(now)
+                self.tokens.refill(now)
+                yield
+                f.seek(0)
+                f.truncate()
+                json.dump({
+                    "requests": {"level": self.requests.level, "updated": self.requests.updated},
+                    "tokens": {"level": self.tokens.level, "updated": self.tokens.updated},
+                }, f)
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    # --- admission ---
+
+    def _enqueue(self, reservation: Reservation) -> list:
+        entry = [PRIORITIES[reservation.priority], next(self._seq), reservation]
+        heapq.heappush(self._waiters, entry)
+        self.metrics["max_queue_depth"] = max(self.metrics["max_queue_depth"], len(self._waiters))
+        return entry
+
+    def _dequeue(self, entry: list):
+        if entry in self._waiters:
+            self._waiters.remove(entry)
+            heapq.heapify(self._waiters)
+
+    def _try_grant(self, entry: list) -> float:
+        """Must hold self._lock. Returns 0 when granted, else seconds to wait."""
+        if self._waiters[0] is not entry or self.in_flight >= self.max_concurrency:
+            return self.poll_interval
+
+        reservation = entry[2]
+        with self._buckets():
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(reservation.tokens))
+            if wait == 0:
+                self.requests.take(1)
+                self.tokens.take(reservation.tokens)
+        if wait:
+            return wait
+
+        heapq.heappop(self._waiters)
+        self.in_flight += 1
+        reservation.granted = True
+        self.metrics["granted"] += 1
+        self._cond.notify_all()
+        return 0.0
+
+    def _release(self, reservation: Reservation):
+        with self._cond:
+            if not reservation.granted:
+                return
+            self.in_flight -= 1
+            unused = 0
+            if reservation.actual_tokens is not None:
+                unused = reservation.tokens - reservation.actual_tokens
+            if unused > 0:
+                with self._buckets():
+                    self.tokens.give(unused)
+                self.metrics["refunded_tokens"] += unused
+            self._cond.notify_all()
+
+    @contextmanager
+    def reserve(self, tokens: int, priority: str = None):
+        """
+        Block until the request may be sent, then yield its Reservation.
+        Unused tokens are refunded on exit if `actual_tokens` was set.
+        """
+        reservation = Reservation(tokens, priority or current_priority())
+        started = time.perf_counter()
+        with self._cond:
+            entry = self._enqueue(reservation)
+            try:
+                while True:
+                    wait = self._try_grant(entry)
+                    if wait == 0:
+                        break
+                    self._cond.wait(timeout=min(wait, 1.0))
+            except BaseException:
+                self._dequeue(entry)
+                raise
+            self.metrics["total_wait_seconds"] += time.perf_counter() - started
+        try:
+            yield reservation
+        finally:
+            self._release(reservation)
+
+    @asynccontextmanager
+    async def areserve(self, tokens: int, priority: str = None):
+        """Async version of `reserve` that waits without blocking the event loop."""
+        reservation = Reservation(tokens, priority or current_priority())
+        started = time.perf_counter()
+        with self._lock:
+            entry = self._enqueue(reservation)
+        try:
+            while True:
+                with self._lock:
+                    wait = self._try_grant(entry)
+                if wait == 0:
+                    break
+                await asyncio.sleep(min(wait, self.poll_interval))
+        except BaseException:
+            with self._lock:
+                self._dequeue(entry)
+            raise
+        with self._lock:
+            self.metrics["total_wait_seconds"] += time.perf_counter() - started
+        try:
+            yield reservation
+        finally:
+            self._release(reservation)
+
+    def get_metrics(self) -> dict:
+        with self._lock:
+            depth = {name: 0 for name in PRIORITIES}
+            for _, _, reservation in self._waiters:
+                depth[reservation.priority] += 1
+            granted = self.metrics["granted"]
+            return {
+                "queue_depth": len(self._waiters),
+                "queue_depth_by_priority": depth,
+                "in_flight": self.in_flight,
+                "granted": granted,
+                "avg_wait_seconds": round(self.metrics["total_wait_seconds"] / granted, 4) if granted else 0.0,
+                "max_queue_depth": self.metrics["max_queue_depth"],
+                "refunded_tokens": self.metrics["refunded_tokens"],
+            }
+
+
+_shared_limiter = None
+_shared_lock = threading.Lock()
+
+
+def get_rate_limiter() -> RateLimiter:
+    """Return the process-wide RateLimiter configured from LLM_RPM/LLM_TPM env vars."""
+    global _shared_limiter
+    if _shared_limiter is None:
+        with _shared_lock:
+            if _shared_limiter is None:
+                _shared_limiter = RateLimiter(
+                    rpm=int(os.getenv("LLM_RPM", "30")),
+                    tpm=int(os.getenv("LLM_TPM", "6000")),
+                    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+                    state_file=os.getenv("LLM_RATE_LIMIT_STATE") or None,
+                )
+    return _shared_limiter
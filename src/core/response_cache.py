@@ -0,0 +1,231 @@
+# src/core/response_cache.py
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+
+class MemoryLRUCache:
+    """
+    In-process LRU tier. Entries are dicts with at least `expires_at`.
+
+    Args:
+        max_entries (int): Least recently used entries are evicted past this size.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry["expires_at"] < time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry
+
+    def set(self, key: str, entry: dict):
+        with self._lock:
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteCache:
+    """
+    On-disk tier backed by a single SQLite file, shared across processes.
+
+    Args:
+        path (str): Database file location.
+        max_entries (int): Least recently accessed rows are evicted past this size.
+    """
+
+    def __init__(self, path: str = ".cache/llm_responses.sqlite3", max_entries: int = 5000):
+        self.path = path
+        self.max_entries = max_entries
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS responses ("
+            " key TEXT PRIMARY KEY, entry TEXT NOT NULL,"
+            " expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses(accessed_at)")
+        self._conn.commit()
+
+    def get(self, key: str):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT entry, expires_at FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if row[1] < now:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self._conn.commit()
+                return None
+            self._conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+        return json.loads(row[0])
+
+    def set(self, key: str, entry: dict):
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, entry, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, json.dumps(entry), entry["expires_at"], now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        self._conn.execute("DELETE FROM responses WHERE expires_at < ?", (time.time(),))
+        count = self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM responses WHERE key IN ("
+                " SELECT key FROM responses ORDER BY accessed_at ASC LIMIT ?)",
+                (count - self.max_entries,),
+            )
+
+    def delete(self, key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM responses")
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+
+class TieredCache:
+    """Checks tiers in order and promotes hits from slower tiers into faster ones."""
+
+    def __init__(self, *tiers):
+        self.tiers = list(tiers)
+
+    def get(self, key: str):
+        for i, tier in enumerate(self.tiers):
+            entry = tier.get(key)
+            if entry is not None:
+                for faster in self.tiers[:i]:
+                    faster.set(key, entry)
+                return entry
+        return None
+
+    def set(self, key: str, entry: dict):
+        for tier in self.tiers:
+            tier.set(key, entry)
+
+    def delete(self, key: str):
+        for tier in self.tiers:
+            tier.delete(key)
+
+    def clear(self):
+        for tier in self.tiers:
+            tier.clear()
+
+
+class ResponseCache:
+    """
+    Content-addressed cache for LLM completions.
+
+    Any object with get/set/delete/clear can be used as `backend`; by default
+    an in-memory LRU tier sits in front of a SQLite tier.
+
+    Args:
+        backend: Storage backend (see MemoryLRUCache, SQLiteCache, TieredCache).
+        ttl (float): Seconds a cached completion stays valid.
+        bypass_nonzero_temperature (bool): Never cache sampled (temperature > 0) calls.
+    """
+
+    def __init__(self, backend=None, ttl: float = 86400, bypass_nonzero_temperature: bool = False):
+        self.backend = backend if backend is not None else TieredCache(MemoryLRUCache(), SQLiteCache())
+        self.ttl = ttl
+        self.bypass_nonzero_temperature = bypass_nonzero_temperature
+
+    @staticmethod
+    def make_key(model: str, temperature: float, system_prompt: str, prompt: str) -> str:
+        raw = json.dumps([model, round(float(temperature), 4), system_prompt, prompt], ensure_ascii=False)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def should_bypass(self, temperature: float) -> bool:
+        return self.bypass_nonzero_temperature and temperature > 0
+
+    def get(self, key: str):
+        """Return the cached {"content", "tokens"} entry or None."""
+        return self.backend.get(key)
+
+    def set(self, key: str, content: str, tokens: int = 0):
+        self.backend.set(key, {
+            "content": content,
+            "tokens": tokens,
+            "expires_at": time.time() + self.ttl,
+        })
+
+    def clear(self):
+        self.backend.clear()
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+
+
+def get_response_cache():
+    """
+    Return the process-wide ResponseCache configured from LLM_CACHE_* env vars,
+    or None when caching is disabled with LLM_CACHE=0.
+
+    Sampled (temperature > 0) calls are not cached, so rerunning an idea
+    gives a fresh answer. LLM_CACHE_SAMPLED=1 opts in to caching them too,
+    which makes reruns within LLM_CACHE_TTL return the same completion.
+    """
+    global _shared_cache
+    if os.getenv("LLM_CACHE", "1") != "1":
+        return None
+    if _shared_cache is None:
+        with _shared_lock:
+            if _shared_cache is None:
+                backend = TieredCache(
+                    MemoryLRUCache(int(os.getenv("LLM_CACHE_MEMORY_ENTRIES", "256"))),
+                    SQLiteCache(
+                        os.getenv("LLM_CACHE_PATH", ".cache/llm_responses.sqlite3"),
+                        int(os.getenv("LLM_CACHE_DISK_ENTRIES", "5000")),
+                    ),
+                )
+                _shared_cache = ResponseCache(
+                    backend,
+                    ttl=float(os.getenv("LLM_CACHE_TTL", "86400")),
+                    bypass_nonzero_temperature=os.getenv("LLM_CACHE_SAMPLED", "0") != "1",
+                )
+    return _shared_cache
@@ -1,24 +1,227 @@
 # src/utils/retry_handler.py
 
+import asyncio
+import random
+import threading
 import time
 import functools
+from collections import deque
+from email.utils import parsedate_to_datetime
+
+# Transient statuses worth retrying; any other 4xx is the caller's fault
+RETRYABLE_STATUS_CODES = {408, 409, 425, 429, 500, 502, 503, 504}
+
+
+class RetryError(Exception):
+    """Raised when a call gave up; the last underlying error is chained as __cause__."""
+
+    def __init__(self, message: str, last_exception: Exception = None):
+        super().__init__(message)
+        self.last_exception = last_exception
+
+
+class CircuitOpenError(Exception):
+    """Raised without calling the function while its circuit breaker is open."""
+
+
+def get_status_code(exc: Exception):
+    """HTTP status carried by an exception (our HTTPStatusError or requests.HTTPError)."""
+    status = getattr(exc, "status_code", None)
+    if status is None and getattr(exc, "response", None) is not None:
+        status = getattr(exc.response, "status_code", None)
+    return status
+
+
+def get_retry_after(exc: Exception):
+    """Seconds requested by a Retry-After header on the failed response, if any."""
+    headers = getattr(exc, "headers", None)
+    if headers is None and getattr(exc, "response", None) is not None:
+        headers = getattr(exc.response, "headers", None)
+    if not headers:
+        return None
+    value = headers.get("Retry-After") or headers.get("retry-after")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def is_retryable(exc: Exception) -> bool:
+    """Network errors and transient statuses are retryable, other 4xx are fatal."""
+    if isinstance(exc, CircuitOpenError):
+        return False
+    status = get_status_code(exc)
+    return status is None or status in RETRYABLE_STATUS_CODES
+
+
+class RetryBudget:
+    """
+    Caps retries at `ratio` of the calls seen in the last `window` seconds
+    (plus a small `min_retries` floor), so a provider outage can't multiply
+    traffic by the retry count.
+    """
+
+    def __init__(self, ratio: float = 0.2, window: float = 60.0, min_retries: int = 3):
+        self.ratio = ratio
+        self.window = window
+        self.min_retries = min_retries
+        self._calls = deque()
+        self._retries = deque()
+        self._lock = threading.Lock()
+
+    def _trim(self, now: float):
+        for events in (self._calls, self._retries):
+            while events and events[0] < now - self.window:
+                events.popleft()
+
+    def record_call(self):
+        with self._lock:
+            now = time.time()
+            self._trim(now)
+            self._calls.append(now)
+
+    def try_spend(self) -> bool:
+        """Reserve one retry if the budget allows it."""
+        with self._lock:
+            now = time.time()
+            self._trim(now)
+            if len(self._retries) >= self.min_retries + self.ratio * len(self._calls):
+                return False
+            self._retries.append(now)
+            return True
+
+
+class CircuitBreaker:
+    """
+    Opens after `failure_threshold` consecutive retryable failures and then
+    fails fast for `reset_timeout` seconds. After that a single trial call is
+    let through (half-open); its outcome closes or re-opens the circuit.
+    """
+
+    def __init__(self, name: str = "default", failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self._lock = threading.Lock()
+
+    def before_call(self):
+        with self._lock:
+            if self.state == "closed":
+                return
+            if time.time() - self.opened_at < self.reset_timeout:
+                raise CircuitOpenError(f"Circuit `{self.name}` is {self.state.replace('_', '-')}; failing fast.")
+            # Let one trial call through; if it never reports back, another one after reset_timeout
+            self.state = "half_open"
+            self.opened_at = time.time()
+
+    def record_success(self):
+        with self._lock:
+            self.state = "closed"
+            self.failures = 0
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.time()
+
+
+# Shared by every decorated function unless a different budget is passed
+GLOBAL_RETRY_BUDGET = RetryBudget()
+
+
+class _RetryPolicy:
+    """Bookkeeping shared by the sync and async decorators."""
+
+    def __init__(self, func_name, retries, delay, backoff, max_delay, allowed_exceptions,
+                 retry_if, budget, breaker, verbose):
+        self.func_name = func_name
+        self.retries = retries
+        self.delay = delay
+        self.backoff = backoff
+        self.max_delay = max_delay
+        self.allowed_exceptions = allowed_exceptions
+        self.retry_if = retry_if
+        self.budget = budget
+        self.breaker = breaker
+        self.verbose = verbose
+
+    def before_attempt(self, attempt: int):
+        if self.breaker is not None:
+            self.breaker.before_call()
+        if attempt == 1 and self.budget is not None:
+            self.budget.record_call()
+
+    def on_success(self):
+        if self.breaker is not None:
+            self.breaker.record_success()
+
+    def on_failure(self, exc: Exception, attempt: int, prev_delay: float):
+        """Return the seconds to sleep before the next attempt, or raise."""
+        retryable = self.retry_if(exc)
+        if self.breaker is not None:
+            if retryable:
+                self.breaker.record_failure()
+            else:
+                self.breaker.record_success()  # the provider answered; the request was bad
+
+        if not retryable:
+            raise exc
+        if attempt >= self.retries:
+            if self.verbose:
+                print("❌ All retries failed.")
+            raise RetryError(f"Function `{self.func_name}` failed after {self.retries} attempts: {exc}", exc) from exc
+        if self.budget is not None and not self.budget.try_spend():
+            raise RetryError(f"Function `{self.func_name}` failed and the retry budget is exhausted: {exc}", exc) from exc
+
+        # Decorrelated jitter: random between the base delay and a multiple of the last one
+        sleep = min(self.max_delay, random.uniform(self.delay, max(self.delay, prev_delay * self.backoff)))
+        retry_after = get_retry_after(exc)
+        if retry_after is not None:
+            sleep = max(sleep, min(retry_after, self.max_delay))
+
+        if self.verbose:
+            print(f"⚠️ Retryable error: {exc}. Attempts left: {self.retries - attempt}. Retrying in {sleep:.1f}s...")
+        return sleep
+
 
 def retry_on_exception(
     retries: int = 3,
     delay: float = 2.0,
-    backoff: float = 2.0,
+    backoff: float = 3.0,
     allowed_exceptions: tuple = (Exception,),
-    verbose: bool = True
+    verbose: bool = True,
+    max_delay: float = 30.0,
+    retry_if=is_retryable,
+    budget: RetryBudget = GLOBAL_RETRY_BUDGET,
+    breaker: CircuitBreaker = None
 ):
     """
     A decorator that retries a function on exception.
 
     Args:
-        retries (int): Total retry attempts.
-        delay (float): Initial delay between retries (in seconds).
-        backoff (float): Multiplier for delay.
+        retries (int): Total attempts, including the first call.
+        delay (float): Base delay between retries (in seconds).
+        backoff (float): Each delay is drawn from [delay, previous delay * backoff].
         allowed_exceptions (tuple): Exceptions to catch and retry.
         verbose (bool): Whether to print retry messages.
+        max_delay (float): Upper bound for a single sleep, including Retry-After.
+        retry_if (callable): Decides whether a caught exception is worth retrying.
+        budget (RetryBudget): Shared retry budget, None to disable.
+        breaker (CircuitBreaker): Optional circuit breaker guarding the call.
+
+    Exceptions that are not retryable are re-raised unchanged; when attempts
+    or budget run out a RetryError chained to the last error is raised.
 
     Usage:
         @retry_on_exception(retries=3, delay=1)
@@ -28,21 +231,58 @@ def retry_on_exception(
     def decorator(func):
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            _retries = retries
+            policy = _RetryPolicy(func.__name__, retries, delay, backoff, max_delay,
+                                  allowed_exceptions, retry_if, budget, breaker, verbose)
             _delay = delay
-            while _retries > 0:
+            attempt = 0
+            while True:
+                attempt += 1
+                policy.before_attempt(attempt)
                 try:
-                    return func(*args, **kwargs)
+                    result = func(*args, **kwargs)
                 except allowed_exceptions as e:
-                    _retries -= 1
-                    if verbose:
-                        print(f"⚠️ Retryable error: {e}. Retries left: {_retries}. Retrying in {_delay}s...")
+                    _delay = policy.on_failure(e, attempt, _delay)
                     time.sleep(_delay)
-                    _delay *= backoff
-            if verbose:
-                print("❌ All retries failed.")
-            raise Exception(f"Function `{func.__name__}` failed after {retries} retries.")
+                    continue
+                policy.on_success()
+                return result
         return wrapper
     return decorator
 
 
+def async_retry_on_exception(
+    retries: int = 3,
+    delay: float = 2.0,
+    backoff: float = 3.0,
+    allowed_exceptions: tuple = (Exception,),
+    verbose: bool = True,
+    max_delay: float = 30.0,
+    retry_if=is_retryable,
+    budget: RetryBudget = GLOBAL_RETRY_BUDGET,
+    breaker: CircuitBreaker = None
+):
+    """
+    Async version of `retry_on_exception` for coroutine functions.
+
+    Waits with asyncio.sleep so other tasks keep running between attempts.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            policy = _RetryPolicy(func.__name__, retries, delay, backoff, max_delay,
+                                  allowed_exceptions, retry_if, budget, breaker, verbose)
+            _delay = delay
+            attempt = 0
+            while True:
+                attempt += 1
+                policy.before_attempt(attempt)
+                try:
+                    result = await func(*args, **kwargs)
+                except allowed_exceptions as e:
+                    _delay = policy.on_failure(e, attempt, _delay)
+                    await asyncio.sleep(_delay)
+                    continue
+                policy.on_success()
+                return result
+        return wrapper
+    return decorator
@@ -0,0 +1,225 @@
+# src/core/semantic_cache.py
+
+import itertools
+import json
+import os
+import random
+import threading
+import time
+
+import numpy as np
+
+# FAISS and the embedding model are optional: without them the semantic cache is disabled
+try:
+    from src.vector_store.faiss_index import VectorStore
+except ImportError:
+    VectorStore = None
+from src.vector_store.embedding_service import get_embedding_service
+
+# Minimum cosine similarity for a hit. Plans tolerate rewording better than generated code.
+DEFAULT_THRESHOLDS = {"planner": 0.92, "writer": 0.95}
+DEFAULT_THRESHOLD = 0.95
+
+
+class SemanticCache:
+    """
+    Near-duplicate cache for LLM completions keyed by the meaning of the input.
+
+    Each agent gets its own FAISS store of recent inputs. `lookup` embeds
+    the new input and returns the stored completion of the closest one when
+    its cosine similarity reaches the agent's threshold and it was produced
+    with the same `context` (model, system prompt). A sample of hits
+    (`audit_rate`) is treated as a miss; when the caller then `store`s the
+    fresh completion, it is compared with the cached one and counted as a
+    false hit if they diverge. That rate is what thresholds should be tuned on.
+
+    Args:
+        embed_fn: list[str] -> normalized vectors. Shared by every agent's store.
+        thresholds (dict): Per-agent similarity thresholds.
+        default_threshold (float): Threshold for agents not in `thresholds`.
+        max_entries (int): Entries kept per agent; least recently used go first.
+        ttl (float): Seconds an entry stays valid.
+        audit_rate (float): Fraction of hits re-checked against a fresh completion.
+        audit_similarity (float): Completions less similar than this are a false hit.
+    """
+
+    def __init__(self, embed_fn, thresholds: dict = None, default_threshold: float = DEFAULT_THRESHOLD,
+                 max_entries: int = 500, ttl: float = 86400, audit_rate: float = 0.05,
+                 audit_similarity: float = 0.8):
+        if VectorStore is None:
+            raise ImportError("faiss is not installed; the semantic cache needs it.")
+        self.embed_fn = embed_fn
+        self.thresholds = dict(DEFAULT_THRESHOLDS, **(thresholds or {}))
+        self.default_threshold = default_threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.audit_rate = audit_rate
+        self.audit_similarity = audit_similarity
+        self._stores = {}
+        self._entries = {}
+        self._audits = {}
+        self._ids = itertools.count()
+        self.stats = {}
+        self._lock = threading.Lock()
+
+    def threshold(self, agent: str) -> float:
+        return self.thresholds.get(agent, self.default_threshold)
+
+    def _stat(self, agent: str) -> dict:
+        return self.stats.setdefault(agent, {
+            "lookups": 0, "hits": 0, "misses": 0, "audits": 0, "false_hits": 0,
+            "evictions": 0, "hit_similarity_sum": 0.0,
+        })
+
+    def _embed(self, text: str):
+        return np.asarray(self.embed_fn([text]), dtype="float32")[0]
+
+    # --- lookup / store ---
+
+    def lookup(self, agent: str, text: str, context: str = ""):
+        """Return the cached completion for an input close enough to `text`, or None."""
+        vector = self._embed(text)
+        with self._lock:
+            stat = self._stat(agent)
+            stat["lookups"] += 1
+            entry, similarity = self._nearest(agent, vector, context)
+            if entry is None or similarity < self.threshold(agent):
+                stat["misses"] += 1
+                return None
+            if random.random() < self.audit_rate:
+                # Let this one through to the LLM; `store` grades the cached answer against the fresh one
+                stat["audits"] += 1
+                self._audits[(agent, text, context)] = entry
+                if len(self._audits) > 1000:
+                    # Audits whose fresh call never came back are forgotten oldest first
+                    self._audits.pop(next(iter(self._audits)))
+                return None
+            stat["hits"] += 1
+            stat["hit_similarity_sum"] += similarity
+            entry["last_used"] = time.time()
+            return entry["completion"]
+
+    def _nearest(self, agent: str, vector, context: str):
+        store, entries = self._stores.get(agent), self._entries.get(agent, {})
+        if store is None or store.index is None:
+            return None, 0.0
+        now = time.time()
+        # A few candidates, so an expired or other-context neighbour doesn't hide a valid one
+        for entry_id, _, similarity in store.search_with_scores(None, top_k=5, query_vec=vector):
+            entry = entries.get(entry_id)
+            if entry and entry["context"] == context and entry["expires_at"] > now:
+                return entry, similarity
+        return None, 0.0
+
+    def store(self, agent: str, text: str, completion: str, context: str = ""):
+        """Remember `completion` for `text` (and settle a pending audit of the same input)."""
+        if not completion or not completion.strip():
+            return
+        vector = self._embed(text)
+        with self._lock:
+            audited = self._audits.pop((agent, text, context), None)
+        if audited is not None:
+            self._grade_audit(agent, audited, completion)
+
+        now = time.time()
+        with self._lock:
+            store = self._stores.get(agent)
+            if store is None:
+                store = self._stores[agent] = VectorStore(embed_fn=self.embed_fn)
+            entries = self._entries.setdefault(agent, {})
+            entry, similarity = self._nearest(agent, vector, context)
+            if entry is not None and similarity >= 0.999:
+                # Same input again: refresh in place instead of growing the index
+                entry.update(completion=completion, expires_at=now + self.ttl, last_used=now)
+                return
+            entry_id = str(next(self._ids))
+            entries[entry_id] = {
+                "text": text, "completion": completion, "context": context,
+                "created_at": now, "last_used": now, "expires_at": now + self.ttl,
+            }
+            store.add_documents([text], ids=[entry_id], embeddings=[vector])
+            if len(entries) > self.max_entries:
+                self._evict(agent)
+
+    def _grade_audit(self, agent: str, entry: dict, completion: str):
+        vectors = np.asarray(self.embed_fn([entry["completion"], completion]), dtype="float32")
+        agreement = float(np.dot(vectors[0], vectors[1]))
+        with self._lock:
+            if agreement < self.audit_similarity:
+                self._stat(agent)["false_hits"] += 1
+                entry["expires_at"] = 0  # don't serve it again
+                print(f"⚠️ Semantic cache false hit for {agent} (answers {agreement:.2f} similar).")
+
+    def _evict(self, agent: str):
+        """Drop expired entries, then least recently used ones down to 90% of max_entries."""
+        now = time.time()
+        entries = self._entries[agent]
+        alive = sorted((e for e in entries.items() if e[1]["expires_at"] > now), key=lambda e: e[1]["last_used"])
+        keep = dict(alive[-max(1, int(self.max_entries * 0.9)):]) if alive else {}
+        evicted = [entry_id for entry_id in entries if entry_id not in keep]
+        self._stat(agent)["evictions"] += len(evicted)
+        self._entries[agent] = keep
+        self._stores[agent].remove_documents(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._stores.clear()
+            self._entries.clear()
+            self._audits.clear()
+
+    # --- reporting ---
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = {}
+            for agent, stat in self.stats.items():
+                judged = stat["hits"] + stat["audits"]
+                stats[agent] = {
+                    **{k: v for k, v in stat.items() if k != "hit_similarity_sum"},
+                    "entries": len(self._entries.get(agent, {})),
+                    "threshold": self.threshold(agent),
+                    "hit_rate": round(judged / stat["lookups"], 3) if stat["lookups"] else 0.0,
+                    "false_hit_rate": round(stat["false_hits"] / stat["audits"], 3) if stat["audits"] else 0.0,
+                    "avg_hit_similarity": round(stat["hit_similarity_sum"] / stat["hits"], 3) if stat["hits"] else 0.0,
+                }
+            return stats
+
+    def print_report(self):
+        for agent, stat in self.get_stats().items():
+            print(f"🧲 Semantic cache [{agent}]: {stat['hits']}/{stat['lookups']} hits "
+                  f"(threshold {stat['threshold']}, avg similarity {stat['avg_hit_similarity']}), "
+                  f"{stat['false_hits']}/{stat['audits']} audited hits were false, {stat['entries']} entries")
+
+
+_shared_cache = None
+_shared_lock = threading.Lock()
+_disabled = False
+
+
+def get_semantic_cache():
+    """
+    Return the process-wide SemanticCache configured from SEMANTIC_CACHE_*
+    env vars, or None when it is disabled (SEMANTIC_CACHE=0) or FAISS /
+    sentence-transformers are not installed.
+    """
+    global _shared_cache, _disabled
+    if os.getenv("SEMANTIC_CACHE", "1") != "1" or _disabled:
+        return None
+    if _shared_cache is None:
+        with _shared_lock:
+            if _shared_cache is None and not _disabled:
+                try:
+                    embed_fn = get_embedding_service(os.getenv("SEMANTIC_CACHE_MODEL") or None)
+                    embed_fn.load()  # fail here, not inside an agent's lookup
+                    _shared_cache = SemanticCache(
+                        embed_fn,
+                        thresholds=json.loads(os.getenv("SEMANTIC_CACHE_THRESHOLDS", "{}")),
+                        default_threshold=float(os.getenv("SEMANTIC_CACHE_THRESHOLD", DEFAULT_THRESHOLD)),
+                        max_entries=int(os.getenv("SEMANTIC_CACHE_MAX_ENTRIES", "500")),
+                        ttl=float(os.getenv("SEMANTIC_CACHE_TTL", "86400")),
+                        audit_rate=float(os.getenv("SEMANTIC_CACHE_AUDIT_RATE", "0.05")),
+                    )
+                except (ImportError, OSError) as e:
+                    print(f"⚠️ Semantic cache disabled: {e}")
+                    _disabled = True
+    return _shared_cache
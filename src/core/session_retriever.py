@@ -0,0 +1,155 @@
+# src/core/session_retriever.py
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from src.core.prompt_engine import get_prompt_engine, count_tokens
+
+# FAISS and the embedding model are optional: without them retrieval is disabled
+try:
+    from src.vector_store.faiss_index import VectorStore
+except ImportError:
+    VectorStore = None
+from src.vector_store.embedding_service import get_embedding_service
+
+REFERENCE_HEADERS = {
+    "plan": "📚 Plans of similar past projects (reuse what applies, adapt the rest):",
+    "code": "📚 Code from similar past projects (reuse what applies, keep the answer focused):",
+}
+
+
+class SessionRetriever:
+    """
+    Retrieval-augmented context from earlier orchestration runs.
+
+    Every finished run is recorded as one "plan" and one "code" document in
+    a local VectorStore. Each document is prefixed with the idea that
+    produced it, so the idea embedding decides similarity. Before planning
+    and code generation, `references` returns the `top_k` most similar past
+    documents of that kind above `min_similarity`. They are formatted to fit
+    `token_budget` tokens. Results are cached per (idea, kind) until the
+    next run is recorded.
+
+    Args:
+        store: VectorStore the past runs are kept in.
+        top_k (int): Past runs considered per prompt.
+        token_budget (int): Most tokens the references may add to a prompt.
+        min_similarity (float): Cosine similarity a past idea needs to be used.
+        cache_size (int): Ideas whose retrieval results are kept.
+    """
+
+    def __init__(self, store, top_k: int = 3, token_budget: int = 1200, min_similarity: float = 0.55,
+                 cache_size: int = 128):
+        self.store = store
+        self.top_k = top_k
+        self.token_budget = token_budget
+        self.min_similarity = min_similarity
+        self.cache_size = cache_size
+        self.stats = {"lookups": 0, "cache_hits": 0, "references": 0, "recorded": 0}
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _document(idea: str, body: str) -> str:
+        return f"Idea: {idea.strip()}\n\n{body.strip()}"
+
+    def record(self, idea: str, plan, code: str, session_id: str = None):
+        """Store the plan and final code of a finished run."""
+        if isinstance(plan, dict):
+            plan = "\n".join(f"- {task}" for task in plan.get("tasks", []))
+        documents, metadata = [], []
+        for kind, body in (("plan", plan), ("code", code)):
+            if body and str(body).strip():
+                documents.append(self._document(idea, str(body)))
+                metadata.append({"kind": kind, "idea": idea.strip(), "session_id": session_id,
+                                 "timestamp": time.time()})
+        if not documents:
+            return
+        with self._lock:
+            self.store.add_documents(documents, metadata=metadata)
+            self._cache.clear()  # new runs can change what is most similar
+            self.stats["recorded"] += 1
+
+    def retrieve(self, idea: str, kind: str) -> list:
+        """Past documents of `kind` ("plan" or "code") similar to `idea`, best first."""
+        key = (" ".join(idea.lower().split()), kind)
+        with self._lock:
+            self.stats["lookups"] += 1
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                self.stats["cache_hits"] += 1
+                return self._cache[key]
+            hits = self.store.search_batch([self._document(idea, "")], top_k=self.top_k, filter={"kind": kind})[0]
+            hits = [hit for hit in hits if hit.score >= self.min_similarity]
+            self._cache[key] = hits
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return hits
+
+    def references(self, idea: str, kind: str, token_budget: int = None) -> str:
+        """
+        Retrieved documents formatted as a prompt section of at most
+        `token_budget` tokens, or "" when nothing similar enough exists.
+        The closest run comes first; a document that does not fit whole is
+        trimmed, and later ones are dropped.
+        """
+        if not isinstance(idea, str) or not idea.strip():
+            return ""
+        budget = token_budget or self.token_budget
+        header = REFERENCE_HEADERS[kind]
+        remaining = budget - count_tokens(header)
+        sections = []
+        for n, hit in enumerate(self.retrieve(idea, kind), start=1):
+            section = f"### Past project {n} (similarity {hit.score:.2f})\n{hit.text}"
+            cost = count_tokens(section)
+            if cost > remaining:
+                if remaining > 100:
+                    sections.append(get_prompt_engine().trim(section, remaining))
+                break
+            sections.append(section)
+            remaining -= cost
+        if not sections:
+            return ""
+        with self._lock:
+            self.stats["references"] += len(sections)
+        return header + "\n\n" + "\n\n".join(sections)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(self.stats)
+
+
+_shared_retriever = None
+_shared_lock = threading.Lock()
+_disabled = False
+
+
+def get_session_retriever():
+    """
+    Return the process-wide SessionRetriever configured from RAG_* env vars,
+    or None when it is disabled (RAG_ENABLED=0) or FAISS /
+    sentence-transformers are not installed.
+    """
+    global _shared_retriever, _disabled
+    if os.getenv("RAG_ENABLED", "1") != "1" or _disabled:
+        return None
+    if _shared_retriever is None:
+        with _shared_lock:
+            if _shared_retriever is None and not _disabled:
+                try:
+                    if VectorStore is None:
+                        raise ImportError("faiss is not installed.")
+                    embed_fn = get_embedding_service(os.getenv("RAG_MODEL") or None)
+                    embed_fn.load()  # fail here, not inside a planning call
+                    _shared_retriever = SessionRetriever(
+                        VectorStore(embed_fn=embed_fn, path=os.getenv("RAG_STORE_PATH", ".cache/past_sessions")),
+                        top_k=int(os.getenv("RAG_TOP_K", "3")),
+                        token_budget=int(os.getenv("RAG_TOKEN_BUDGET", "1200")),
+                        min_similarity=float(os.getenv("RAG_MIN_SIMILARITY", "0.55")),
+                    )
+                except (ImportError, OSError) as e:
+                    print(f"⚠️ Retrieval of past sessions disabled: {e}")
+                    _disabled = True
+    return _shared_retriever
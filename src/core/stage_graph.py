@@ -0,0 +1,193 @@
+# src/core/stage_graph.py
+
+import contextvars
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+from src.utils.time_utils import Timer
+
+
+class StageError(Exception):
+    """Raised when a stage fails; the original error is chained as __cause__."""
+
+    def __init__(self, stage: str, message: str):
+        super().__init__(f"Stage `{stage}` {message}")
+        self.stage = stage
+
+
+class StageTimeoutError(StageError):
+    pass
+
+
+class Stage:
+    """
+    One node of a StageGraph.
+
+    Args:
+        name (str): Unique stage name.
+        func (callable): Called with each input as a keyword argument.
+        inputs (list): Names of values the stage needs.
+        outputs (list): Names of values the stage produces. With a single
+            output the return value is stored as-is, with several outputs
+            `func` must return a tuple in the same order.
+        timeout (float): Seconds before the stage is considered hung.
+        label (str): Human readable name used for timing logs.
+    """
+
+    def __init__(self, name, func, inputs=(), outputs=(), timeout=None, label=None):
+        self.name = name
+        self.func = func
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.timeout = timeout
+        self.label = label or name
+
+    def run(self, values: dict):
+        with Timer(self.label):
+            result = self.func(**{key: values[key] for key in self.inputs})
+        if len(self.outputs) == 0:
+            return {}
+        if len(self.outputs) == 1:
+            return {self.outputs[0]: result}
+        return dict(zip(self.outputs, result))
+
+
+class StageGraph:
+    """
+    Runs stages as soon as their inputs are available, in parallel up to
+    `max_concurrency`, and records per-stage timings for critical path analysis.
+
+    Usage:
+        graph = StageGraph([
+            Stage("code", write, inputs=["plan"], outputs=["code"]),
+            Stage("docs", document, inputs=["code"], outputs=["docs"]),
+            Stage("docker", dockerize, inputs=["code"], outputs=["dockerfile"]),
+        ], max_concurrency=4)
+        values = graph.run({"plan": plan})
+        graph.print_report()
+    """
+
+    def __init__(self, stages: list, max_concurrency: int = 4):
+        self.stages = {}
+        self.producers = {}
+        for stage in stages:
+            if stage.name in self.stages:
+                raise ValueError(f"Duplicate stage name: {stage.name}")
+            self.stages[stage.name] = stage
+            for output in stage.outputs:
+                if output in self.producers:
+                    raise ValueError(f"Output `{output}` produced by both `{self.producers[output]}` and `{stage.name}`")
+                self.producers[output] = stage.name
+        self.max_concurrency = max(1, max_concurrency)
+        self.timings = {}
+        self._check_acyclic()
+
+    def dependencies(self, name: str) -> list:
+        """Names of the stages whose outputs `name` consumes."""
+        return sorted({self.producers[i] for i in self.stages[name].inputs if i in self.producers})
+
+    def _check_acyclic(self):
+        visiting, done = set(), set()
+
+        def visit(name):
+            if name in done:
+                return
+            if name in visiting:
+                raise ValueError(f"Stage graph has a cycle through `{name}`")
+            visiting.add(name)
+            for dep in self.dependencies(name):
+                visit(dep)
+            visiting.discard(name)
+            done.add(name)
+
+        for name in self.stages:
+            visit(name)
+
+    def run(self, initial: dict = None) -> dict:
+        """
+        Execute the graph and return every produced value (plus `initial`).
+        Raises StageError/StageTimeoutError on the first failing stage.
+        """
+        values = dict(initial or {})
+        missing = {
+            i for stage in self.stages.values() for i in stage.inputs
+            if i not in values and i not in self.producers
+        }
+        if missing:
+            raise ValueError(f"No initial value or producing stage for: {sorted(missing)}")
+
+        self.timings = {}
+        pending = dict(self.stages)
+        running = {}
+        run_start = time.perf_counter()
+        pool = ThreadPoolExecutor(max_workers=self.max_concurrency)
+
+        try:
+            while pending or running:
+                ready = [s for s in pending.values() if all(i in values for i in s.inputs)]
+                for stage in ready:
+                    if len(running) >= self.max_concurrency:
+                        break
+                    del pending[stage.name]
+                    # Copy the caller's context so settings such as llm_priority reach the stage
+                    future = pool.submit(contextvars.copy_context().run, stage.run, dict(values))
+                    running[future] = (stage, time.perf_counter())
+
+                if not running:
+                    raise ValueError(f"Stages can never run: {sorted(pending)}")
+
+                done, _ = wait(list(running), timeout=self._next_deadline(running), return_when=FIRST_COMPLETED)
+
+                now = time.perf_counter()
+                for future in done:
+                    stage, started = running.pop(future)
+                    self.timings[stage.name] = (started - run_start, now - run_start)
+                    try:
+                        values.update(future.result())
+                    except Exception as e:
+                        raise StageError(stage.name, f"failed: {e}") from e
+
+                for future, (stage, started) in running.items():
+                    if stage.timeout is not None and now - started > stage.timeout:
+                        raise StageTimeoutError(stage.name, f"timed out after {stage.timeout}s")
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+        return values
+
+    @staticmethod
+    def _next_deadline(running: dict):
+        deadlines = [
+            started + stage.timeout - time.perf_counter()
+            for stage, started in running.values() if stage.timeout is not None
+        ]
+        return max(0.0, min(deadlines)) if deadlines else None
+
+    def critical_path(self) -> list:
+        """
+        Chain of stages that determined end-to-end latency of the last run:
+        starting from the stage that finished last, repeatedly step back to
+        the dependency that finished last.
+        """
+        if not self.timings:
+            return []
+        current = max(self.timings, key=lambda name: self.timings[name][1])
+        path = [current]
+        while True:
+            deps = [d for d in self.dependencies(current) if d in self.timings]
+            if not deps:
+                break
+            current = max(deps, key=lambda name: self.timings[name][1])
+            path.append(current)
+        return list(reversed(path))
+
+    def print_report(self):
+        path = self.critical_path()
+        if not path:
+            return
+        total = self.timings[path[-1]][1]
+        busy = sum(end - start for start, end in self.timings.values())
+        print(f"\n🧭 Critical path ({total:.2f}s wall, {busy:.2f}s summed stage time):")
+        for name in path:
+            start, end = self.timings[name]
+            print(f"   → {self.stages[name].label}: {end - start:.2f}s (t+{start:.2f}s)")
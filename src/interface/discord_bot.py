@@ -8,11 +8,12 @@ from dotenv import load_dotenv
 # ✅ Setup path to import your project modules
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
-from src.agents.planner_agent import generate_plan
-from src.agents.writer_agent import write_code
-from src.agents.test_agent import generate_tests
-from src.agents.doc_agent import generate_readme_and_gitignore
-from src.agents.docker_agent import generate_dockerfile
+from src.agents.planner_agent import agenerate_plan
+from src.agents.writer_agent import awrite_code
+from src.agents.test_agent import agenerate_tests
+from src.agents.doc_agent import agenerate_readme_and_gitignore
+from src.agents.docker_agent import agenerate_dockerfile
+from src.core.rate_limiter import llm_priority
 
 # ✅ Load Discord bot token from .env
 load_dotenv()
@@ -35,34 +36,38 @@ async def on_message(message):
 
     user_input = message.content.strip()
 
+    with llm_priority("interactive"):
+        await handle_command(message, user_input)
+
+async def handle_command(message, user_input):
     if user_input.startswith("!plan"):
         idea = user_input[6:]
         await message.channel.send("🧠 Generating project plan...")
-        plan = generate_plan(idea)
+        plan = await agenerate_plan(idea)
         await message.channel.send(f"📋 Plan:\n{plan}")
 
     elif user_input.startswith("!write"):
         idea = user_input[7:]
         await message.channel.send("✍️ Writing code...")
-        result = write_code(idea)
+        result = await awrite_code(idea)
         await message.channel.send(f"📦 Code:\n```python\n{result}\n```")
 
     elif user_input.startswith("!test"):
         idea = user_input[6:]
         await message.channel.send("🧪 Generating tests...")
-        result = generate_tests(idea)
+        result = await agenerate_tests(idea)
         await message.channel.send(f"🧾 Tests:\n```python\n{result}\n```")
 
     elif user_input.startswith("!docs"):
         idea = user_input[6:]
         await message.channel.send("📄 Creating README and .gitignore...")
-        docs = generate_readme_and_gitignore(idea)
+        docs = await agenerate_readme_and_gitignore(idea)
         await message.channel.send(f"📘 README:\n{docs['README.md']}\n\n🚫 .gitignore:\n{docs['.gitignore']}")
 
     elif user_input.startswith("!docker"):
         idea = user_input[8:]
         await message.channel.send("🐳 Creating Dockerfile...")
-        dockerfile = generate_dockerfile(idea)
+        dockerfile = await agenerate_dockerfile(idea)
         await message.channel.send(f"🐋 Dockerfile:\n```Dockerfile\n{dockerfile}\n```")
 
     elif user_input.startswith("!help"):
@@ -2,9 +2,12 @@
 
 import os
 import sys
+import json
+import asyncio
 import logging
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
 from typing import Optional
 
@@ -12,11 +15,13 @@ from typing import Optional
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
 # Import custom AI agents
-from src.agents.planner_agent import generate_plan
-from src.agents.writer_agent import write_code
-from src.agents.test_agent import generate_tests_for
-from src.agents.doc_agent import generate_readme_and_gitignore
-from src.agents.docker_agent import generate_dockerfile
+from src.agents.planner_agent import agenerate_plan, astream_plan, structure_plan
+from src.agents.writer_agent import awrite_code, astream_write_code
+from src.agents.test_agent import agenerate_tests_for, astream_tests_for
+from src.agents.doc_agent import agenerate_readme_and_gitignore, astream_readme_and_gitignore
+from src.agents.docker_agent import agenerate_dockerfile, astream_dockerfile
+from src.core.rate_limiter import llm_priority
+from src.core.semantic_cache import get_semantic_cache
 
 # Initialize FastAPI app
 app = FastAPI(
@@ -34,6 +39,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# API users are waiting on the response: serve their LLM calls ahead of batch work
+@app.middleware("http")
+async def interactive_priority(request, call_next):
+    with llm_priority("interactive"):
+        return await call_next(request)
+
 # Input schema
 class ProjectRequest(BaseModel):
     idea: str
@@ -45,6 +56,12 @@ class ProjectRequest(BaseModel):
 def root():
     return {"message": "✅ AutoCode-GPT-X backend is running!"}
 
+# Semantic cache hit / false-hit rates per agent, for tuning SEMANTIC_CACHE_THRESHOLDS
+@app.get("/cache/semantic/")
+def semantic_cache_stats():
+    cache = get_semantic_cache()
+    return {"enabled": cache is not None, "agents": cache.get_stats() if cache else {}}
+
 # --- Helper function for fallback ---
 def fallback_plan(idea: str):
     return {
@@ -64,62 +81,201 @@ def fallback_docs():
 def fallback_docker():
     return "# Fallback Dockerfile\nFROM python:3.9-slim"
 
-# --- Plan endpoint ---
-@app.post("/plan/")
-def plan_code(req: ProjectRequest):
-    if not req.idea.strip():
-        raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+# --- Agent runners (shared by the single routes and /generate/) ---
+# Plan and write calls are hedged: a slow Groq answer is raced against a duplicate request
+async def run_plan(req: ProjectRequest) -> dict:
     try:
-        plan = generate_plan(req.idea, temperature=req.temperature, model=req.model)
+        plan = await agenerate_plan(req.idea, temperature=req.temperature, model=req.model, hedge="plan")
         return {"success": True, "plan": plan}
     except Exception as e:
         logging.exception("Planning failed")
         return {"success": False, "plan": fallback_plan(req.idea), "error": str(e)}
 
-# --- Write code endpoint ---
-@app.post("/write/")
-def write_code_endpoint(req: ProjectRequest):
-    if not req.idea.strip():
-        raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+async def run_write(req: ProjectRequest) -> dict:
     try:
-        code = write_code(req.idea)
+        code = await awrite_code(req.idea, hedge="write")
         return {"success": True, "code": code}
     except Exception as e:
         logging.exception("Code generation failed")
         return {"success": False, "code": fallback_code(), "error": str(e)}
 
-# --- Test generation endpoint ---
-@app.post("/test/")
-def generate_tests_endpoint(req: ProjectRequest):
-    if not req.idea.strip():
-        raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+async def run_test(req: ProjectRequest) -> dict:
     try:
-        tests = generate_tests_for(req.idea)
+        tests = await agenerate_tests_for(req.idea)
         return {"success": True, "tests": tests}
     except Exception as e:
         logging.exception("Test generation failed")
         return {"success": False, "tests": fallback_tests(), "error": str(e)}
 
-# --- Documentation endpoint ---
-@app.post("/docs/")
-def docs_endpoint(req: ProjectRequest):
-    if not req.idea.strip():
-        raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+async def run_docs(req: ProjectRequest) -> dict:
     try:
-        docs = generate_readme_and_gitignore(req.idea)
+        docs = await agenerate_readme_and_gitignore(req.idea)
         return {"success": True, "docs": docs}
     except Exception as e:
         logging.exception("Documentation generation failed")
         return {"success": False, "docs": fallback_docs(), "error": str(e)}
 
-# --- Dockerfile endpoint ---
-@app.post("/docker/")
-def dockerfile_endpoint(req: ProjectRequest):
-    if not req.idea.strip():
-        raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+async def run_docker(req: ProjectRequest) -> dict:
     try:
-        dockerfile = generate_dockerfile(req.idea)
+        dockerfile = await agenerate_dockerfile(req.idea)
         return {"success": True, "docker": dockerfile}
     except Exception as e:
         logging.exception("Dockerfile generation failed")
         return {"success": False, "docker": fallback_docker(), "error": str(e)}
+
+AGENT_RUNNERS = {
+    "plan": run_plan,
+    "write": run_write,
+    "test": run_test,
+    "docs": run_docs,
+    "docker": run_docker,
+}
+
+def validate_request(req: ProjectRequest):
+    if not req.idea.strip():
+        raise HTTPException(status_code=400, detail="Prompt cannot be empty")
+
+# --- Plan endpoint ---
+@app.post("/plan/")
+async def plan_code(req: ProjectRequest):
+    validate_request(req)
+    return await run_plan(req)
+
+# --- Write code endpoint ---
+@app.post("/write/")
+async def write_code_endpoint(req: ProjectRequest):
+    validate_request(req)
+    return await run_write(req)
+
+# --- Test generation endpoint ---
+@app.post("/test/")
+async def generate_tests_endpoint(req: ProjectRequest):
+    validate_request(req)
+    return await run_test(req)
+
+# --- Documentation endpoint ---
+@app.post("/docs/")
+async def docs_endpoint(req: ProjectRequest):
+    validate_request(req)
+    return await run_docs(req)
+
+# --- Dockerfile endpoint ---
+@app.post("/docker/")
+async def dockerfile_endpoint(req: ProjectRequest):
+    validate_request(req)
+    return await run_docker(req)
+
+# --- Combined endpoint: every agent for one idea, run concurrently ---
+@app.post("/generate/")
+async def generate_endpoint(req: ProjectRequest):
+    validate_request(req)
+    names = list(AGENT_RUNNERS)
+    results = await asyncio.gather(*(AGENT_RUNNERS[name](req) for name in names))
+    return dict(zip(names, results))
+
+# --- Server-sent event (streaming) endpoints ---
+# Single-agent routes emit `data: {"delta": ...}` events while the model
+# generates, then a final `event: done` whose data matches the JSON of the
+# non-streaming route.
+
+def sse_event(data: dict, event: str = None) -> str:
+    prefix = f"event: {event}\n" if event else ""
+    return f"{prefix}data: {json.dumps(data)}\n\n"
+
+def sse_response(events):
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+async def agent_events(stage: str, key: str, deltas, fallback, finish=lambda text: text):
+    """Yield ("delta", text) while the agent streams, then ("done", response_json)."""
+    parts = []
+    try:
+        async for delta in deltas:
+            parts.append(delta)
+            yield "delta", delta
+        yield "done", {"success": True, key: finish("".join(parts))}
+    except Exception as e:
+        logging.exception(f"{stage} failed")
+        yield "done", {"success": False, key: fallback(), "error": str(e)}
+
+AGENT_STREAMS = {
+    "plan": lambda req: agent_events(
+        "Planning", "plan",
+        astream_plan(req.idea, temperature=req.temperature, model=req.model),
+        fallback=lambda: fallback_plan(req.idea),
+        finish=lambda text: structure_plan(req.idea, text, req.model),
+    ),
+    "write": lambda req: agent_events("Code generation", "code", astream_write_code(req.idea), fallback_code),
+    "test": lambda req: agent_events("Test generation", "tests", astream_tests_for(req.idea), fallback_tests),
+    "docs": lambda req: agent_events("Documentation generation", "docs", astream_readme_and_gitignore(req.idea), fallback_docs),
+    "docker": lambda req: agent_events(
+        "Dockerfile generation", "docker", astream_dockerfile(req.idea), fallback_docker, finish=str.strip
+    ),
+}
+
+async def single_agent_sse(events):
+    async for kind, data in events:
+        if kind == "delta":
+            yield sse_event({"delta": data})
+        else:
+            yield sse_event(data, event="done")
+
+@app.post("/plan/stream/")
+async def plan_stream(req: ProjectRequest):
+    validate_request(req)
+    return sse_response(single_agent_sse(AGENT_STREAMS["plan"](req)))
+
+@app.post("/write/stream/")
+async def write_stream(req: ProjectRequest):
+    validate_request(req)
+    return sse_response(single_agent_sse(AGENT_STREAMS["write"](req)))
+
+@app.post("/test/stream/")
+async def test_stream(req: ProjectRequest):
+    validate_request(req)
+    return sse_response(single_agent_sse(AGENT_STREAMS["test"](req)))
+
+@app.post("/docs/stream/")
+async def docs_stream(req: ProjectRequest):
+    validate_request(req)
+    return sse_response(single_agent_sse(AGENT_STREAMS["docs"](req)))
+
+@app.post("/docker/stream/")
+async def docker_stream(req: ProjectRequest):
+    validate_request(req)
+    return sse_response(single_agent_sse(AGENT_STREAMS["docker"](req)))
+
+async def generate_sse(req: ProjectRequest):
+    """
+    Run every agent stream concurrently and interleave their events:
+    `data: {"endpoint", "delta"}` while generating, `event: result` with the
+    agent's final JSON as each one finishes, then `event: done` with all results.
+    """
+    queue = asyncio.Queue()
+
+    async def pump(name):
+        async for kind, data in AGENT_STREAMS[name](req):
+            await queue.put((name, kind, data))
+
+    tasks = [asyncio.create_task(pump(name)) for name in AGENT_STREAMS]
+    results = {}
+    try:
+        while len(results) < len(tasks):
+            name, kind, data = await queue.get()
+            if kind == "delta":
+                yield sse_event({"endpoint": name, "delta": data})
+            else:
+                results[name] = data
+                yield sse_event({"endpoint": name, **data}, event="result")
+        yield sse_event(results, event="done")
+    finally:
+        for task in tasks:
+            task.cancel()
+
+@app.post("/generate/stream/")
+async def generate_stream(req: ProjectRequest):
+    validate_request(req)
+    return sse_response(generate_sse(req))
@@ -2,6 +2,7 @@
 
 import os
 import sys
+import json
 import requests
 import streamlit as st
 from dotenv import load_dotenv
@@ -164,72 +165,106 @@ with st.sidebar:
 
 payload = {"idea": idea, "project_type": project_type, "instructions": custom_prompt, "temperature": temperature, "model": model}
 
+# ------------------------- 🔌 Streaming helpers -------------------------
+def stream_generate(body: dict, on_delta, on_result) -> dict:
+    """
+    POST once to /generate/stream/, which runs every agent concurrently on
+    the server. Calls on_delta(endpoint, text_so_far) as chunks arrive and
+    on_result(endpoint, json) as each agent finishes. Returns all results.
+    """
+    texts, results, event = {}, {}, None
+    with requests.post(f"{BACKEND_URL}/generate/stream/", json=body, stream=True) as res:
+        res.raise_for_status()
+        for line in res.iter_lines(decode_unicode=True):
+            if line.startswith("event:"):
+                event = line[len("event:"):].strip()
+            elif line.startswith("data:"):
+                data = json.loads(line[len("data:"):])
+                if event == "done":
+                    return data
+                endpoint = data.pop("endpoint")
+                if event == "result":
+                    results[endpoint] = data
+                    on_result(endpoint, data)
+                else:
+                    texts[endpoint] = texts.get(endpoint, "") + data["delta"]
+                    on_delta(endpoint, texts[endpoint])
+            elif not line:
+                event = None
+    return results
+
+def render_card(placeholder, text: str):
+    placeholder.markdown(f"<div class='card'><pre>{text}</pre></div>", unsafe_allow_html=True)
+
+def render_plan(placeholder, plan_result):
+    plan_text = ""
+    if isinstance(plan_result, dict):
+        if "plan" in plan_result and isinstance(plan_result["plan"], dict):
+            plan_text = "\n".join(f"{k}: {v}" for k, v in plan_result["plan"].items())
+        else:
+            plan_text = plan_result.get("plan") or plan_result.get("tasks") or ""
+    elif isinstance(plan_result, list):
+        plan_text = "\n".join(str(item) for item in plan_result)
+    else:
+        plan_text = str(plan_result)
+
+    with placeholder.container():
+        if not plan_text.strip():
+            st.warning("❌ Failed to generate plan.")
+        else:
+            st.markdown("### 🚀 Roadmap")
+            for idx, line in enumerate(plan_text.split("\n")):
+                if line.strip():
+                    st.markdown(f"**Step {idx+1}:** {line.strip()}")
+
 # ------------------------- ⚡ Main Panel -------------------------
+PANELS = {
+    "plan": ("🧭 Project Plan", None, None),
+    "write": ("🧾 Generated Code (main.py)", "code", "# ❌ No code returned"),
+    "test": ("🧪 Unit Tests", "tests", "# ❌ No tests returned"),
+    "docs": ("📄 Documentation", "docs", "❌ No documentation returned."),
+    "docker": ("🐳 Dockerfile", "docker", "❌ No Dockerfile returned."),
+}
+
 if run_button:
     if not idea.strip():
         st.warning("⚠️ Please enter a valid project idea.")
     else:
-        with st.spinner("🤔 Agent is generating your project..."):
-            results = {}
-            endpoints = ["plan", "write", "test", "docs", "docker"]
-            for endpoint in endpoints:
-                try:
-                    res = requests.post(f"{BACKEND_URL}/{endpoint}/", json=payload)
-                    res.raise_for_status()
-                    results[endpoint] = res.json()
-                except Exception as e:
-                    results[endpoint] = {"success": False, "error": str(e)}
-
-        st.success("✅ Project Generated Successfully!")
-
         # Tabs
         tabs = st.tabs(["🧭 Plan", "🧾 Code", "🧪 Tests", "📄 Docs", "🐳 Docker", "📦 Raw JSON"])
 
-        # --- Project Plan ---
-        with tabs[0]:
-            st.subheader("🧭 Project Plan")
-            plan_result = results.get("plan", {})
-            plan_text = ""
-            if isinstance(plan_result, dict):
-                if "plan" in plan_result and isinstance(plan_result["plan"], dict):
-                    plan_text = "\n".join(f"{k}: {v}" for k, v in plan_result["plan"].items())
-                else:
-                    plan_text = plan_result.get("plan") or plan_result.get("tasks") or ""
-            elif isinstance(plan_result, list):
-                plan_text = "\n".join(str(item) for item in plan_result)
-            else:
-                plan_text = str(plan_result)
-            if not plan_text.strip():
-                st.warning("❌ Failed to generate plan.")
+        placeholders = {}
+        for tab, (endpoint, (title, _, _)) in zip(tabs, PANELS.items()):
+            with tab:
+                st.subheader(title)
+                placeholders[endpoint] = st.empty()
+
+        results = {}
+
+        def render_result(endpoint, result):
+            results[endpoint] = result
+            _, key, empty_text = PANELS[endpoint]
+            if endpoint == "plan":
+                render_plan(placeholders[endpoint], result)
             else:
-                st.markdown("### 🚀 Roadmap")
-                for idx, line in enumerate(plan_text.split("\n")):
-                    if line.strip():
-                        st.markdown(f"**Step {idx+1}:** {line.strip()}")
-
-        # --- Code ---
-        with tabs[1]:
-            st.subheader("🧾 Generated Code (main.py)")
-            code_text = results.get("write", {}).get("code") or "# ❌ No code returned"
-            st.markdown(f"<div class='card'><pre>{code_text}</pre></div>", unsafe_allow_html=True)
-
-        # --- Tests ---
-        with tabs[2]:
-            st.subheader("🧪 Unit Tests")
-            test_text = results.get("test", {}).get("tests") or "# ❌ No tests returned"
-            st.markdown(f"<div class='card'><pre>{test_text}</pre></div>", unsafe_allow_html=True)
-
-        # --- Docs ---
-        with tabs[3]:
-            st.subheader("📄 Documentation")
-            docs_text = results.get("docs", {}).get("docs") or "❌ No documentation returned."
-            st.markdown(f"<div class='card'><pre>{docs_text}</pre></div>", unsafe_allow_html=True)
-
-        # --- Docker ---
-        with tabs[4]:
-            st.subheader("🐳 Dockerfile")
-            docker_text = results.get("docker", {}).get("docker") or "❌ No Dockerfile returned."
-            st.markdown(f"<div class='card'><pre>{docker_text}</pre></div>", unsafe_allow_html=True)
+                render_card(placeholders[endpoint], result.get(key) or empty_text)
+
+        # One request for all agents; panels fill in token by token as they stream
+        with st.spinner("🤔 Agent is generating your project..."):
+            error = "No result returned."
+            try:
+                stream_generate(
+                    payload,
+                    on_delta=lambda endpoint, text: render_card(placeholders[endpoint], text),
+                    on_result=render_result,
+                )
+            except Exception as e:
+                error = str(e)
+            for endpoint in PANELS:
+                if endpoint not in results:
+                    render_result(endpoint, {"success": False, "error": error})
+
+        st.success("✅ Project Generated Successfully!")
 
         # --- Raw JSON ---
         with tabs[5]:
@@ -8,6 +8,12 @@ class TokenTracker:
         self.total_tokens = 0
         self.total_cost = 0.0
         self.history = []
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.tokens_saved = 0
+        self.cost_saved = 0.0
+        self.hedges_fired = 0
+        self.hedge_wins = 0
 
     def log_usage(self, tokens: int, cost_per_1k_tokens: float = 0.002, model: str = "llama3-70b-8192"):
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
@@ -24,16 +30,45 @@ class TokenTracker:
         self.history.append(entry)
         print(f"📊 Token Tracker → +{tokens} tokens | Cost: ${round(cost, 4)} | Model: {model}")
 
+    def log_cache_hit(self, tokens_saved: int, cost_per_1k_tokens: float = 0.002):
+        self.cache_hits += 1
+        self.tokens_saved += tokens_saved
+        self.cost_saved += (tokens_saved / 1000) * cost_per_1k_tokens
+        print(f"📊 Token Tracker → cache hit | Saved {tokens_saved} tokens | Hit rate: {self.cache_hit_rate():.0%}")
+
+    def log_cache_miss(self):
+        self.cache_misses += 1
+
+    def cache_hit_rate(self) -> float:
+        lookups = self.cache_hits + self.cache_misses
+        return self.cache_hits / lookups if lookups else 0.0
+
+    def log_hedge(self, won: bool):
+        self.hedges_fired += 1
+        self.hedge_wins += int(won)
+        outcome = "hedge won" if won else "primary won"
+        print(f"📊 Token Tracker → hedged request ({outcome}) | Hedge wins: {self.hedge_wins}/{self.hedges_fired}")
+
     def get_summary(self):
         return {
             "total_tokens": self.total_tokens,
             "total_cost": round(self.total_cost, 4),
+            "cache": {
+                "hits": self.cache_hits,
+                "misses": self.cache_misses,
+                "hit_rate": round(self.cache_hit_rate(), 4),
+                "tokens_saved": self.tokens_saved,
+                "cost_saved": round(self.cost_saved, 4)
+            },
+            "hedging": {
+                "fired": self.hedges_fired,
+                "wins": self.hedge_wins,
+                "win_rate": round(self.hedge_wins / self.hedges_fired, 4) if self.hedges_fired else 0.0
+            },
             "history": self.history
         }
 
     def reset(self):
-        self.total_tokens = 0
-        self.total_cost = 0.0
-        self.history = []
+        self.__init__()
 
 
@@ -0,0 +1,266 @@
+# src/vector_store/code_indexer.py
+
+import os
+import sys
+import ast
+import json
+import argparse
+import hashlib
+import threading
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.codegen.structure_builder import IGNORE_FOLDERS, IGNORE_FILES
+from src.core.code_chunker import CodeChunk, split_code
+from src.core.prompt_engine import count_tokens
+from src.vector_store.faiss_index import VectorStore, document_id
+
+MANIFEST_FILE = "code_manifest.json"
+
+
+class DefinitionChunk(CodeChunk):
+    """A CodeChunk holding one function, method or class, with its kind and docstring."""
+
+    def __init__(self, name: str, start_line: int, end_line: int, source: str, kind: str, docstring: str = None):
+        super().__init__(name, start_line, end_line, source)
+        self.kind = kind
+        self.docstring = docstring
+
+
+def _span(node) -> tuple:
+    """First line including decorators, last line."""
+    return min([node.lineno] + [d.lineno for d in getattr(node, "decorator_list", [])]), node.end_lineno
+
+
+def _text(lines: list, start: int, end: int) -> str:
+    return "\n".join(lines[start - 1:end])
+
+
+def _class_outline(lines: list, node) -> str:
+    """Class signature, docstring and attributes, with methods reduced to their `def` line."""
+    start, _ = _span(node)
+    parts = [_text(lines, start, node.body[0].lineno - 1)] if node.body[0].lineno > node.lineno else [lines[node.lineno - 1]]
+    for child in node.body:
+        child_start, child_end = _span(child)
+        if isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            parts.append(_text(lines, child_start, child.lineno) + " ...")
+        else:
+            parts.append(_text(lines, child_start, child_end))
+    return "\n".join(parts)
+
+
+def _definitions(lines: list, body: list, prefix: str, max_tokens: int, in_class: bool) -> list:
+    chunks = []
+    for node in body:
+        if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef)):
+            continue
+        name = f"{prefix}{node.name}"
+        start, end = _span(node)
+        source = _text(lines, start, end)
+        docstring = ast.get_docstring(node)
+        if isinstance(node, ast.ClassDef):
+            if count_tokens(source) <= max_tokens:
+                chunks.append(DefinitionChunk(name, start, end, source, "class", docstring))
+            else:
+                # Too big for one chunk: an outline of the class, then each method on its own
+                chunks.append(DefinitionChunk(name, start, end, _class_outline(lines, node), "class", docstring))
+                chunks.extend(_definitions(lines, node.body, f"{name}.", max_tokens, True))
+        else:
+            # Nested functions stay inside their parent; an oversized function is kept whole
+            chunks.append(DefinitionChunk(name, start, end, source, "method" if in_class else "function", docstring))
+    return chunks
+
+
+def extract_definitions(code: str, max_tokens: int = 1500) -> list:
+    """
+    Split Python source into DefinitionChunks: one per top-level function
+    and class, with qualified names (`Class.method`) for the methods of
+    classes larger than `max_tokens`. Constants and other module-level code
+    form one "module" chunk, imports included. Code that does not parse
+    falls back to code_chunker's line-based split.
+    """
+    lines = code.splitlines()
+    if not lines:
+        return []
+    try:
+        tree = ast.parse(code)
+    except SyntaxError:
+        return [DefinitionChunk(c.name, c.start_line, c.end_line, c.source, "lines")
+                for c in split_code(code, max_tokens)]
+
+    chunks = _definitions(lines, tree.body, "", max_tokens, False)
+    module_code = [node for node in tree.body
+                   if not isinstance(node, (ast.FunctionDef, ast.AsyncFunctionDef, ast.ClassDef))]
+    # A module that only imports things has nothing worth retrieving
+    if any(not isinstance(node, (ast.Import, ast.ImportFrom)) for node in module_code):
+        source = "\n".join(_text(lines, *_span(node)) for node in module_code)
+        chunks.insert(0, DefinitionChunk("<module>", module_code[0].lineno, module_code[-1].end_lineno,
+                                         source, "module", ast.get_docstring(tree)))
+    return chunks
+
+
+def iter_python_files(root_dir: str):
+    """Python files under `root_dir` in a stable order, skipping what structure_builder ignores."""
+    for root, dirs, files in os.walk(root_dir):
+        dirs[:] = sorted(d for d in dirs if d not in IGNORE_FOLDERS)
+        for file in sorted(files):
+            if file not in IGNORE_FILES and file.endswith(".py"):
+                yield os.path.join(root, file)
+
+
+class CodeIndexer:
+    """
+    Indexes Python projects into a VectorStore at function/class level.
+
+    Each definition becomes one document, headed by its project-relative
+    path and qualified name, with its kind, name, line span, docstring
+    summary and project as metadata. A document's ID is the hash of that
+    text. Re-indexing therefore only embeds definitions whose code changed.
+    A definition that merely moved gets new line numbers without being
+    re-embedded. A manifest of file hashes lets unchanged files be skipped
+    without parsing, and the chunks of edited or deleted files are removed.
+
+    Args:
+        store (VectorStore): Where chunks are stored; its path also holds the manifest.
+        max_tokens (int): Classes above this size are indexed method by method.
+        batch_size (int): Chunks handed to the store (and embedded) per call.
+    """
+
+    def __init__(self, store, max_tokens: int = 1500, batch_size: int = 256):
+        self.store = store
+        self.max_tokens = max_tokens
+        self.batch_size = batch_size
+        self.manifest_path = os.path.join(store.path, MANIFEST_FILE) if store.path else None
+        self._lock = threading.Lock()
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                self.manifest = json.load(f)
+        except (TypeError, OSError, ValueError):
+            self.manifest = {}
+
+    @staticmethod
+    def chunk_document(project: str, rel_path: str, chunk: DefinitionChunk) -> str:
+        # No line numbers in the text: moving a definition must not change its ID
+        return f"# {project}/{rel_path} · {chunk.kind} {chunk.name}\n{chunk.source}"
+
+    @staticmethod
+    def chunk_metadata(project: str, rel_path: str, chunk: DefinitionChunk) -> dict:
+        summary = (chunk.docstring or "").strip().split("\n")[0][:200]
+        return {"source": rel_path, "project": project, "agent": "code_indexer", "type": chunk.kind,
+                "name": chunk.name, "start_line": chunk.start_line, "end_line": chunk.end_line, "docstring": summary}
+
+    def index(self, root_dir: str, project: str = None) -> dict:
+        """Bring the store up to date with `root_dir`; returns counts of what was done."""
+        project = project or os.path.basename(os.path.abspath(root_dir))
+
+        def files():
+            for path in iter_python_files(root_dir):
+                with open(path, "rb") as f:
+                    yield os.path.relpath(path, root_dir).replace(os.sep, "/"), f.read()
+
+        return self._index(project, files(), prune=True)
+
+    def index_source(self, code: str, project: str, rel_path: str = "main.py") -> dict:
+        """Index one in-memory file as `project/rel_path`, e.g. generated code never written to disk."""
+        return self._index(project, [(rel_path, code.encode("utf-8"))], prune=False)
+
+    def _index(self, project: str, files, prune: bool) -> dict:
+        """
+        Upsert (rel_path, raw bytes) pairs of `project`. With `prune`, files
+        of the project that were not passed are treated as deleted.
+        """
+        stats = {"files": 0, "unchanged_files": 0, "chunks": 0, "embedded": 0, "removed": 0}
+        documents, ids, metadata, stale, seen = [], [], [], [], set()
+
+        with self._lock:
+            for rel_path, raw in files:
+                key = f"{project}/{rel_path}"
+                seen.add(key)
+                stats["files"] += 1
+                digest = hashlib.sha256(raw).hexdigest()
+                entry = self.manifest.get(key)
+                if entry and entry["sha256"] == digest:
+                    stats["unchanged_files"] += 1
+                    continue
+
+                chunks = extract_definitions(raw.decode("utf-8", errors="replace"), self.max_tokens)
+                texts = [self.chunk_document(project, rel_path, chunk) for chunk in chunks]
+                file_ids = [document_id(text) for text in texts]
+                documents.extend(texts)
+                ids.extend(file_ids)
+                metadata.extend(self.chunk_metadata(project, rel_path, chunk) for chunk in chunks)
+                if entry:
+                    stale.extend(set(entry["ids"]) - set(file_ids))
+                self.manifest[key] = {"sha256": digest, "ids": file_ids}
+
+            for key in [key for key in self.manifest if prune and key.startswith(f"{project}/") and key not in seen]:
+                stale.extend(self.manifest.pop(key)["ids"])  # file deleted
+
+            stats["removed"] = self.store.remove_documents(stale)
+            stats["chunks"] = len(documents)
+            for start in range(0, len(documents), self.batch_size):
+                batch = slice(start, start + self.batch_size)
+                stats["embedded"] += sum(1 for doc_id in ids[batch] if doc_id not in self.store.documents)
+                self.store.add_documents(documents[batch], ids=ids[batch], metadata=metadata[batch])
+            self._save_manifest()
+
+        print(f"📚 Indexed {project}: {stats['files']} files ({stats['unchanged_files']} unchanged), "
+              f"{stats['embedded']} chunks embedded, {stats['removed']} removed.")
+        return stats
+
+    def _save_manifest(self):
+        if not self.manifest_path:
+            return
+        os.makedirs(os.path.dirname(self.manifest_path), exist_ok=True)
+        tmp_path = self.manifest_path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.manifest, f)
+        os.replace(tmp_path, self.manifest_path)
+
+    def search(self, query: str, top_k: int = 5, project: str = None) -> list:
+        """SearchHits for `query`, optionally limited to one project."""
+        return self.store.search_batch([query], top_k=top_k, filter={"project": project} if project else None)[0]
+
+
+_shared_indexer = None
+_shared_lock = threading.Lock()
+_disabled = False
+
+
+def get_code_indexer():
+    """
+    Return the process-wide CodeIndexer over the store at CODE_INDEX_PATH,
+    or None when it is disabled (CODE_INDEX=0) or FAISS / the embedding
+    model are not available.
+    """
+    global _shared_indexer, _disabled
+    if os.getenv("CODE_INDEX", "1") != "1" or _disabled:
+        return None
+    if _shared_indexer is None:
+        with _shared_lock:
+            if _shared_indexer is None and not _disabled:
+                try:
+                    store = VectorStore(path=os.getenv("CODE_INDEX_PATH", ".cache/code_index"))
+                    store.embed_fn.load()  # fail here, not halfway through a project
+                    _shared_indexer = CodeIndexer(store, batch_size=int(os.getenv("CODE_INDEX_BATCH_SIZE", "256")))
+                except (ImportError, OSError) as e:
+                    print(f"⚠️ Code indexing disabled: {e}")
+                    _disabled = True
+    return _shared_indexer
+
+
+# CLI usage: python src/vector_store/code_indexer.py generated/my_project --store .cache/code_index
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Index a Python project at function/class level.")
+    parser.add_argument("root_dir", help="Project directory, e.g. generated/my_project")
+    parser.add_argument("--store", default=".cache/code_index", help="VectorStore directory")
+    parser.add_argument("--project", default=None, help="Project name (default: the directory name)")
+    parser.add_argument("--query", default=None, help="Search the index afterwards")
+    args = parser.parse_args()
+
+    indexer = CodeIndexer(VectorStore(path=args.store))
+    indexer.index(args.root_dir, project=args.project)
+    if args.query:
+        for hit in indexer.search(args.query, project=args.project):
+            print("—" * 40)
+            print(f"{hit.metadata['source']}:{hit.metadata['start_line']} {hit.metadata['name']} ({hit.score:.2f})")
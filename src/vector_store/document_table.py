@@ -0,0 +1,257 @@
+import os
+import json
+import operator
+import numpy as np
+
+# Columnar snapshot layout: FAISS ids, then document IDs, bodies and JSON metadata as offset-indexed UTF-8 blobs
+TABLE_FILES = ("int_ids.npy", "doc_id_offsets.npy", "doc_ids.bin", "text_offsets.npy", "texts.bin",
+               "metadata_offsets.npy", "metadata.bin")
+OFFSETS = {"doc_ids": "doc_id_offsets", "texts": "text_offsets", "metadata": "metadata_offsets"}
+
+
+def _map_blob(path):
+    # np.memmap refuses empty files
+    if os.path.getsize(path) == 0:
+        return np.zeros(0, dtype=np.uint8)
+    return np.memmap(path, dtype=np.uint8, mode="r")
+
+
+class DocumentTable:
+    """
+    doc_id ⇄ FAISS id ⇄ document text for a VectorStore.
+
+    A table opened from a snapshot keeps it memory-mapped: a search decodes
+    the IDs and bodies of its hits only, and the doc_id → FAISS id map is
+    built the first time the table is modified. Changes since the snapshot
+    live in memory until the next `save`.
+
+    Each document has a flat metadata dict (source, session_id, timestamp,
+    agent, ...). `select` turns a metadata filter into FAISS ids, using
+    per-field postings built from the snapshot on the first filtered search.
+    """
+
+    def __init__(self):
+        self._base = None           # memory-mapped snapshot columns
+        self._base_index = None     # doc_id -> FAISS id for the snapshot, built lazily
+        self._base_postings = None  # field -> value -> snapshot FAISS ids, built lazily
+        self._removed = set()       # snapshot FAISS ids removed since
+        self._texts = {}            # FAISS id -> text added since the snapshot
+        self._ids = {}              # doc_id -> FAISS id added since the snapshot
+        self._doc_ids = {}          # FAISS id -> doc_id added since the snapshot
+        self._metadata = {}         # FAISS id -> metadata set since the snapshot
+
+    @classmethod
+    def open(cls, directory: str):
+        table = cls()
+        table._base = {
+            "int_ids": np.load(os.path.join(directory, "int_ids.npy"), mmap_mode="r"),
+            "doc_id_offsets": np.load(os.path.join(directory, "doc_id_offsets.npy"), mmap_mode="r"),
+            "doc_ids": _map_blob(os.path.join(directory, "doc_ids.bin")),
+            "text_offsets": np.load(os.path.join(directory, "text_offsets.npy"), mmap_mode="r"),
+            "texts": _map_blob(os.path.join(directory, "texts.bin")),
+        }
+        if os.path.exists(os.path.join(directory, "metadata.bin")):
+            table._base["metadata_offsets"] = np.load(os.path.join(directory, "metadata_offsets.npy"), mmap_mode="r")
+            table._base["metadata"] = _map_blob(os.path.join(directory, "metadata.bin"))
+        return table
+
+    # --- snapshot access ---
+
+    def _base_count(self) -> int:
+        return len(self._base["int_ids"]) if self._base is not None else 0
+
+    def _base_position(self, int_id: int):
+        if self._base is None or int_id in self._removed:
+            return None
+        ids = self._base["int_ids"]
+        pos = int(np.searchsorted(ids, int_id))
+        return pos if pos < len(ids) and ids[pos] == int_id else None
+
+    def _slice(self, column: str, pos: int) -> bytes:
+        if column not in self._base:
+            return b"{}"  # snapshot written before documents had metadata
+        offsets = self._base[OFFSETS[column]]
+        return bytes(self._base[column][offsets[pos]:offsets[pos + 1]])
+
+    def _base_doc_id(self, pos: int) -> str:
+        return self._slice("doc_ids", pos).decode("utf-8")
+
+    def _index(self) -> dict:
+        if self._base_index is None:
+            self._base_index = {}
+            if self._base is not None:
+                for pos, int_id in enumerate(self._base["int_ids"].tolist()):
+                    self._base_index[self._base_doc_id(pos)] = int_id
+        return self._base_index
+
+    def _postings(self) -> dict:
+        if self._base_postings is None:
+            postings = {}
+            base_ids = self._base["int_ids"].tolist() if self._base is not None else []
+            for pos, int_id in enumerate(base_ids):
+                for field, value in json.loads(self._slice("metadata", pos)).items():
+                    postings.setdefault(field, {}).setdefault(_hashable(value), []).append(int_id)
+            self._base_postings = {
+                field: {value: np.array(ids, dtype="int64") for value, ids in values.items()}
+                for field, values in postings.items()
+            }
+        return self._base_postings
+
+    # --- lookups ---
+
+    def __len__(self):
+        return self._base_count() - len(self._removed) + len(self._texts)
+
+    def __contains__(self, doc_id):
+        return self.int_id(doc_id) is not None
+
+    def __iter__(self):
+        for int_id in self.int_ids().tolist():
+            yield self.doc_id(int_id)
+
+    def int_id(self, doc_id: str):
+        if doc_id in self._ids:
+            return self._ids[doc_id]
+        int_id = self._index().get(doc_id)
+        return int_id if int_id is not None and int_id not in self._removed else None
+
+    def doc_id(self, int_id: int):
+        """Document ID for a FAISS id, or None if it was removed."""
+        if int_id in self._doc_ids:
+            return self._doc_ids[int_id]
+        pos = self._base_position(int_id)
+        return self._base_doc_id(pos) if pos is not None else None
+
+    def text(self, int_id: int):
+        if int_id in self._texts:
+            return self._texts[int_id]
+        pos = self._base_position(int_id)
+        return self._slice("texts", pos).decode("utf-8") if pos is not None else None
+
+    def get(self, doc_id: str, default=None):
+        int_id = self.int_id(doc_id)
+        return self.text(int_id) if int_id is not None else default
+
+    def metadata(self, int_id: int) -> dict:
+        if int_id in self._metadata:
+            return dict(self._metadata[int_id])
+        pos = self._base_position(int_id)
+        return json.loads(self._slice("metadata", pos)) if pos is not None else {}
+
+    def select(self, filter: dict):
+        """
+        FAISS ids (ascending) of live documents whose metadata matches every
+        field of `filter`. A field matches a value, any value of a list, or
+        a {"gte", "gt", "lte", "lt"} range (e.g. on timestamp).
+        """
+        selected = None
+        for field, condition in filter.items():
+            if isinstance(condition, dict):
+                _matches(0, condition)  # reject unknown operators even if nothing has the field
+            ids = self._select_field(field, condition)
+            selected = ids if selected is None else np.intersect1d(selected, ids, assume_unique=True)
+        if selected is None:
+            return self.int_ids()
+        return selected
+
+    def _select_field(self, field: str, condition):
+        postings = self._postings().get(field, {})
+        matched = [ids for value, ids in postings.items() if _matches(value, condition)]
+        base = np.unique(np.concatenate(matched)) if matched else np.zeros(0, dtype="int64")
+        # Snapshot documents changed since are answered from the overlay below
+        stale = self._removed | set(self._metadata)
+        if stale:
+            base = base[~np.isin(base, np.fromiter(stale, dtype="int64"))]
+        overlay = [int_id for int_id, metadata in self._metadata.items()
+                   if field in metadata and _matches(_hashable(metadata[field]), condition)]
+        return np.union1d(base, np.array(overlay, dtype="int64"))
+
+    def int_ids(self):
+        """FAISS ids of all live documents, ascending."""
+        base = np.asarray(self._base["int_ids"]) if self._base is not None else np.zeros(0, dtype="int64")
+        if self._removed:
+            base = base[~np.isin(base, np.fromiter(self._removed, dtype="int64"))]
+        return np.concatenate([base, np.array(sorted(self._texts), dtype="int64")])
+
+    # --- changes ---
+
+    def add(self, doc_id: str, int_id: int, text: str, metadata: dict = None):
+        self._texts[int_id] = text
+        self._ids[doc_id] = int_id
+        self._doc_ids[int_id] = doc_id
+        self._metadata[int_id] = dict(metadata or {})
+
+    def set_metadata(self, doc_id: str, metadata: dict):
+        int_id = self.int_id(doc_id)
+        if int_id is not None:
+            self._metadata[int_id] = dict(metadata or {})
+
+    def remove(self, doc_id: str):
+        """Remove `doc_id` and return its FAISS id (None if unknown)."""
+        if doc_id in self._ids:
+            int_id = self._ids.pop(doc_id)
+            del self._texts[int_id]
+            del self._doc_ids[int_id]
+            self._metadata.pop(int_id, None)
+            return int_id
+        int_id = self.int_id(doc_id)
+        if int_id is not None:
+            self._removed.add(int_id)
+            self._metadata.pop(int_id, None)
+        return int_id
+
+    # --- persistence ---
+
+    def save(self, directory: str):
+        """Write every live document to `directory` in the columnar layout."""
+        os.makedirs(directory, exist_ok=True)
+        int_ids = self.int_ids()
+        offsets = {column: np.zeros(len(int_ids) + 1, dtype="int64") for column in OFFSETS}
+        files = {column: open(os.path.join(directory, f"{column}.bin"), "wb") for column in OFFSETS}
+        try:
+            for n, int_id in enumerate(int_ids.tolist()):
+                pos = None if int_id in self._texts else self._base_position(int_id)
+                if pos is None:
+                    row = {"doc_ids": self._doc_ids[int_id].encode("utf-8"),
+                           "texts": self._texts[int_id].encode("utf-8")}
+                else:
+                    # Snapshot bodies are copied byte for byte, never decoded
+                    row = {"doc_ids": self._slice("doc_ids", pos), "texts": self._slice("texts", pos)}
+                if int_id in self._metadata:
+                    row["metadata"] = json.dumps(self._metadata[int_id]).encode("utf-8")
+                else:
+                    row["metadata"] = self._slice("metadata", pos)
+                for column, data in row.items():
+                    files[column].write(data)
+                    offsets[column][n + 1] = offsets[column][n] + len(data)
+        finally:
+            for f in files.values():
+                f.close()
+        np.save(os.path.join(directory, "int_ids.npy"), int_ids)
+        for column, offset_column in OFFSETS.items():
+            np.save(os.path.join(directory, f"{offset_column}.npy"), offsets[column])
+
+
+RANGE_OPERATORS = {"gte": operator.ge, "gt": operator.gt, "lte": operator.le, "lt": operator.lt}
+
+
+def _hashable(value):
+    if isinstance(value, list):
+        return tuple(value)
+    if isinstance(value, dict):
+        return json.dumps(value, sort_keys=True)
+    return value
+
+
+def _matches(value, condition) -> bool:
+    if isinstance(condition, dict):
+        unknown = set(condition) - set(RANGE_OPERATORS)
+        if unknown:
+            raise ValueError(f"❌ Unknown filter operators: {sorted(unknown)}. Use {sorted(RANGE_OPERATORS)}.")
+        try:
+            return all(RANGE_OPERATORS[op](value, bound) for op, bound in condition.items())
+        except TypeError:
+            return False  # e.g. a string compared with a number
+    if isinstance(condition, (list, tuple, set)):
+        return value in condition
+    return value == condition
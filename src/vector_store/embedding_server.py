@@ -0,0 +1,311 @@
+# src/vector_store/embedding_server.py
+
+import os
+import sys
+import json
+import time
+import base64
+import argparse
+import threading
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.vector_store.embedding_service import DEFAULT_EMBEDDING_MODEL, load_model
+
+DEFAULT_SERVER_URL = "http://127.0.0.1:8765"
+
+
+class EmbeddingServerError(OSError):
+    """The embedding server could not be reached or could not encode the texts."""
+
+
+def encode_vectors(vectors) -> dict:
+    vectors = np.ascontiguousarray(vectors, dtype="<f4")
+    return {"dim": int(vectors.shape[1]) if vectors.ndim == 2 else 0,
+            "vectors": base64.b64encode(vectors.tobytes()).decode("ascii")}
+
+
+def decode_vectors(payload: dict, count: int):
+    vectors = np.frombuffer(base64.b64decode(payload["vectors"]), dtype="<f4").astype("float32")
+    return vectors.reshape(count, payload["dim"]) if count else np.zeros((0, payload["dim"]), dtype="float32")
+
+
+class MicroBatcher:
+    """
+    Merges concurrent encode requests for one model into shared model calls.
+
+    Requests wait up to `max_wait` seconds for others to arrive. A model call
+    then gets queued texts, up to `max_batch`; a single larger request is
+    never split. Batching happens across processes, so a Slack message and a
+    CLI run embedding at the same moment cost one forward pass.
+
+    Args:
+        encode_fn: list[str] -> vectors.
+        max_batch (int): Most texts per model call.
+        max_wait (float): Seconds a request may wait for company.
+    """
+
+    def __init__(self, encode_fn, max_batch: int = 256, max_wait: float = 0.005):
+        self.encode_fn = encode_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.stats = {"requests": 0, "texts": 0, "batches": 0}
+        self._pending = []
+        self._cond = threading.Condition()
+        self._worker = threading.Thread(target=self._run, daemon=True)
+        self._worker.start()
+
+    def encode(self, texts: list):
+        """Encode `texts` along with whatever else is queued; blocks until done."""
+        request = {"texts": texts, "done": threading.Event(), "vectors": None, "error": None}
+        with self._cond:
+            self._pending.append(request)
+            self.stats["requests"] += 1
+            self._cond.notify()
+        request["done"].wait()
+        if request["error"] is not None:
+            raise request["error"]
+        return request["vectors"]
+
+    def _take_batch(self) -> list:
+        with self._cond:
+            while not self._pending:
+                self._cond.wait()
+            deadline = time.monotonic() + self.max_wait
+            while sum(len(r["texts"]) for r in self._pending) < self.max_batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                self._cond.wait(remaining)
+            batch, size = [], 0
+            while self._pending and (not batch or size + len(self._pending[0]["texts"]) <= self.max_batch):
+                size += len(self._pending[0]["texts"])
+                batch.append(self._pending.pop(0))
+            self.stats["texts"] += size
+            self.stats["batches"] += 1
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._take_batch()
+            texts = [text for request in batch for text in request["texts"]]
+            try:
+                vectors = np.asarray(self.encode_fn(texts), dtype="float32").reshape(len(texts), -1)
+                start = 0
+                for request in batch:
+                    request["vectors"] = vectors[start:start + len(request["texts"])]
+                    start += len(request["texts"])
+            except Exception as e:
+                for request in batch:
+                    request["error"] = e
+            for request in batch:
+                request["done"].set()
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            return dict(self.stats)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so clients reuse one connection
+
+    def _reply(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path != "/health":
+            return self._reply(404, {"error": "not found"})
+        self._reply(200, {"status": "ok", **self.server.embedding_server.get_stats()})
+
+    def do_POST(self):
+        if self.path != "/embed":
+            return self._reply(404, {"error": "not found"})
+        try:
+            request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))))
+            model_name, texts = request.get("model") or DEFAULT_EMBEDDING_MODEL, request["texts"]
+            if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+                raise ValueError("texts must be a list of strings")
+        except (ValueError, KeyError, TypeError) as e:
+            return self._reply(400, {"error": str(e)})
+        try:
+            vectors = self.server.embedding_server.encode(model_name, texts)
+        except (ImportError, OSError) as e:
+            return self._reply(503, {"error": str(e)})
+        except Exception as e:
+            return self._reply(500, {"error": f"{type(e).__name__}: {e}"})
+        self._reply(200, encode_vectors(vectors))
+
+    def log_message(self, format, *args):
+        pass  # one line per embed call would drown the console
+
+
+class EmbeddingServer:
+    """
+    Localhost HTTP server that keeps embedding models loaded for every process.
+
+    The FastAPI server, the Slack and Discord bots and the CLI each used to
+    load their own SentenceTransformer. Their EmbeddingServices now send
+    cache misses here, so the model is loaded and held in RAM once.
+
+    POST /embed takes {"model", "texts"} and answers with {"dim", "vectors"}.
+    The vectors are normalized little-endian float32, base64 encoded.
+    GET /health reports the loaded models and batching counters.
+
+    Args:
+        host (str): Interface to bind; keep it local, there is no authentication.
+        port (int): TCP port, 0 picks a free one.
+        encode_fn: (model_name, texts) -> vectors, replacing sentence-transformers.
+        max_batch (int): Most texts per model call.
+        max_wait (float): Seconds a request waits for others to batch with.
+    """
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 8765, encode_fn=None,
+                 max_batch: int = 256, max_wait: float = 0.005):
+        self.encode_fn = encode_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._batchers = {}
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), _Handler)
+        self.httpd.daemon_threads = True
+        self.httpd.embedding_server = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _model_encoder(self, model_name: str):
+        if self.encode_fn is not None:
+            return lambda texts: self.encode_fn(model_name, texts)
+        model = load_model(model_name)
+        return lambda texts: model.encode(texts, batch_size=self.max_batch, convert_to_tensor=False,
+                                          normalize_embeddings=True)
+
+    def batcher(self, model_name: str) -> MicroBatcher:
+        """The MicroBatcher for `model_name`, loading the model on first use."""
+        with self._lock:
+            if model_name not in self._batchers:
+                self._batchers[model_name] = MicroBatcher(self._model_encoder(model_name),
+                                                          self.max_batch, self.max_wait)
+            return self._batchers[model_name]
+
+    def encode(self, model_name: str, texts: list):
+        vectors = self.batcher(model_name).encode(texts) if texts else np.zeros((0, 0), dtype="float32")
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"models": {name: batcher.get_stats() for name, batcher in self._batchers.items()}}
+
+    def start(self):
+        """Serve from a background thread; returns self."""
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def serve_forever(self):
+        print(f"🧠 Embedding server listening on {self.url}")
+        try:
+            self.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.httpd.server_close()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+class EmbeddingClient:
+    """
+    Client for an EmbeddingServer, used by EmbeddingService.
+
+    `available()` only checks /health until the server first answers, and
+    again `retry_interval` seconds after a failure. A healthy server costs no
+    extra round trip per embed call. While the server is down, calls go
+    straight to the in-process model instead of attempting a connection.
+
+    Args:
+        url (str): Server address, e.g. http://127.0.0.1:8765.
+        timeout (float): Seconds to wait for an /embed response.
+        retry_interval (float): Seconds before a down server is tried again.
+    """
+
+    def __init__(self, url: str = DEFAULT_SERVER_URL, timeout: float = 60.0, retry_interval: float = 30.0):
+        self.url = url.rstrip("/")
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self._up = False
+        self._down_until = 0.0
+
+    def _request(self, path: str, body: dict = None, timeout: float = None) -> dict:
+        data = json.dumps(body).encode("utf-8") if body is not None else None
+        request = urllib.request.Request(self.url + path, data=data, headers={"Content-Type": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=timeout or self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read()).get("error", e.reason)
+            except ValueError:
+                message = e.reason
+            raise EmbeddingServerError(f"Embedding server error {e.code}: {message}") from e
+        except (OSError, ValueError) as e:
+            raise EmbeddingServerError(f"Embedding server unreachable at {self.url}: {e}") from e
+
+    def health(self):
+        """The server's /health report, or None when it is not running."""
+        try:
+            return self._request("/health", timeout=1.0)
+        except EmbeddingServerError:
+            return None
+
+    def available(self) -> bool:
+        if self._up:
+            return True
+        if time.monotonic() < self._down_until:
+            return False
+        if self.health() is None:
+            self.mark_down()
+            return False
+        self._up = True
+        return True
+
+    def mark_down(self):
+        self._up = False
+        self._down_until = time.monotonic() + self.retry_interval
+
+    def encode(self, model_name: str, texts: list):
+        """Normalized float32 vectors for `texts`; raises EmbeddingServerError on failure."""
+        return decode_vectors(self._request("/embed", {"model": model_name, "texts": list(texts)}), len(texts))
+
+
+# CLI usage: python src/vector_store/embedding_server.py --port 8765 --preload all-MiniLM-L6-v2
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Serve sentence-transformers embeddings to local processes.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-batch", type=int, default=int(os.getenv("EMBEDDING_SERVER_MAX_BATCH", "256")))
+    parser.add_argument("--max-wait-ms", type=float, default=float(os.getenv("EMBEDDING_SERVER_MAX_WAIT_MS", "5")))
+    parser.add_argument("--preload", nargs="*", default=[os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)],
+                        help="Models to load before accepting requests")
+    args = parser.parse_args()
+
+    server = EmbeddingServer(args.host, args.port, max_batch=args.max_batch, max_wait=args.max_wait_ms / 1000)
+    for name in args.preload:
+        server.batcher(name)
+    server.serve_forever()
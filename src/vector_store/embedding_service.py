@@ -0,0 +1,213 @@
+# src/vector_store/embedding_service.py
+
+import os
+import sqlite3
+import hashlib
+import threading
+import numpy as np
+
+# sentence-transformers is optional: stores can be given their own embed_fn instead
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+DEFAULT_EMBEDDING_MODEL = "all-MiniLM-L6-v2"
+
+_models = {}
+_models_lock = threading.Lock()
+
+
+def load_model(model_name: str):
+    """Return the process-wide SentenceTransformer for `model_name`, loading it on first use."""
+    if model_name not in _models:
+        with _models_lock:
+            if model_name not in _models:
+                if SentenceTransformer is None:
+                    raise ImportError("sentence-transformers is not installed.")
+                print(f"📥 Loading embedding model: {model_name}")
+                _models[model_name] = SentenceTransformer(model_name)
+    return _models[model_name]
+
+
+class EmbeddingCache:
+    """
+    SQLite cache of embeddings keyed by (model, text hash), shared across processes.
+
+    Args:
+        path (str): Database file location.
+        dtype (str): "float32", or "float16" to halve the stored size.
+    """
+
+    def __init__(self, path: str = ".cache/embeddings.sqlite3", dtype: str = "float32"):
+        if dtype not in ("float32", "float16"):
+            raise ValueError(f"Unsupported embedding dtype: {dtype}")
+        self.path = path
+        self.dtype = dtype
+        if os.path.dirname(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=10)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, dtype TEXT NOT NULL, vector BLOB NOT NULL)"
+        )
+        self._conn.commit()
+
+    @staticmethod
+    def make_key(model_name: str, text: str) -> str:
+        return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+    def get_many(self, keys: list) -> dict:
+        """Return {key: float32 vector} for the keys that are cached."""
+        found = {}
+        with self._lock:
+            for start in range(0, len(keys), 500):  # stay under SQLite's bound-parameter limit
+                batch = keys[start:start + 500]
+                rows = self._conn.execute(
+                    f"SELECT key, dtype, vector FROM embeddings WHERE key IN ({','.join('?' * len(batch))})", batch
+                ).fetchall()
+                for key, dtype, blob in rows:
+                    found[key] = np.frombuffer(blob, dtype=dtype).astype("float32")
+        return found
+
+    def set_many(self, items: dict):
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings (key, dtype, vector) VALUES (?, ?, ?)",
+                [(key, self.dtype, np.asarray(vector, dtype=self.dtype).tobytes()) for key, vector in items.items()],
+            )
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+
+
+class EmbeddingService:
+    """
+    Single entry point for text embeddings, used by every vector store.
+
+    Texts are de-duplicated, looked up in the on-disk cache, and only the
+    misses are encoded, `batch_size` at a time, by a model shared across
+    the process and loaded on first use. Vectors are L2-normalized float32
+    (what FAISS expects); `cache.dtype` only changes how they are stored.
+    An instance is callable, so it can be passed as a VectorStore `embed_fn`.
+
+    With a `client`, misses are encoded by the shared embedding server, and
+    the model is only loaded in process while that server is not running.
+
+    Args:
+        model_name (str): sentence-transformers model.
+        batch_size (int): Texts encoded per model call.
+        cache (EmbeddingCache): Disk cache; None disables caching.
+        encode_fn: list[str] -> vectors, replacing the sentence-transformers model.
+        client (EmbeddingClient): Embedding server to try before loading the model.
+    """
+
+    def __init__(self, model_name: str = DEFAULT_EMBEDDING_MODEL, batch_size: int = 64,
+                 cache: EmbeddingCache = None, encode_fn=None, client=None):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.cache = cache
+        self.encode_fn = encode_fn
+        self.client = client
+        self.stats = {"texts": 0, "cache_hits": 0, "encoded": 0, "batches": 0, "remote_batches": 0}
+        self._lock = threading.Lock()
+        self._warned = False
+
+    def _use_server(self) -> bool:
+        if self.encode_fn is not None or self.client is None:
+            return False
+        if self.client.available():
+            return True
+        if not self._warned:
+            print(f"⚠️ Embedding server not running at {self.client.url}, using an in-process model.")
+            self._warned = True
+        return False
+
+    def load(self):
+        """Load the model now instead of on the first cache miss (raises if it is unavailable)."""
+        if self.encode_fn is None and not self._use_server():
+            load_model(self.model_name)
+
+    def _encode(self, texts: list):
+        if self._use_server():
+            try:
+                vectors = self.client.encode(self.model_name, texts)
+                with self._lock:
+                    self.stats["remote_batches"] += 1
+                return vectors.reshape(len(texts), -1)
+            except OSError as e:
+                print(f"⚠️ Embedding server failed ({e}), using an in-process model.")
+                self.client.mark_down()
+        if self.encode_fn is not None:
+            vectors = np.asarray(self.encode_fn(texts), dtype="float32")
+        else:
+            vectors = np.asarray(load_model(self.model_name).encode(
+                texts, batch_size=self.batch_size, convert_to_tensor=False, normalize_embeddings=True
+            ), dtype="float32")
+        return vectors.reshape(len(texts), -1)
+
+    def embed(self, texts: list):
+        """Return an (len(texts), dim) float32 array of normalized embeddings."""
+        if isinstance(texts, str):
+            texts = [texts]
+        unique = list(dict.fromkeys(texts))
+        keys = {text: EmbeddingCache.make_key(self.model_name, text) for text in unique}
+        cached = self.cache.get_many(list(keys.values())) if self.cache is not None else {}
+        vectors = {text: cached[keys[text]] for text in unique if keys[text] in cached}
+
+        missing = [text for text in unique if text not in vectors]
+        batches = 0
+        for start in range(0, len(missing), self.batch_size):
+            batch = missing[start:start + self.batch_size]
+            encoded = self._encode(batch)
+            norms = np.linalg.norm(encoded, axis=1, keepdims=True)
+            encoded = encoded / np.maximum(norms, 1e-12)
+            vectors.update(zip(batch, encoded))
+            if self.cache is not None:
+                self.cache.set_many({keys[text]: vector for text, vector in zip(batch, encoded)})
+            batches += 1
+
+        with self._lock:
+            self.stats["texts"] += len(texts)
+            self.stats["cache_hits"] += len(unique) - len(missing)
+            self.stats["encoded"] += len(missing)
+            self.stats["batches"] += batches
+        if not texts:
+            return np.zeros((0, 0), dtype="float32")
+        return np.stack([vectors[text] for text in texts]).astype("float32")
+
+    __call__ = embed
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return dict(self.stats)
+
+
+_services = {}
+_services_lock = threading.Lock()
+
+
+def get_embedding_service(model_name: str = None) -> EmbeddingService:
+    """
+    Return the process-wide EmbeddingService for `model_name` (default
+    EMBEDDING_MODEL), configured from EMBEDDING_BATCH_SIZE,
+    EMBEDDING_CACHE_PATH (empty disables the disk cache), EMBEDDING_DTYPE and
+    EMBEDDING_SERVER_URL (the shared embedding server; empty disables it).
+    """
+    from src.vector_store.embedding_server import DEFAULT_SERVER_URL, EmbeddingClient
+
+    model_name = model_name or os.getenv("EMBEDDING_MODEL", DEFAULT_EMBEDDING_MODEL)
+    if model_name not in _services:
+        with _services_lock:
+            if model_name not in _services:
+                cache_path = os.getenv("EMBEDDING_CACHE_PATH", ".cache/embeddings.sqlite3")
+                cache = EmbeddingCache(cache_path, os.getenv("EMBEDDING_DTYPE", "float32")) if cache_path else None
+                server_url = os.getenv("EMBEDDING_SERVER_URL", DEFAULT_SERVER_URL)
+                _services[model_name] = EmbeddingService(
+                    model_name, batch_size=int(os.getenv("EMBEDDING_BATCH_SIZE", "64")), cache=cache,
+                    client=EmbeddingClient(server_url) if server_url else None,
+                )
+    return _services[model_name]
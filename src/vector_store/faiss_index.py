@@ -1,55 +1,600 @@
 import os
+import sys
+import json
+import math
+import time
+import base64
+import shutil
+import hashlib
 import faiss
 import pickle
 import numpy as np
-from sentence_transformers import SentenceTransformer
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.vector_store.embedding_service import get_embedding_service
+from src.vector_store.document_table import DocumentTable
+
+
+INDEX_TYPES = ("flat", "ivf_flat", "ivf_pq", "hnsw")
+# "auto" picks the first type whose corpus-size limit is not reached, else IVF-PQ
+AUTO_INDEX_LIMITS = ((20_000, "flat"), (200_000, "hnsw"), (2_000_000, "ivf_flat"))
+# Vectors needed before an IVF index can be trained; smaller corpora stay flat until then
+MIN_TRAIN_SIZE = {"flat": 0, "hnsw": 0, "ivf_flat": 1_000, "ivf_pq": 10_000}
+HNSW_M = 32
+# Filters matching at most this many documents are answered by exact search over just those vectors;
+# graph and IVF search with a very selective ID selector can return fewer than top_k hits
+FILTER_EXACT_LIMIT = 4096
+
+
+def choose_index_type(n: int) -> str:
+    for limit, index_type in AUTO_INDEX_LIMITS:
+        if n < limit:
+            return index_type
+    return "ivf_pq"
+
+
+def ivf_nlist(n: int) -> int:
+    """~4·sqrt(n) inverted lists, with at least 39 training points per list."""
+    return max(1, min(int(4 * math.sqrt(n)), n // 39))
+
+
+def pq_subquantizers(dim: int) -> int:
+    """PQ code size (bytes per vector): the largest usual one dividing `dim` with >= 4 dims per sub-vector."""
+    return next(m for m in (64, 48, 32, 24, 16, 12, 8, 4, 2, 1) if m <= max(1, dim // 4) and dim % m == 0)
+
+
+def make_index(index_type: str, dim: int, n: int):
+    """Empty, untrained FAISS index of `index_type` that accepts add_with_ids and sized for `n` vectors."""
+    if index_type == "flat":
+        return faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+    if index_type == "hnsw":
+        # HNSW cannot delete vectors; removed ones are skipped at search and purged by compaction
+        return faiss.IndexIDMap2(faiss.IndexHNSWFlat(dim, HNSW_M))
+    if index_type == "ivf_flat":
+        index = faiss.IndexIVFFlat(faiss.IndexFlatL2(dim), dim, ivf_nlist(n))
+    elif index_type == "ivf_pq":
+        index = faiss.IndexIVFPQ(faiss.IndexFlatL2(dim), dim, ivf_nlist(n), pq_subquantizers(dim), 8)
+    else:
+        raise ValueError(f"❌ Unknown index type: {index_type}. Choose from {INDEX_TYPES} or 'auto'.")
+    # Lets IVF indexes remove and reconstruct vectors by ID
+    index.set_direct_map_type(faiss.DirectMap.Hashtable)
+    return index
+
+
+def document_id(text: str) -> str:
+    """Default stable ID: derived from the content, so re-adding a document is a no-op."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:16]
+
+
+class SearchHit:
+    """One search result: document ID, text, cosine similarity and metadata."""
+
+    __slots__ = ("doc_id", "text", "score", "metadata")
+
+    def __init__(self, doc_id: str, text: str, score: float, metadata: dict = None):
+        self.doc_id = doc_id
+        self.text = text
+        self.score = score
+        self.metadata = metadata or {}
+
+    def to_dict(self) -> dict:
+        return {"doc_id": self.doc_id, "text": self.text, "score": self.score, "metadata": self.metadata}
+
+    def __repr__(self):
+        return f"SearchHit({self.doc_id!r}, score={self.score:.3f})"
 
 
 class VectorStore:
-    def __init__(self, model_name="llama3-70b-8192"):
-        print(f"📥 Loading embedding model: {model_name}")
-        self.model = SentenceTransformer(model_name)
+    """
+    FAISS store of documents under stable string IDs.
+
+    Vectors live in an `IndexIDMap2`, so documents can be added, replaced
+    and removed without rebuilding the index or re-embedding the rest of
+    the corpus. With a `path`, every change is appended to a write-ahead
+    log (with its vector) before it is applied; `load` replays the log on
+    top of the last snapshot, and the log is folded into a new snapshot
+    (`compact`) every `compact_every` entries.
+
+    Snapshots contain no pickles: the FAISS index file plus a columnar
+    DocumentTable. `load` memory-maps both, so start-up does not read the
+    corpus and document bodies are only read for returned hits; the index
+    is read into memory the first time the store is modified.
+
+    `index_type` trades exactness for speed on large corpora: "flat" is
+    exact, "hnsw", "ivf_flat" and "ivf_pq" are approximate (IVF-PQ also
+    compresses vectors), and "auto" picks one by corpus size. IVF indexes
+    are trained on a sample of at most `train_sample` vectors once enough
+    exist; until then, and whenever "auto" outgrows the current type, the
+    index is rebuilt from the stored vectors. `nprobe` (IVF) and
+    `ef_search` (HNSW) are the default query-time accuracy knobs.
+
+    Documents may carry flat metadata (source, session_id, timestamp,
+    agent, ...). `search_batch` embeds many queries at once, runs them as
+    one FAISS call and can pre-filter on metadata through an ID selector.
+
+    Args:
+        model_name (str): Model of the shared embedding service, used when `embed_fn` is None.
+        embed_fn: list[str] -> normalized vectors. Defaults to `get_embedding_service(model_name)`.
+        path (str): Directory for the snapshot and write-ahead log. Loaded if it exists.
+        compact_every (int): Log entries after which a snapshot is written.
+        index_type (str): "flat", "ivf_flat", "ivf_pq", "hnsw" or "auto".
+        nprobe (int): Inverted lists visited per IVF query.
+        ef_search (int): Candidate list size per HNSW query.
+        train_sample (int): Maximum vectors used to train an IVF index.
+    """
+
+    def __init__(self, model_name=None, embed_fn=None, path=None, compact_every=1000,
+                 index_type="flat", nprobe=16, ef_search=64, train_sample=100_000):
+        if index_type != "auto" and index_type not in INDEX_TYPES:
+            raise ValueError(f"❌ Unknown index type: {index_type}. Choose from {INDEX_TYPES} or 'auto'.")
+        self.index_type = index_type
+        self.nprobe = nprobe
+        self.ef_search = ef_search
+        self.train_sample = train_sample
+        self.embed_fn = embed_fn or get_embedding_service(model_name)
+        self.path = path
+        self.compact_every = compact_every
+        self._reset()
+        if path and any(os.path.exists(os.path.join(path, name)) for name in ("CURRENT", "wal.jsonl", "faiss.index")):
+            self.load(path)
+
+    def _reset(self):
         self.index = None
-        self.documents = []
+        self.active_index_type = None
+        self.documents = DocumentTable()
+        self._next_id = 0
+        self._wal_entries = 0
+        self._mapped_index_path = None  # set while the index is memory-mapped read-only
+
+    def __len__(self):
+        return len(self.documents)
 
     def embed_text(self, texts):
-        return self.model.encode(texts, convert_to_tensor=False, normalize_embeddings=True)
+        return self.embed_fn(texts)
 
-    def build_index(self, documents: list[str]):
+    # --- indexing ---
+
+    def build_index(self, documents: list[str], embeddings=None, ids=None):
+        """Replace the whole corpus. Prefer `add_documents` / `remove_documents` for changes."""
         print("🧠 Building FAISS index...")
-        self.documents = documents
-        embeddings = self.embed_text(documents)
-        embeddings = np.array(embeddings).astype("float32")
-        self.index = faiss.IndexFlatL2(embeddings.shape[1])
-        self.index.add(embeddings)
+        self._reset()
+        if self.path:
+            self._truncate_wal()
+        self.add_documents(documents, ids=ids, embeddings=embeddings)
+        if self.path:
+            self.compact()
+
+    def add_documents(self, documents: list[str], ids=None, embeddings=None, metadata=None) -> list:
+        """
+        Add or replace documents and return their IDs (content hashes unless
+        `ids` is given). Only documents that are new or changed are embedded.
+        `metadata` (one dict per document, or one for all) replaces the
+        stored metadata; without it, existing documents keep theirs.
+        """
+        ids = list(ids) if ids is not None else [document_id(text) for text in documents]
+        if len(ids) != len(documents):
+            raise ValueError("❌ ids and documents must have the same length.")
+        if metadata is None or isinstance(metadata, dict):
+            metadata = [metadata] * len(documents)
+        elif len(metadata) != len(documents):
+            raise ValueError("❌ metadata and documents must have the same length.")
+
+        # Within one call the last occurrence of an ID wins
+        latest = {doc_id: i for i, doc_id in enumerate(ids)}
+        changed = [i for doc_id, i in latest.items() if self.documents.get(doc_id) != documents[i]]
+        metadata = [self._existing_metadata(ids[i]) if metadata[i] is None else metadata[i]
+                    for i in range(len(ids))]
+        unchanged = set(latest.values()) - set(changed)
+        retagged = [i for i in sorted(unchanged) if metadata[i] != self._existing_metadata(ids[i])]
+        if retagged:
+            # Same text, new metadata: no need to embed or touch the index
+            self._log([{"op": "metadata", "id": ids[i], "metadata": metadata[i]} for i in retagged])
+            for i in retagged:
+                self.documents.set_metadata(ids[i], metadata[i])
+        if not changed:
+            if retagged:
+                self._maybe_compact()
+            return ids
+
+        if embeddings is None:
+            vectors = np.array(self.embed_text([documents[i] for i in changed])).astype("float32")
+        elif len(embeddings) != len(documents):
+            raise ValueError("❌ embeddings and documents must have the same length.")
+        else:
+            vectors = np.array(embeddings).astype("float32")[changed]
+        vectors = vectors.reshape(len(changed), -1)
+        # Check before logging: a record that cannot be applied would fail every later replay
+        if self.index is not None and vectors.shape[1] != self.index.d:
+            raise ValueError(f"❌ Embeddings have dimension {vectors.shape[1]}, the index expects {self.index.d}.")
+
+        self._log([{"op": "add", "id": ids[i], "text": documents[i], "metadata": metadata[i],
+                    "vector": _encode_vector(v)} for i, v in zip(changed, vectors)])
+        self._apply_add([ids[i] for i in changed], [documents[i] for i in changed], vectors,
+                        [metadata[i] for i in changed])
+        if not self._maybe_reindex():
+            self._maybe_compact()
+        return ids
+
+    def _existing_metadata(self, doc_id: str) -> dict:
+        int_id = self.documents.int_id(doc_id)
+        return self.documents.metadata(int_id) if int_id is not None else {}
+
+    def remove_documents(self, ids) -> int:
+        """Remove documents by ID; unknown IDs are ignored. Returns how many were removed."""
+        ids = [doc_id for doc_id in dict.fromkeys(ids) if doc_id in self.documents]
+        if not ids:
+            return 0
+        self._log([{"op": "remove", "id": doc_id} for doc_id in ids])
+        self._apply_remove(ids)
+        self._maybe_compact()
+        return len(ids)
+
+    def _apply_add(self, ids, documents, vectors, metadata=None):
+        self._materialize_index()
+        if self.index is None:
+            index_type = self._target_type(len(self.documents) + len(ids))
+            if len(ids) < MIN_TRAIN_SIZE[index_type]:
+                index_type = "flat"
+            self.index = self._new_index(index_type, vectors)
+        self._apply_remove([doc_id for doc_id in ids if doc_id in self.documents])
+        int_ids = np.arange(self._next_id, self._next_id + len(ids), dtype="int64")
+        self._next_id += len(ids)
+        self.index.add_with_ids(vectors, int_ids)
+        for n, (doc_id, int_id, text) in enumerate(zip(ids, int_ids.tolist(), documents)):
+            self.documents.add(doc_id, int_id, text, metadata[n] if metadata else None)
 
-    def search(self, query: str, top_k=3):
+    def _apply_remove(self, ids):
+        ids = [doc_id for doc_id in ids if doc_id in self.documents]
+        if not ids:
+            return
+        self._materialize_index()
+        int_ids = np.array([self.documents.remove(doc_id) for doc_id in ids], dtype="int64")
+        if self.active_index_type != "hnsw":
+            self.index.remove_ids(int_ids)
+
+    # --- index type ---
+
+    def _target_type(self, n: int) -> str:
+        return choose_index_type(n) if self.index_type == "auto" else self.index_type
+
+    def _new_index(self, index_type: str, vectors):
+        index = make_index(index_type, vectors.shape[1], len(vectors))
+        if not index.is_trained:
+            sample = vectors
+            if len(vectors) > self.train_sample:
+                sample = vectors[np.random.default_rng(0).choice(len(vectors), self.train_sample, replace=False)]
+            index.train(sample)
+        self.active_index_type = index_type
+        return index
+
+    @property
+    def dead_vectors(self) -> int:
+        """Removed vectors still inside an HNSW index."""
+        return self.index.ntotal - len(self.documents) if self.index is not None else 0
+
+    def _live_vectors(self):
+        int_ids = self.documents.int_ids()
+        return int_ids, self.index.reconstruct_batch(int_ids)
+
+    def rebuild(self, index_type: str = None):
+        """
+        Rebuild the index from the stored vectors, as `index_type` (default:
+        what `index_type` of the store asks for at the current size). Purges
+        removed HNSW vectors. IVF-PQ vectors are reconstructed from their
+        codes, so rebuilding from IVF-PQ is lossy.
+        """
+        if self.index is None:
+            return
+        index_type = index_type or self._target_type(len(self.documents))
+        started = time.perf_counter()
+        self._materialize_index()
+        if not len(self.documents):
+            self.index, self.active_index_type = None, None
+        else:
+            int_ids, vectors = self._live_vectors()
+            self.index = self._new_index(index_type, vectors)
+            self.index.add_with_ids(vectors, int_ids)
+        print(f"🧠 Rebuilt FAISS index as {index_type} ({len(self.documents)} vectors, {time.perf_counter() - started:.1f}s).")
+        if self.path:
+            self.compact()
+
+    def _maybe_reindex(self) -> bool:
+        """Move to the wanted index type once the corpus is large enough to train it."""
+        if self.index is None:
+            return False
+        wanted = self._target_type(len(self.documents))
+        if wanted != self.active_index_type and len(self.documents) >= MIN_TRAIN_SIZE[wanted]:
+            self.rebuild(wanted)
+            return True
+        return False
+
+    # --- search ---
+
+    def search(self, query: str, top_k=3, filter=None):
+        return [doc for _, doc, _ in self.search_with_scores(query, top_k, filter=filter)]
+
+    def _search_params(self, k: int, nprobe=None, ef_search=None, selector=None):
+        if self.active_index_type in ("ivf_flat", "ivf_pq"):
+            return faiss.SearchParametersIVF(nprobe=nprobe or self.nprobe, sel=selector)
+        if self.active_index_type == "hnsw":
+            return faiss.SearchParametersHNSW(efSearch=max(ef_search or self.ef_search, k), sel=selector)
+        return faiss.SearchParameters(sel=selector) if selector is not None else None
+
+    def search_with_scores(self, query: str, top_k=3, query_vec=None, nprobe=None, ef_search=None, filter=None):
+        """
+        Return [(doc_id, document, similarity)] for the `top_k` nearest documents.
+        Embeddings are normalized, so similarity is cosine: 1 - L2² / 2.
+        `nprobe` / `ef_search` override the store's query-time settings.
+        """
         if self.index is None:
             raise ValueError("❌ Index not built yet.")
-        query_vec = np.array(self.embed_text([query])).astype("float32")
-        distances, indices = self.index.search(query_vec, top_k)
-        results = [self.documents[i] for i in indices[0]]
+        if query_vec is None:
+            query_vec = self.embed_text([query])
+        hits = self.search_batch([query], top_k, filter=filter, query_vecs=np.reshape(query_vec, (1, -1)),
+                                 nprobe=nprobe, ef_search=ef_search)[0]
+        return [(hit.doc_id, hit.text, hit.score) for hit in hits]
+
+    def search_batch(self, queries: list, top_k=3, filter: dict = None, query_vecs=None,
+                     nprobe=None, ef_search=None) -> list:
+        """
+        Search many queries at once and return one list of SearchHit per
+        query. Queries are embedded in a single call and searched with a
+        single FAISS call. `filter` restricts every query to documents whose
+        metadata matches it (see DocumentTable.select), e.g.
+        {"session_id": "abc", "timestamp": {"gte": 1700000000}}.
+        """
+        if query_vecs is None:
+            query_vecs = self.embed_text(list(queries)) if len(queries) else np.zeros((0, 1))
+        query_vecs = np.array(query_vecs).astype("float32")
+        query_vecs = query_vecs.reshape(len(query_vecs), -1)
+        if self.index is None or not len(query_vecs):
+            return [[] for _ in range(len(query_vecs))]
+
+        if filter:
+            selected = self.documents.select(filter)
+            if len(selected) <= FILTER_EXACT_LIMIT:
+                distances, indices = self._exact_search(query_vecs, selected, top_k)
+            else:
+                k = min(top_k, len(selected))
+                selector = faiss.IDSelectorBatch(selected)
+                distances, indices = self.index.search(
+                    query_vecs, k, params=self._search_params(k, nprobe, ef_search, selector)
+                )
+        else:
+            k = min(top_k + self.dead_vectors, self.index.ntotal) or top_k
+            distances, indices = self.index.search(query_vecs, k, params=self._search_params(k, nprobe, ef_search))
+
+        results = []
+        for row_distances, row_indices in zip(distances, indices):
+            hits = []
+            for d, i in zip(row_distances, row_indices):
+                doc_id = self.documents.doc_id(int(i))
+                if doc_id is None:
+                    continue
+                hits.append(SearchHit(doc_id, self.documents.text(int(i)), 1.0 - float(d) / 2,
+                                      self.documents.metadata(int(i))))
+                if len(hits) == top_k:
+                    break
+            results.append(hits)
         return results
 
-    def save(self, path="vectorstore/"):
+    def _exact_search(self, query_vecs, int_ids, top_k):
+        """Brute-force L2 search restricted to `int_ids`, shaped like `index.search` output."""
+        n = min(top_k, len(int_ids))
+        if n == 0:
+            return np.zeros((len(query_vecs), 0), dtype="float32"), np.zeros((len(query_vecs), 0), dtype="int64")
+        vectors = self.index.reconstruct_batch(int_ids)
+        distances = (np.sum(query_vecs ** 2, axis=1)[:, None] - 2 * query_vecs @ vectors.T
+                     + np.sum(vectors ** 2, axis=1)[None, :])
+        order = np.argsort(distances, axis=1)[:, :n]
+        return np.take_along_axis(distances, order, axis=1), int_ids[order]
+
+    # --- persistence ---
+
+    @staticmethod
+    def _wal_path(path):
+        return os.path.join(path, "wal.jsonl")
+
+    def _log(self, records):
+        """Append records to the write-ahead log and fsync before they are applied."""
+        if not self.path:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        with open(self._wal_path(self.path), "a", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self._wal_entries += len(records)
+
+    def _truncate_wal(self):
+        os.makedirs(self.path, exist_ok=True)
+        open(self._wal_path(self.path), "w").close()
+        self._wal_entries = 0
+
+    def _maybe_compact(self):
+        if self.path and self._wal_entries >= self.compact_every:
+            self.compact()
+
+    def compact(self):
+        """Write a snapshot of the current state and empty the write-ahead log."""
+        if not self.path:
+            raise ValueError("❌ compact() needs a store opened with a path.")
+        if self.dead_vectors:
+            self.rebuild(self.active_index_type)  # rebuild() saves the snapshot itself
+            return
+        self.save(self.path)
+
+    def save(self, path=None):
+        """
+        Write a snapshot to `path` (default: the store's own path). Each
+        snapshot is a new directory; CURRENT is switched to it atomically,
+        so a crash mid-save leaves the previous snapshot in place.
+        """
+        path = path or self.path or "vectorstore/"
         os.makedirs(path, exist_ok=True)
         print("💾 Saving vectorstore to disk...")
-        faiss.write_index(self.index, os.path.join(path, "faiss.index"))
-        with open(os.path.join(path, "documents.pkl"), "wb") as f:
-            pickle.dump(self.documents, f)
+        previous = _read_current(path)
+        name = f"snapshot-{time.time_ns()}"
+        directory = os.path.join(path, name)
+        os.makedirs(directory)
+
+        index = self.index if self.index is not None else faiss.IndexIDMap2(faiss.IndexFlatL2(1))
+        faiss.write_index(index, os.path.join(directory, "faiss.index"))
+        self.documents.save(directory)
+        with open(os.path.join(directory, "store.json"), "w", encoding="utf-8") as f:
+            json.dump({"format": 2, "next_id": self._next_id, "index_type": self.active_index_type,
+                       "count": len(self.documents)}, f)
+        # The snapshot must be on disk before CURRENT points at it and the log that could rebuild it is gone
+        for file_name in os.listdir(directory):
+            _fsync_file(os.path.join(directory, file_name))
+        _fsync_dir(directory)
+        _fsync_dir(path)
 
-    def load(self, path="vectorstore/"):
+        with open(os.path.join(path, "CURRENT.tmp"), "w", encoding="utf-8") as f:
+            f.write(name)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(os.path.join(path, "CURRENT.tmp"), os.path.join(path, "CURRENT"))
+        _fsync_dir(path)  # makes the snapshot directory and the CURRENT rename durable
+        if previous:
+            # Open memory maps of the old files stay valid after the unlink
+            shutil.rmtree(os.path.join(path, previous), ignore_errors=True)
+
+        if path == self.path:
+            # The snapshot now contains everything the log recorded
+            self._truncate_wal()
+            self.documents = DocumentTable.open(directory)
+            if self._mapped_index_path:
+                self._mapped_index_path = os.path.join(directory, "faiss.index")
+
+    def load(self, path="vectorstore/", allow_pickle=False):
+        """
+        Open the snapshot at `path` memory-mapped and replay its write-ahead
+        log. Stores saved in the old pickle format are only read with
+        `allow_pickle=True` (trusted files only); save() then converts them.
+        """
         print("📂 Loading vectorstore from disk...")
-        faiss_path = os.path.join(path, "faiss.index")
-        docs_path = os.path.join(path, "documents.pkl")
+        wal_path = self._wal_path(path)
+        current = _read_current(path)
+        legacy = os.path.join(path, "documents.pkl")
+
+        if not current and not os.path.exists(legacy) and not os.path.exists(wal_path):
+            raise FileNotFoundError(f"FAISS index not found at {path}")
+
+        self._reset()
+        if current:
+            directory = os.path.join(path, current)
+            with open(os.path.join(directory, "store.json"), "r", encoding="utf-8") as f:
+                state = json.load(f)
+            self._next_id = state["next_id"]
+            self.active_index_type = state["index_type"]
+            self.documents = DocumentTable.open(directory)
+            if state["count"]:
+                index_path = os.path.join(directory, "faiss.index")
+                self.index = faiss.read_index(index_path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+                self._mapped_index_path = index_path
+        elif os.path.exists(legacy):
+            if not allow_pickle:
+                raise ValueError(
+                    f"❌ {legacy} is in the old pickle format. Load it once with allow_pickle=True "
+                    "(only for files you trust) and save() to convert it."
+                )
+            self._load_pickle(path)
+        self.path = path
+        self._replay(wal_path)
+
+    def _materialize_index(self):
+        """Swap a memory-mapped read-only index for an in-memory copy before modifying it."""
+        if self._mapped_index_path:
+            self.index = faiss.read_index(self._mapped_index_path)
+            self._mapped_index_path = None
+
+    def _load_pickle(self, path):
+        """Stores saved before the columnar format (pickled documents)."""
+        self.index = faiss.read_index(os.path.join(path, "faiss.index"))
+        with open(os.path.join(path, "documents.pkl"), "rb") as f:
+            state = pickle.load(f)
+        if isinstance(state, list):
+            # Before stable IDs: a plain IndexFlatL2 and a list of documents
+            vectors = self.index.reconstruct_n(0, self.index.ntotal)
+            self.index = None
+            self._apply_add([document_id(text) for text in state], state, vectors)
+            return
+        for doc_id, text in state["documents"].items():
+            self.documents.add(doc_id, state["int_ids"][doc_id], text)
+        self._next_id = state["next_id"]
+        self.active_index_type = state.get("index_type") or "flat"
+        if self.index.ntotal == 0:
+            self.index = None
+
+    def _replay(self, wal_path):
+        """
+        Apply the log on top of the snapshot. A torn final record (crash
+        mid-append) ends the replay and is cut off the file; otherwise the
+        next append would extend the partial line and every later record
+        would be lost on the following load.
+        """
+        if not os.path.exists(wal_path):
+            return
+        with open(wal_path, "rb+") as f:
+            good = 0  # byte offset just past the last complete record
+            for line in f:
+                try:
+                    if not line.endswith(b"\n"):
+                        raise ValueError("incomplete record")
+                    record = json.loads(line)
+                except ValueError:
+                    break  # torn write from a crash: everything before it is intact
+                good += len(line)
+                if record["op"] == "add":
+                    self._apply_add([record["id"]], [record["text"]], _decode_vector(record["vector"])[None, :],
+                                    [record.get("metadata")])
+                elif record["op"] == "metadata":
+                    self.documents.set_metadata(record["id"], record["metadata"])
+                else:
+                    self._apply_remove([record["id"]])
+                self._wal_entries += 1
+            if good < os.fstat(f.fileno()).st_size:
+                print(f"⚠️ Dropping a torn write-ahead log record after entry {self._wal_entries}.")
+                f.truncate(good)
+                f.flush()
+                os.fsync(f.fileno())
+        if self._wal_entries:
+            print(f"🔁 Replayed {self._wal_entries} write-ahead log entries.")
+
+
+def _read_current(path):
+    try:
+        with open(os.path.join(path, "CURRENT"), "r", encoding="utf-8") as f:
+            return f.read().strip() or None
+    except FileNotFoundError:
+        return None
+
+
+def _fsync_file(file_path):
+    with open(file_path, "rb") as f:
+        os.fsync(f.fileno())
+
+
+def _fsync_dir(path):
+    """Persist a directory's entries (new files, renames); not possible on Windows."""
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
 
-        if not os.path.exists(faiss_path):
-            raise FileNotFoundError(f"FAISS index not found at {faiss_path}")
-        if not os.path.exists(docs_path):
-            raise FileNotFoundError(f"Documents file not found at {docs_path}")
 
-        self.index = faiss.read_index(faiss_path)
-        with open(docs_path, "rb") as f:
-            self.documents = pickle.load(f)
+def _encode_vector(vector) -> str:
+    return base64.b64encode(np.asarray(vector, dtype="float32").tobytes()).decode("ascii")
 
 
+def _decode_vector(text: str):
+    return np.frombuffer(base64.b64decode(text), dtype="float32").copy()
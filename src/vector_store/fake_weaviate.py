@@ -0,0 +1,147 @@
+# src/vector_store/fake_weaviate.py
+
+import time
+import uuid
+import threading
+import numpy as np
+
+
+class FakeWeaviateClient:
+    """
+    In-process stand-in for the parts of `weaviate.Client` (v3 API) that
+    WeaviateAdapter uses: schema, data_object.create, the batch API and
+    near-vector queries. Lets tests and benchmarks run without a server.
+
+    Args:
+        latency (float): Seconds added to every simulated HTTP request.
+        reject: Optional data_object -> error message (or None), to make objects fail.
+    """
+
+    def __init__(self, latency: float = 0.0, reject=None):
+        self.latency = latency
+        self.reject = reject
+        self.classes = {}
+        self.objects = {}     # class name -> {uuid: (properties, vector)}
+        self.requests = 0
+        self._lock = threading.Lock()
+        self.schema = _FakeSchema(self)
+        self.data_object = _FakeDataObject(self)
+        self.batch = _FakeBatch(self)
+        self.query = _FakeQuery(self)
+
+    def _request(self):
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _store(self, data_object: dict, class_name: str, object_id=None, vector=None):
+        """Validate and store one object; return an error message instead of raising."""
+        if class_name not in self.classes:
+            return f"class '{class_name}' not found in schema"
+        error = self.reject(data_object) if self.reject else None
+        if error:
+            return error
+        with self._lock:
+            self.objects.setdefault(class_name, {})[object_id or str(uuid.uuid4())] = (dict(data_object), vector)
+        return None
+
+    def count(self, class_name: str) -> int:
+        return len(self.objects.get(class_name, {}))
+
+
+class _FakeSchema:
+    def __init__(self, client):
+        self._client = client
+
+    def contains(self, schema: dict) -> bool:
+        self._client._request()
+        return schema["class"] in self._client.classes
+
+    def create(self, schema: dict):
+        self._client._request()
+        for spec in schema["classes"]:
+            self._client.classes[spec["class"]] = spec
+
+
+class _FakeDataObject:
+    def __init__(self, client):
+        self._client = client
+
+    def create(self, data_object: dict, class_name: str, uuid=None, vector=None):
+        self._client._request()
+        error = self._client._store(data_object, class_name, uuid, vector)
+        if error:
+            raise ValueError(error)
+
+
+class _FakeBatch:
+    """The v3 batch context manager: objects are sent once per create_objects()/flush."""
+
+    def __init__(self, client):
+        self._client = client
+        self._pending = []
+        self.batch_size = None
+
+    def configure(self, batch_size=None, **kwargs):
+        self.batch_size = batch_size
+        return self
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.flush()
+
+    def add_data_object(self, data_object: dict, class_name: str, uuid=None, vector=None):
+        self._pending.append((data_object, class_name, uuid, vector))
+        if self.batch_size and len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def create_objects(self) -> list:
+        pending, self._pending = self._pending, []
+        if not pending:
+            return []
+        self._client._request()
+        results = []
+        for data_object, class_name, object_id, vector in pending:
+            error = self._client._store(data_object, class_name, object_id, vector)
+            result = {"errors": {"error": [{"message": error}]}} if error else {}
+            results.append({"class": class_name, "properties": data_object, "result": result})
+        return results
+
+    def flush(self):
+        self.create_objects()
+
+
+class _FakeQuery:
+    def __init__(self, client):
+        self._client = client
+
+    def get(self, class_name: str, properties: list):
+        return _FakeQueryBuilder(self._client, class_name, properties)
+
+
+class _FakeQueryBuilder:
+    def __init__(self, client, class_name, properties):
+        self._client = client
+        self._class_name = class_name
+        self._properties = properties
+        self._vector = None
+        self._limit = 10
+
+    def with_near_vector(self, near_vector: dict):
+        self._vector = np.asarray(near_vector["vector"], dtype="float32")
+        return self
+
+    def with_limit(self, limit: int):
+        self._limit = limit
+        return self
+
+    def do(self) -> dict:
+        self._client._request()
+        stored = list(self._client.objects.get(self._class_name, {}).values())
+        if self._vector is not None:
+            stored.sort(key=lambda item: -float(np.dot(np.asarray(item[1], dtype="float32"), self._vector)))
+        hits = [{name: props.get(name) for name in self._properties} for props, _ in stored[:self._limit]]
+        return {"data": {"Get": {self._class_name: hits}}}
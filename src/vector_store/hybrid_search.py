@@ -0,0 +1,285 @@
+# src/vector_store/hybrid_search.py
+
+import os
+import re
+import sys
+import math
+import heapq
+from collections import Counter
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.vector_store.faiss_index import VectorStore, SearchHit
+
+IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*|\d+")
+CAMEL_PART = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+")
+BM25_FILE = "bm25.npz"
+
+
+def tokenize(text: str) -> list[str]:
+    """
+    Lower-cased terms for BM25. Identifiers are kept whole and also split
+    into their snake_case / camelCase parts, so `get_user_by_id` matches
+    both itself and "user id", and `ValueError` matches "error".
+    """
+    terms = []
+    for word in IDENTIFIER.findall(text):
+        terms.append(word.lower())
+        parts = [p.lower() for chunk in word.split("_") for p in CAMEL_PART.findall(chunk)]
+        if len(parts) > 1:
+            terms.extend(part for part in parts if len(part) > 1)
+    return terms
+
+
+class BM25Index:
+    """
+    Incremental inverted index scored with Okapi BM25, keyed by the same
+    document IDs as the VectorStore. `save` writes the postings as
+    compressed CSR arrays (one .npz file) rather than per-document records.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}     # term -> {doc_id: term frequency}
+        self.doc_terms = {}    # doc_id -> {term: term frequency}, needed to remove a document
+        self.doc_lengths = {}  # doc_id -> number of terms
+        self.total_length = 0
+        self.watermark = 0     # VectorStore FAISS ids below this were indexed when last saved
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def __contains__(self, doc_id):
+        return doc_id in self.doc_lengths
+
+    def add(self, doc_id: str, text: str):
+        """Index `text` under `doc_id`, replacing what was indexed for it before."""
+        self.remove(doc_id)
+        self._add_terms(doc_id, Counter(tokenize(text)))
+
+    def _add_terms(self, doc_id: str, terms: dict):
+        self.doc_terms[doc_id] = terms
+        length = sum(terms.values())
+        self.doc_lengths[doc_id] = length
+        self.total_length += length
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+
+    def remove(self, doc_id: str) -> bool:
+        terms = self.doc_terms.pop(doc_id, None)
+        if terms is None:
+            return False
+        self.total_length -= self.doc_lengths.pop(doc_id)
+        for term in terms:
+            docs = self.postings[term]
+            del docs[doc_id]
+            if not docs:
+                del self.postings[term]
+        return True
+
+    def search(self, query: str, top_k: int = 10, allowed=None) -> list:
+        """Return [(doc_id, score)] for the `top_k` best BM25 matches, optionally only among `allowed` IDs."""
+        n = len(self.doc_lengths)
+        if not n:
+            return []
+        avg_length = self.total_length / n
+        scores = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                if allowed is not None and doc_id not in allowed:
+                    continue
+                norm = tf + self.k1 * (1 - self.b + self.b * self.doc_lengths[doc_id] / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
+    # --- persistence ---
+
+    def save(self, path: str, watermark: int = 0):
+        """Write the index to `path` atomically."""
+        doc_ids = list(self.doc_lengths)
+        position = {doc_id: i for i, doc_id in enumerate(doc_ids)}
+        terms = sorted(self.postings)
+        offsets = np.zeros(len(terms) + 1, dtype="int64")
+        docs, tfs = [], []
+        for i, term in enumerate(terms):
+            postings = self.postings[term]
+            docs.extend(position[doc_id] for doc_id in postings)
+            tfs.extend(postings.values())
+            offsets[i + 1] = len(docs)
+        term_blob, term_offsets = _pack(terms)
+        id_blob, id_offsets = _pack(doc_ids)
+
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "wb") as f:
+            np.savez_compressed(
+                f, k1=self.k1, b=self.b, watermark=watermark,
+                terms=term_blob, term_offsets=term_offsets,
+                doc_ids=id_blob, doc_id_offsets=id_offsets,
+                posting_offsets=offsets,
+                posting_docs=np.array(docs, dtype="int32"),
+                posting_tfs=np.array(tfs, dtype="int32"),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str):
+        with np.load(path) as data:
+            index = cls(float(data["k1"]), float(data["b"]))
+            index.watermark = int(data["watermark"])
+            terms = _unpack(data["terms"], data["term_offsets"])
+            doc_ids = _unpack(data["doc_ids"], data["doc_id_offsets"])
+            offsets, docs, tfs = data["posting_offsets"], data["posting_docs"].tolist(), data["posting_tfs"].tolist()
+        doc_terms = {doc_id: {} for doc_id in doc_ids}
+        for i, term in enumerate(terms):
+            for doc, tf in zip(docs[offsets[i]:offsets[i + 1]], tfs[offsets[i]:offsets[i + 1]]):
+                doc_terms[doc_ids[doc]][term] = tf
+        for doc_id, terms_of_doc in doc_terms.items():
+            index._add_terms(doc_id, terms_of_doc)
+        return index
+
+
+def _pack(strings: list):
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype="int64")
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack(blob, offsets) -> list:
+    data = blob.tobytes()
+    return [data[offsets[i]:offsets[i + 1]].decode("utf-8") for i in range(len(offsets) - 1)]
+
+
+class HybridSearchEngine:
+    """
+    Lexical + vector retrieval: a BM25 index kept next to the VectorStore's
+    FAISS index, both queried and fused with reciprocal rank fusion
+    (score = Σ 1 / (rrf_k + rank)). Exact identifiers and error strings are
+    found by BM25 even when the embedding misses them, so callers can ask
+    for a smaller `top_k`.
+
+    Same `search` / `search_batch` interface as SemanticSearchEngine. The
+    BM25 index is saved as `bm25.npz` in the store's directory; on load it
+    is reconciled with the store, so changes replayed from the store's
+    write-ahead log are picked up.
+
+    Args:
+        index_path (str): VectorStore directory (loaded if it exists).
+        model_name (str): Embedding model, when `vectorstore` is None.
+        vectorstore (VectorStore): Use this store instead of opening `index_path`.
+        rrf_k (int): Rank offset in the fusion formula; larger flattens the ranks.
+        depth (int): Minimum candidates fetched from each retriever before fusion.
+    """
+
+    def __init__(self, index_path="vectorstore/", model_name=None, vectorstore=None, rrf_k=60, depth=20):
+        self.index_path = index_path
+        self.vectorstore = vectorstore if vectorstore is not None else VectorStore(model_name=model_name, path=index_path)
+        self.rrf_k = rrf_k
+        self.depth = depth
+        self.bm25 = self._load_bm25()
+
+    def _bm25_path(self):
+        return os.path.join(self.vectorstore.path or self.index_path, BM25_FILE)
+
+    def _load_bm25(self) -> BM25Index:
+        """
+        Load the saved BM25 index and catch up with the store. Every add gets
+        a new, increasing FAISS id, so documents added or replaced since the
+        BM25 save are those at or above its watermark.
+        """
+        path = self._bm25_path()
+        bm25 = BM25Index.load(path) if os.path.exists(path) else BM25Index()
+        store, documents = self.vectorstore, self.vectorstore.documents
+        if bm25.watermark > store._next_id:
+            bm25 = BM25Index(bm25.k1, bm25.b)  # the store was rebuilt from scratch since
+        int_ids = documents.int_ids()
+        fresh = int_ids[int_ids >= bm25.watermark].tolist()
+        for int_id in fresh:
+            bm25.add(documents.doc_id(int_id), documents.text(int_id))
+        if len(bm25) != len(documents):
+            for doc_id in [doc_id for doc_id in bm25.doc_lengths if doc_id not in documents]:
+                bm25.remove(doc_id)
+        if fresh:
+            print(f"🔁 Indexed {len(fresh)} documents for BM25.")
+        return bm25
+
+    # --- indexing ---
+
+    def add_documents(self, documents: list[str], ids=None, metadata=None) -> list:
+        ids = self.vectorstore.add_documents(documents, ids=ids, metadata=metadata)
+        for doc_id, text in zip(ids, documents):
+            self.bm25.add(doc_id, text)
+        return ids
+
+    def remove_documents(self, ids) -> int:
+        for doc_id in ids:
+            self.bm25.remove(doc_id)
+        return self.vectorstore.remove_documents(ids)
+
+    def save(self):
+        """Snapshot the vector store and the BM25 index together."""
+        if not self.vectorstore.path:
+            self.vectorstore.path = self.index_path
+        self.vectorstore.save(self.vectorstore.path)
+        self.bm25.save(self._bm25_path(), watermark=self.vectorstore._next_id)
+
+    # --- search ---
+
+    def search(self, query: str, top_k: int = 3, filter: dict = None) -> list[str]:
+        print(f"🔍 Hybrid search for: {query}")
+        return [hit.text for hit in self.search_hits([query], top_k, filter)[0]]
+
+    def search_batch(self, queries: list[str], top_k: int = 3, filter: dict = None) -> list[list[dict]]:
+        print(f"🔍 Hybrid batch search for {len(queries)} queries")
+        return [[hit.to_dict() for hit in hits] for hits in self.search_hits(queries, top_k, filter)]
+
+    def search_hits(self, queries: list[str], top_k: int = 3, filter: dict = None) -> list:
+        """Fused results as SearchHit lists; `score` is the RRF score."""
+        depth = max(self.depth, 4 * top_k)
+        vector_hits = self.vectorstore.search_batch(queries, top_k=depth, filter=filter)
+        allowed = None
+        if filter:
+            documents = self.vectorstore.documents
+            allowed = {documents.doc_id(int(i)) for i in documents.select(filter)}
+
+        results = []
+        for query, hits in zip(queries, vector_hits):
+            lexical = self.bm25.search(query, top_k=depth, allowed=allowed)
+            fused = {}
+            for ranking in ([hit.doc_id for hit in hits], [doc_id for doc_id, _ in lexical]):
+                for rank, doc_id in enumerate(ranking, start=1):
+                    fused[doc_id] = fused.get(doc_id, 0.0) + 1.0 / (self.rrf_k + rank)
+            best = heapq.nlargest(top_k, fused.items(), key=lambda item: item[1])
+            known = {hit.doc_id: hit for hit in hits}
+            results.append([self._hit(doc_id, score, known.get(doc_id)) for doc_id, score in best])
+        return results
+
+    def _hit(self, doc_id: str, score: float, vector_hit=None) -> SearchHit:
+        if vector_hit is not None:
+            return SearchHit(doc_id, vector_hit.text, score, vector_hit.metadata)
+        documents = self.vectorstore.documents
+        int_id = documents.int_id(doc_id)
+        return SearchHit(doc_id, documents.text(int_id), score, documents.metadata(int_id))
+
+
+if __name__ == "__main__":
+    engine = HybridSearchEngine()
+
+    while True:
+        q = input("\n🧠 Enter your search query (or type 'exit'): ")
+        if q.strip().lower() == "exit":
+            break
+
+        try:
+            print("\n📌 Top Matches:")
+            for r in engine.search(q):
+                print("—" * 40)
+                print(r)
+        except Exception as e:
+            print(f"❌ Search failed: {e}")
@@ -0,0 +1,114 @@
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+import faiss
+
+# Allow root-level imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.vector_store.faiss_index import VectorStore, choose_index_type
+
+# (index type, query-time settings to try); every row is compared against exact flat search
+DEFAULT_CONFIGS = [
+    ("flat", [{}]),
+    ("hnsw", [{"ef_search": 16}, {"ef_search": 64}, {"ef_search": 256}]),
+    ("ivf_flat", [{"nprobe": 1}, {"nprobe": 8}, {"nprobe": 32}]),
+    ("ivf_pq", [{"nprobe": 8}, {"nprobe": 32}]),
+]
+
+
+def _no_embedding(texts):
+    raise ValueError("The benchmark supplies vectors directly.")
+
+
+def synthetic_corpus(n: int, dim: int, clusters: int = 100, seed: int = 0):
+    """Normalized vectors drawn around random centres, which is closer to real embeddings than uniform noise."""
+    rng = np.random.default_rng(seed)
+    centres = rng.normal(size=(clusters, dim)).astype("float32")
+    vectors = centres[rng.integers(0, clusters, n)] + 0.5 * rng.normal(size=(n, dim)).astype("float32")
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def index_bytes(index) -> int:
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def recall_at_k(found: list, truth: list, k: int) -> float:
+    return float(np.mean([len(set(f[:k]) & set(t[:k])) / k for f, t in zip(found, truth)]))
+
+
+def run_benchmark(vectors, queries, k: int = 10, configs=None) -> list:
+    """
+    Build a VectorStore per index type over `vectors`, query it with every
+    setting in `configs` and return one result dict per (type, setting):
+    recall@k against exact search, mean/p95 latency, build time and index size.
+    """
+    ids = [str(i) for i in range(len(vectors))]
+    texts = ids  # documents are irrelevant here, only IDs are compared
+    results, truth = [], None
+    for index_type, settings in configs or DEFAULT_CONFIGS:
+        store = VectorStore(embed_fn=_no_embedding, index_type=index_type)
+        started = time.perf_counter()
+        store.add_documents(texts, ids=ids, embeddings=vectors)
+        build_seconds = time.perf_counter() - started
+
+        for params in settings:
+            found, latencies = [], []
+            for query in queries:
+                started = time.perf_counter()
+                hits = store.search_with_scores(None, top_k=k, query_vec=query, **params)
+                latencies.append((time.perf_counter() - started) * 1000)
+                found.append([doc_id for doc_id, _, _ in hits])
+            if truth is None and store.active_index_type == "flat":
+                truth = found
+            results.append({
+                "index": store.active_index_type,
+                "params": params,
+                "recall": recall_at_k(found, truth, k) if truth is not None else None,
+                "mean_ms": round(float(np.mean(latencies)), 3),
+                "p95_ms": round(float(np.percentile(latencies, 95)), 3),
+                "build_s": round(build_seconds, 2),
+                "memory_mb": round(index_bytes(store.index) / 1e6, 1),
+            })
+    return results
+
+
+def print_results(results: list, k: int):
+    print(f"\n{'index':<10}{'params':<18}{f'recall@{k}':>10}{'mean ms':>10}{'p95 ms':>10}{'build s':>10}{'MB':>9}")
+    for r in results:
+        params = ", ".join(f"{key}={value}" for key, value in r["params"].items()) or "-"
+        recall = f"{r['recall']:.3f}" if r["recall"] is not None else "n/a"
+        print(f"{r['index']:<10}{params:<18}{recall:>10}{r['mean_ms']:>10}{r['p95_ms']:>10}{r['build_s']:>10}{r['memory_mb']:>9}")
+
+
+# CLI usage: python src/vector_store/index_benchmark.py --size 200000 --dim 384
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Recall@k vs latency and memory for each FAISS index type.")
+    parser.add_argument("--size", type=int, default=100_000, help="Corpus size (synthetic vectors)")
+    parser.add_argument("--dim", type=int, default=384, help="Vector dimension")
+    parser.add_argument("--store", default=None, help="Benchmark the vectors of a saved VectorStore instead")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("-k", type=int, default=10)
+    parser.add_argument("--out", default=None, help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    if args.store:
+        source = VectorStore(embed_fn=_no_embedding, path=args.store)
+        vectors = source._live_vectors()[1]
+    else:
+        vectors = synthetic_corpus(args.size, args.dim)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.choice(len(vectors), args.queries, replace=False)]
+    queries = queries + 0.05 * rng.normal(size=queries.shape).astype("float32")
+
+    print(f"📊 Benchmarking {len(vectors)} vectors of dim {vectors.shape[1]} "
+          f"(auto would choose {choose_index_type(len(vectors))})...")
+    results = run_benchmark(vectors, queries, k=args.k)
+    print_results(results, args.k)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.out}")
@@ -8,7 +8,7 @@ from vector_store.faiss_index import VectorStore
 
 
 class SemanticSearchEngine:
-    def __init__(self, index_path="vectorstore/", model_name="llama3-70b-8192"):
+    def __init__(self, index_path="vectorstore/", model_name=None):
         self.vectorstore = VectorStore(model_name=model_name)
         self.index_path = index_path
         self._load_vectorstore()
@@ -20,9 +20,19 @@ class SemanticSearchEngine:
         except Exception as e:
             print(f"❌ Failed to load vectorstore: {e}")
 
-    def search(self, query: str, top_k: int = 3) -> list[str]:
+    def search(self, query: str, top_k: int = 3, filter: dict = None) -> list[str]:
         print(f"🔍 Semantic search for: {query}")
-        return self.vectorstore.search(query, top_k=top_k)
+        return self.vectorstore.search(query, top_k=top_k, filter=filter)
+
+    def search_batch(self, queries: list[str], top_k: int = 3, filter: dict = None) -> list[list[dict]]:
+        """
+        Answer many queries with one embedding pass and one FAISS search.
+        Returns, per query, hits as {"doc_id", "text", "score", "metadata"};
+        `filter` matches document metadata, e.g. {"session_id": "abc"}.
+        """
+        print(f"🔍 Semantic batch search for {len(queries)} queries")
+        return [[hit.to_dict() for hit in hits]
+                for hits in self.vectorstore.search_batch(queries, top_k=top_k, filter=filter)]
 
 
 if __name__ == "__main__":
@@ -1,18 +1,67 @@
 # src/vector_store/weaviate_adapter.py
 
-import weaviate
-from sentence_transformers import SentenceTransformer
 import os
 import sys
+import time
+import atexit
+import threading
+from collections import deque
 
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
 
+from src.vector_store.embedding_service import get_embedding_service
+
+# weaviate-client is optional: tests and benchmarks pass FakeWeaviateClient instead
+try:
+    import weaviate
+except ImportError:
+    weaviate = None
+
+
 class WeaviateAdapter:
-    def __init__(self, weaviate_url="http://localhost:8080", model_name="llama3-70b-8192"):
-        print(f"🔌 Connecting to Weaviate at {weaviate_url}")
-        self.client = weaviate.Client(weaviate_url)
-        self.model = SentenceTransformer(model_name)
+    """
+    Weaviate store for code and context chunks ({"content", "source"}).
+
+    `add_documents` sends chunks through the batch API, `batch_size`
+    objects per request, and reports every object Weaviate rejected.
+    `enqueue` does the same from a background thread, which flushes once
+    `batch_size` chunks are queued or `flush_interval` seconds have passed,
+    so callers do not wait on embedding or the network; `flush` blocks
+    until the queue is empty. Rejected objects are kept in `failed`.
+
+    Args:
+        weaviate_url (str): Server to connect to when `client` is None.
+        model_name (str): Model of the shared embedding service.
+        client: A `weaviate.Client` or compatible object (e.g. FakeWeaviateClient).
+        batch_size (int): Objects per batch request.
+        flush_interval (float): Longest time queued chunks wait before being sent.
+    """
+
+    def __init__(self, weaviate_url="http://localhost:8080", model_name=None, client=None,
+                 batch_size=100, flush_interval=1.0, embedder=None):
+        if client is None:
+            if weaviate is None:
+                raise ImportError("weaviate-client is not installed.")
+            print(f"🔌 Connecting to Weaviate at {weaviate_url}")
+            client = weaviate.Client(weaviate_url)
+        self.client = client
+        # Shared with VectorStore: one model per process, cached embeddings
+        self.embedder = embedder or get_embedding_service(model_name)
         self.class_name = "CodeChunk"
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.failed = deque(maxlen=1000)
+        self.stats = {"added": 0, "failed": 0, "requests": 0}
+
+        self._client_lock = threading.Lock()   # the client's batch buffer is not thread-safe
+        self._cond = threading.Condition()
+        self._queue = []
+        self._in_flight = 0
+        self._flush_requested = False
+        self._closed = False
+        self._worker = None
+
+        self.client.batch.configure(batch_size=None)  # requests are sized and sent by this class
         self._ensure_schema()
 
     def _ensure_schema(self):
@@ -33,21 +82,148 @@ class WeaviateAdapter:
             self.client.schema.create(schema)
             print("✅ Schema created in Weaviate.")
 
-    def add_documents(self, chunks: list[dict]):
-        for chunk in chunks:
-            vector = self.model.encode(chunk["content"]).tolist()
-            self.client.data_object.create(
-                data_object={
-                    "content": chunk["content"],
-                    "source": chunk["source"]
-                },
-                class_name=self.class_name,
-                vector=vector
-            )
-        print(f"✅ Added {len(chunks)} documents to Weaviate.")
+    # --- ingestion ---
+
+    def add_documents(self, chunks: list[dict], batch_size: int = None) -> dict:
+        """
+        Embed and store `chunks` now, `batch_size` per request. Returns
+        {"added": n, "failed": [{"source", "content", "error"}, ...]}.
+        """
+        batch_size = batch_size or self.batch_size
+        report = {"added": 0, "failed": []}
+        for start in range(0, len(chunks), batch_size):
+            added, failed = self._send(chunks[start:start + batch_size])
+            report["added"] += added
+            report["failed"].extend(failed)
+        print(f"✅ Added {report['added']} documents to Weaviate.")
+        return report
+
+    def add_documents_individually(self, chunks: list[dict]) -> dict:
+        """One create request per chunk: the pre-batching path, kept as the benchmark baseline."""
+        vectors = self.embedder.embed([chunk["content"] for chunk in chunks])
+        report = {"added": 0, "failed": []}
+        for chunk, vector in zip(chunks, vectors):
+            try:
+                self.client.data_object.create(
+                    data_object=self._properties(chunk),
+                    class_name=self.class_name,
+                    vector=vector.tolist()
+                )
+                report["added"] += 1
+            except Exception as e:
+                report["failed"].append(self._failure(chunk, e))
+        self._record(len(chunks), report["added"], report["failed"])
+        print(f"✅ Added {report['added']} documents to Weaviate.")
+        return report
+
+    def _properties(self, chunk: dict) -> dict:
+        return {"content": chunk["content"], "source": chunk["source"]}
+
+    @staticmethod
+    def _failure(chunk: dict, error) -> dict:
+        return {"source": chunk.get("source"), "content": chunk["content"][:200], "error": str(error)}
+
+    def _send(self, chunks: list[dict]):
+        """Send one batch request; returns (added, failures). Never raises."""
+        try:
+            vectors = self.embedder.embed([chunk["content"] for chunk in chunks])
+            with self._client_lock:
+                with self.client.batch as batch:
+                    for chunk, vector in zip(chunks, vectors):
+                        batch.add_data_object(
+                            data_object=self._properties(chunk),
+                            class_name=self.class_name,
+                            vector=vector.tolist()
+                        )
+                    results = batch.create_objects() or []
+        except Exception as e:
+            failed = [self._failure(chunk, e) for chunk in chunks]
+            self._record(1, 0, failed)
+            return 0, failed
+
+        failed = []
+        for chunk, result in zip(chunks, results):
+            errors = ((result or {}).get("result") or {}).get("errors")
+            if errors:
+                messages = [error.get("message", "") for error in errors.get("error", [])]
+                failed.append(self._failure(chunk, "; ".join(messages) or errors))
+        added = len(chunks) - len(failed)
+        self._record(1, added, failed)
+        return added, failed
+
+    def _record(self, requests: int, added: int, failed: list):
+        with self._cond:
+            self.stats["requests"] += requests
+            self.stats["added"] += added
+            self.stats["failed"] += len(failed)
+            self.failed.extend(failed)
+        if failed:
+            print(f"⚠️ Weaviate rejected {len(failed)} objects, e.g. {failed[0]['error']}")
+
+    # --- background ingestion ---
+
+    def enqueue(self, chunks: list[dict]):
+        """Queue chunks for the background flusher and return immediately."""
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("❌ WeaviateAdapter is closed.")
+            self._queue.extend(chunks)
+            if self._worker is None:
+                self._worker = threading.Thread(target=self._flush_loop, name="weaviate-flush", daemon=True)
+                self._worker.start()
+            if len(self._queue) >= self.batch_size:
+                self._cond.notify_all()
+
+    def _flush_loop(self):
+        while True:
+            with self._cond:
+                deadline = time.monotonic() + self.flush_interval
+                while not (self._closed or self._flush_requested) and len(self._queue) < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._cond.wait(remaining)
+                if not self._queue:
+                    self._flush_requested = False
+                    self._cond.notify_all()
+                    if self._closed:
+                        return
+                    continue
+                batch, self._queue = self._queue[:self.batch_size], self._queue[self.batch_size:]
+                self._in_flight += 1
+            try:
+                self._send(batch)
+            finally:
+                with self._cond:
+                    self._in_flight -= 1
+                    self._cond.notify_all()
+
+    def flush(self, timeout: float = None) -> bool:
+        """Send everything queued; returns False if `timeout` ran out first."""
+        with self._cond:
+            if self._worker is None:
+                return True
+            self._flush_requested = True
+            self._cond.notify_all()
+            return self._cond.wait_for(lambda: not self._queue and not self._in_flight, timeout)
+
+    def close(self, timeout: float = None):
+        """Flush the queue and stop the background flusher."""
+        self.flush(timeout)
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        if self._worker is not None:
+            self._worker.join(timeout)
+
+    def get_stats(self) -> dict:
+        with self._cond:
+            return dict(self.stats, queued=len(self._queue) + self._in_flight)
+
+    # --- search ---
 
     def search(self, query: str, top_k=3) -> list[str]:
-        query_vector = self.model.encode(query).tolist()
+        query_vector = self.embedder.embed([query])[0].tolist()
         result = self.client.query.get(self.class_name, ["content", "source"]) \
             .with_near_vector({"vector": query_vector}) \
             .with_limit(top_k) \
@@ -56,9 +232,32 @@ class WeaviateAdapter:
         return [f"{hit['source']}:\n{hit['content']}" for hit in hits]
 
 
-# ✅ Wrapper used by orchestrator
-def store_context_vector(context_data: dict):
-    adapter = WeaviateAdapter()
+_adapters = {}
+_adapters_lock = threading.Lock()
+
+
+def get_weaviate_adapter(weaviate_url: str = None) -> WeaviateAdapter:
+    """
+    Return the process-wide WeaviateAdapter for `weaviate_url` (default
+    WEAVIATE_URL), connected and schema-checked once, configured from
+    WEAVIATE_BATCH_SIZE and WEAVIATE_FLUSH_INTERVAL. Its queue is flushed
+    at interpreter exit.
+    """
+    weaviate_url = weaviate_url or os.getenv("WEAVIATE_URL", "http://localhost:8080")
+    if weaviate_url not in _adapters:
+        with _adapters_lock:
+            if weaviate_url not in _adapters:
+                adapter = WeaviateAdapter(
+                    weaviate_url,
+                    batch_size=int(os.getenv("WEAVIATE_BATCH_SIZE", "100")),
+                    flush_interval=float(os.getenv("WEAVIATE_FLUSH_INTERVAL", "1.0")),
+                )
+                atexit.register(adapter.close, 30)
+                _adapters[weaviate_url] = adapter
+    return _adapters[weaviate_url]
+
+
+def flatten_context(context_data: dict) -> list[dict]:
     flattened = []
 
     for key, val in context_data.items():
@@ -71,6 +270,12 @@ def store_context_vector(context_data: dict):
             for subkey, subval in val.items():
                 flattened.append({"content": f"{key}.{subkey}: {subval}", "source": "context"})
 
-    adapter.add_documents(flattened)
+    return flattened
 
 
+# ✅ Wrapper used by orchestrator
+def store_context_vector(context_data: dict) -> int:
+    """Queue the flattened context on the shared adapter; returns how many chunks were queued."""
+    flattened = flatten_context(context_data)
+    get_weaviate_adapter().enqueue(flattened)
+    return len(flattened)
@@ -0,0 +1,98 @@
+import os
+import sys
+import json
+import time
+import argparse
+import numpy as np
+
+# Allow root-level imports
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "../..")))
+
+from src.vector_store.embedding_service import EmbeddingService
+from src.vector_store.fake_weaviate import FakeWeaviateClient
+from src.vector_store.weaviate_adapter import WeaviateAdapter
+
+
+def random_encoder(dim: int):
+    """Embedding stand-in, so the benchmark measures ingestion rather than the model."""
+    rng = np.random.default_rng(0)
+    return lambda texts: rng.normal(size=(len(texts), dim)).astype("float32")
+
+
+def synthetic_chunks(n: int) -> list[dict]:
+    return [{"content": f"def handler_{i}(request):\n    return process({i})", "source": f"app/module_{i % 50}.py"}
+            for i in range(n)]
+
+
+def run_ingest_benchmark(n: int = 2000, batch_sizes=(50, 100, 500), dim: int = 384,
+                         latency: float = 0.002, make_client=None) -> list:
+    """
+    Ingest `n` chunks through the per-object path, the batch path at each
+    batch size and the background queue, each into a fresh client from
+    `make_client` (default: FakeWeaviateClient with `latency` seconds per
+    request). Returns one result dict per path with docs/s and request count.
+    """
+    make_client = make_client or (lambda: FakeWeaviateClient(latency=latency))
+    chunks = synthetic_chunks(n)
+    runs = [("per_object", None)] + [("batch", size) for size in batch_sizes] + [("background", max(batch_sizes))]
+    results = []
+    for path, batch_size in runs:
+        adapter = WeaviateAdapter(client=make_client(), batch_size=batch_size or 100, flush_interval=0.05,
+                                  embedder=EmbeddingService("benchmark", encode_fn=random_encoder(dim)))
+        started = time.perf_counter()
+        if path == "per_object":
+            adapter.add_documents_individually(chunks)
+        elif path == "batch":
+            adapter.add_documents(chunks)
+        else:
+            for start in range(0, n, 10):  # many small producers, as with per-run context
+                adapter.enqueue(chunks[start:start + 10])
+            adapter.close()
+        seconds = time.perf_counter() - started
+        stats = adapter.get_stats()
+        results.append({
+            "path": path,
+            "batch_size": batch_size,
+            "docs_per_s": round(n / seconds, 1),
+            "seconds": round(seconds, 3),
+            "requests": stats["requests"],
+            "failed": stats["failed"],
+        })
+    return results
+
+
+def print_results(results: list):
+    print(f"\n{'path':<12}{'batch':>7}{'docs/s':>12}{'seconds':>10}{'requests':>10}{'failed':>8}")
+    for r in results:
+        print(f"{r['path']:<12}{r['batch_size'] or '-':>7}{r['docs_per_s']:>12}{r['seconds']:>10}"
+              f"{r['requests']:>10}{r['failed']:>8}")
+
+
+# CLI usage: python src/vector_store/weaviate_benchmark.py --size 5000 --latency 0.002
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Weaviate ingestion throughput: per-object vs batched.")
+    parser.add_argument("--size", type=int, default=2000, help="Chunks to ingest per path")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[50, 100, 500])
+    parser.add_argument("--dim", type=int, default=384, help="Vector dimension")
+    parser.add_argument("--latency", type=float, default=0.002, help="Simulated seconds per request (fake backend)")
+    parser.add_argument("--url", default=None, help="Benchmark a real Weaviate server instead of the fake")
+    parser.add_argument("--out", default=None, help="Also write the results as JSON")
+    args = parser.parse_args()
+
+    make_client = None
+    if args.url:
+        import weaviate
+
+        def make_client():
+            client = weaviate.Client(args.url)
+            if client.schema.contains({"class": "CodeChunk"}):
+                client.schema.delete_class("CodeChunk")  # each path starts from an empty class
+            return client
+
+    print(f"📊 Ingesting {args.size} chunks per path into {args.url or f'a fake backend ({args.latency * 1000:.1f} ms/request)'}...")
+    results = run_ingest_benchmark(args.size, args.batch_sizes, args.dim, args.latency, make_client)
+    print_results(results)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+        print(f"💾 Results written to {args.out}")
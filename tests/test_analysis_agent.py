@@ -0,0 +1,92 @@
+# tests/test_analysis_agent.py
+import asyncio
+import json
+import os
+import sys
+import unittest
+from unittest.mock import patch, MagicMock
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.agents import analysis_agent
+from src.core.http_client import HTTPStatusError
+from src.core.retry_handler import CircuitOpenError, RetryError
+
+CODE = "def add(a, b):\n    return a + b\n"
+
+
+class TestFusedAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        # Replace the standalone agents so fallbacks are observable and offline
+        self.fallbacks = {name: MagicMock(return_value=f"separate {name}") for name in analysis_agent.SECTIONS}
+        self.afallbacks = {}
+        for name in analysis_agent.SECTIONS:
+            async def afallback(code, name=name):
+                return f"separate async {name}"
+            self.afallbacks[name] = afallback
+        sections = {
+            name: (prompt, self.fallbacks[name], self.afallbacks[name])
+            for name, (prompt, _, _) in analysis_agent.SECTIONS.items()
+        }
+        patcher = patch.dict(analysis_agent.SECTIONS, sections)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_single_call_fans_out_sections(self):
+        answer = json.dumps({"review": "R", "security": "S", "performance": "P", "docs": "D"})
+        with patch.object(analysis_agent, "query_llm", return_value=answer) as query:
+            results = analysis_agent.run_fused_analysis(CODE)
+        self.assertEqual(results, {"review": "R", "security": "S", "performance": "P", "docs": "D"})
+        self.assertEqual(query.call_count, 1)
+        self.assertTrue(query.call_args.kwargs["json_mode"])
+        self.assertFalse(any(f.called for f in self.fallbacks.values()))
+
+    def test_invalid_json_falls_back_to_separate_calls(self):
+        with patch.object(analysis_agent, "query_llm", return_value="Sure! Here is my analysis..."):
+            results = analysis_agent.run_fused_analysis(CODE, sections=("security", "docs"))
+        self.assertEqual(results, {"security": "separate security", "docs": "separate docs"})
+        self.assertFalse(self.fallbacks["review"].called)
+
+    def test_missing_section_only_that_one_falls_back(self):
+        answer = "```json\n" + json.dumps({"security": "S", "performance": ""}) + "\n```"
+        with patch.object(analysis_agent, "query_llm", return_value=answer):
+            results = analysis_agent.run_fused_analysis(CODE, sections=("security", "performance"))
+        self.assertEqual(results, {"security": "S", "performance": "separate performance"})
+        self.assertFalse(self.fallbacks["security"].called)
+
+    def test_async_fallback(self):
+        async def fake_query(*args, **kwargs):
+            return json.dumps({"review": "R"})
+
+        with patch.object(analysis_agent, "async_query_llm", fake_query):
+            results = asyncio.run(analysis_agent.arun_fused_analysis(CODE, sections=("review", "docs")))
+        self.assertEqual(results, {"review": "R", "docs": "separate async docs"})
+
+    def test_failed_call_falls_back_to_separate_calls(self):
+        for error in (HTTPStatusError(503, "unavailable"), RetryError("gave up"), CircuitOpenError("open")):
+            with patch.object(analysis_agent, "query_llm", side_effect=error):
+                results = analysis_agent.run_fused_analysis(CODE, sections=("review", "docs"))
+            self.assertEqual(results, {"review": "separate review", "docs": "separate docs"})
+
+        async def failing_query(*args, **kwargs):
+            raise HTTPStatusError(500, "boom")
+
+        with patch.object(analysis_agent, "async_query_llm", failing_query):
+            results = asyncio.run(analysis_agent.arun_fused_analysis(CODE, sections=("security",)))
+        self.assertEqual(results, {"security": "separate async security"})
+
+    def test_large_code_skips_the_fused_call(self):
+        with patch.object(analysis_agent, "needs_chunking", return_value=True), \
+                patch.object(analysis_agent, "query_llm") as query:
+            results = analysis_agent.run_fused_analysis(CODE, sections=("review", "security"))
+        self.assertEqual(results, {"review": "separate review", "security": "separate security"})
+        self.assertFalse(query.called)
+
+    def test_unknown_section_rejected(self):
+        with self.assertRaises(ValueError):
+            analysis_agent.run_fused_analysis(CODE, sections=("lint",))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+# tests/test_batch_review_agent.py
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.agents import batch_review_agent
+from src.agents.batch_review_agent import batch_review, abatch_review, iter_source_files
+
+
+class FakeAgent:
+    """Records reviewed sources; fails on code containing 'FAIL'."""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, code):
+        with self._lock:
+            self.calls.append(code)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self._lock:
+            self.active -= 1
+        if "FAIL" in code:
+            raise ValueError("LLM did not return any choices")
+        return f"review of {code.strip()}"
+
+    async def acall(self, code):
+        return self(code)
+
+
+class TestBatchReview(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.root = os.path.join(tmp.name, "generated")
+        self.manifest = os.path.join(tmp.name, "manifest.json")
+        self.report = os.path.join(tmp.name, "report.jsonl")
+        self.write("app/main.py", "x = 1")
+        self.write("app/utils.py", "y = 2")
+        self.write("README.md", "# not python")
+        self.write("__pycache__/main.cpython-311.py", "ignored = True")
+        self.write("venv/lib/site.py", "ignored = True")
+
+        self.agent = FakeAgent()
+        modes = {"review": (self.agent, self.agent.acall, ("review prompt v1",))}
+        patcher = patch.dict(batch_review_agent.MODES, modes, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def write(self, rel_path, text):
+        path = os.path.join(self.root, rel_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def run_batch(self, **kwargs):
+        return batch_review(self.root, manifest_path=self.manifest, report_path=self.report, **kwargs)
+
+    def read_report(self):
+        with open(self.report, "r", encoding="utf-8") as f:
+            return {r["path"]: r for r in map(json.loads, f)}
+
+    def test_walk_uses_structure_builder_ignore_rules(self):
+        found = [os.path.relpath(p, self.root) for p in iter_source_files(self.root)]
+        self.assertEqual(found, [os.path.join("app", "main.py"), os.path.join("app", "utils.py")])
+
+    def test_writes_consolidated_jsonl_report(self):
+        summary = self.run_batch()
+        self.assertEqual((summary["reviewed"], summary["cached"], summary["error"]), (2, 0, 0))
+        records = self.read_report()
+        self.assertEqual(records[os.path.join("app", "main.py")]["report"], "review of x = 1")
+        self.assertEqual(records[os.path.join("app", "main.py")]["status"], "reviewed")
+
+    def test_unchanged_files_skipped_on_rerun(self):
+        self.run_batch()
+        self.write("app/utils.py", "y = 3")
+        summary = self.run_batch()
+        self.assertEqual((summary["reviewed"], summary["cached"]), (1, 1))
+        self.assertEqual(self.agent.calls[2:], ["y = 3"])
+        records = self.read_report()
+        self.assertEqual(records[os.path.join("app", "main.py")]["status"], "cached")
+        self.assertEqual(records[os.path.join("app", "main.py")]["report"], "review of x = 1")
+
+    def test_prompt_change_invalidates_manifest(self):
+        self.run_batch()
+        batch_review_agent.MODES["review"] = (self.agent, self.agent.acall, ("review prompt v2",))
+        summary = self.run_batch()
+        self.assertEqual(summary["reviewed"], 2)
+        self.assertEqual(len(self.agent.calls), 4)
+
+    def test_failed_files_retried_next_run(self):
+        self.write("app/broken.py", "FAIL = True")
+        summary = self.run_batch()
+        self.assertEqual(summary["error"], 1)
+        self.assertIn("ValueError", self.read_report()[os.path.join("app", "broken.py")]["error"])
+        summary = self.run_batch()
+        self.assertEqual((summary["cached"], summary["error"]), (2, 1))
+
+    def test_worker_pool_is_bounded(self):
+        for i in range(8):
+            self.write(f"pkg/mod_{i}.py", f"value = {i}")
+        self.agent.delay = 0.02
+        self.run_batch(workers=3)
+        self.assertEqual(len(self.agent.calls), 10)
+        self.assertLessEqual(self.agent.max_active, 3)
+        self.assertGreater(self.agent.max_active, 1)
+
+    def test_async_batch(self):
+        summary = asyncio.run(abatch_review(self.root, manifest_path=self.manifest, report_path=self.report))
+        self.assertEqual(summary["reviewed"], 2)
+        summary = self.run_batch()
+        self.assertEqual(summary["cached"], 2)
+
+
+class TestPromptVersion(unittest.TestCase):
+
+    def test_version_covers_every_chunked_analysis_input(self):
+        from src.agents import code_reviewer_agent, self_debugger_agent
+        for mode, module, prefix in (("review", code_reviewer_agent, "REVIEW"), ("debug", self_debugger_agent, "DEBUG")):
+            prompts = batch_review_agent.MODES[mode][2]
+            for constant in (getattr(module, f"{prefix}_ROLE"), getattr(module, f"{prefix}_FOCUS"),
+                             *getattr(module, f"{prefix}_HEADINGS")):
+                self.assertIn(constant, prompts)
+        self.assertNotEqual(batch_review_agent.prompt_version("review"), batch_review_agent.prompt_version("debug"))
+
+
+if __name__ == "__main__":
+    unittest.main()
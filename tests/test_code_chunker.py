@@ -0,0 +1,169 @@
+# tests/test_code_chunker.py
+import asyncio
+import json
+import os
+import re
+import sys
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.core.code_chunker import split_code
+from src.core.chunked_analysis import parse_findings, merge_findings, analyze_chunks, aanalyze_chunks
+from src.core.http_client import HTTPStatusError
+
+HEADINGS = ("🐞 **Bugs Found**", "🛠️ **Suggested Fixes**")
+
+
+def make_module(functions=30, body_lines=12):
+    lines = ["import os", "from typing import List", ""]
+    for i in range(functions):
+        lines.append(f"def func_{i}(values: List[int]) -> int:")
+        lines.extend(f"    total_{j} = sum(v * {j} for v in values)  # step {j}" for j in range(body_lines))
+        lines.append(f"    return total_0 + {i}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def covered_lines(chunks):
+    return [n for chunk in chunks for n in range(chunk.start_line, chunk.end_line + 1)]
+
+
+class TestSplitCode(unittest.TestCase):
+
+    def test_chunks_cover_every_line_once(self):
+        code = make_module()
+        chunks = split_code(code, max_tokens=400)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(covered_lines(chunks), list(range(1, len(code.splitlines()) + 1)))
+
+    def test_splits_at_function_boundaries(self):
+        code = make_module()
+        lines = code.splitlines()
+        for chunk in split_code(code, max_tokens=400)[1:]:
+            first_code_line = next(line for line in chunk.source.splitlines() if line.strip())
+            self.assertTrue(first_code_line.startswith("def "), chunk)
+            self.assertEqual(chunk.source.splitlines()[0], lines[chunk.start_line - 1])
+
+    def test_imports_shared_as_context(self):
+        chunks = split_code(make_module(), max_tokens=400)
+        self.assertEqual(chunks[0].context, [])  # the first chunk contains the imports itself
+        for chunk in chunks[1:]:
+            self.assertEqual(chunk.context, [(1, "import os"), (2, "from typing import List")])
+            self.assertIn("1 | import os", chunk.numbered())
+
+    def test_large_class_split_by_method_with_signature(self):
+        methods = "\n".join(
+            f"    def method_{i}(self):\n" + "\n".join(f"        self.value_{j} = {j} * {i}" for j in range(15))
+            for i in range(12)
+        )
+        code = f"import os\n\n\nclass Big(object):\n    \"\"\"A big class.\"\"\"\n{methods}\n"
+        chunks = split_code(code, max_tokens=300)
+        self.assertGreater(len(chunks), 2)
+        self.assertEqual(covered_lines(chunks), list(range(1, len(code.splitlines()) + 1)))
+        self.assertIn((4, "class Big(object):"), chunks[-1].context)
+        self.assertTrue(chunks[-1].name.startswith("Big.method_"))
+
+    def test_syntax_error_falls_back_to_lines(self):
+        code = "\n".join(f"x_{i} = (" if i % 10 == 0 else f"value_{i} = {i} * 3" for i in range(200))
+        chunks = split_code(code, max_tokens=200)
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(covered_lines(chunks), list(range(1, 201)))
+
+
+class TestChunkedAnalysis(unittest.TestCase):
+
+    def setUp(self):
+        self.code = make_module()
+        self.chunks = split_code(self.code, max_tokens=400)
+
+    def test_line_numbers_validated_against_chunk(self):
+        chunk = self.chunks[1]
+        answer = json.dumps({"findings": [
+            {"line": chunk.start_line + 1, "severity": "HIGH", "issue": "Bug", "fix": "Fix it"},
+            {"line": 9999, "severity": "low", "issue": "Hallucinated", "fix": ""},
+            {"line": 1, "severity": "low", "issue": "Unused import", "fix": ""},
+        ]})
+        findings = parse_findings(f"```json\n{answer}\n```", chunk)
+        self.assertEqual([f["line"] for f in findings], [chunk.start_line + 1, None, 1])
+        self.assertEqual(findings[0]["severity"], "high")
+
+    def test_merge_deduplicates_shared_context_findings(self):
+        findings = [
+            {"line": 1, "severity": "low", "issue": "Unused import `os`.", "fix": "", "chunk": "a"},
+            {"line": 1, "severity": "medium", "issue": "unused import os", "fix": "", "chunk": "b"},
+            {"line": 20, "severity": "high", "issue": "Off by one", "fix": "", "chunk": "b"},
+        ]
+        merged = merge_findings(findings)
+        self.assertEqual([(f["line"], f["severity"]) for f in merged], [(1, "medium"), (20, "high")])
+
+    def _fake_llm(self, delay):
+        def fake_query_llm(prompt, system_prompt=None, json_mode=False, **kwargs):
+            time.sleep(delay)
+            # Report one bug on the first analysed line plus the shared import
+            section = prompt.split("# --- analysed section ---")[-1]
+            first = int(re.search(r"^\s*(\d+) \|", section, re.M).group(1))
+            return json.dumps({"findings": [
+                {"line": first, "severity": "medium", "issue": f"Bug at {first}", "fix": "Fix"},
+                {"line": 1, "severity": "low", "issue": "Unused import os", "fix": "Remove it"},
+            ]})
+
+        return fake_query_llm
+
+    def test_findings_mapped_to_original_lines(self):
+        with patch("src.core.chunked_analysis.query_llm", self._fake_llm(0)), \
+                patch("src.core.chunked_analysis.chunk_tokens", return_value=400):
+            report = analyze_chunks(self.code, "test", "You are a tester.", "bugs", HEADINGS, workers=4)
+        for chunk in self.chunks:
+            self.assertIn(f"- Line {chunk.start_line} (medium): Bug at {chunk.start_line}", report)
+        self.assertEqual(report.count("Unused import os"), 1)
+        self.assertTrue(report.startswith("1. 🐞 **Bugs Found**:"))
+
+    def test_invalid_chunk_answer_reported(self):
+        with patch("src.core.chunked_analysis.query_llm", return_value="not json"), \
+                patch("src.core.chunked_analysis.chunk_tokens", return_value=400):
+            report = analyze_chunks(self.code, "test", "You are a tester.", "bugs", HEADINGS, workers=2)
+        self.assertIn("⚠️ Not analysed", report)
+
+    def test_failed_chunk_call_keeps_other_findings(self):
+        fake_llm, failing = self._fake_llm(0), self.chunks[1]
+
+        def flaky_llm(prompt, **kwargs):
+            if re.search(rf"^\s*{failing.start_line} \|", prompt, re.M):
+                raise HTTPStatusError(503, "overloaded")
+            return fake_llm(prompt, **kwargs)
+
+        async def aflaky_llm(prompt, **kwargs):
+            return flaky_llm(prompt, **kwargs)
+
+        with patch("src.core.chunked_analysis.query_llm", flaky_llm), \
+                patch("src.core.chunked_analysis.async_query_llm", aflaky_llm), \
+                patch("src.core.chunked_analysis.chunk_tokens", return_value=400):
+            reports = [analyze_chunks(self.code, "test", "You are a tester.", "bugs", HEADINGS, workers=2),
+                       asyncio.run(aanalyze_chunks(self.code, "test", "You are a tester.", "bugs", HEADINGS))]
+        for report in reports:
+            self.assertIn(f"lines {failing.start_line}-{failing.end_line} (HTTPStatusError)", report)
+            self.assertIn(f"Bug at {self.chunks[0].start_line}", report)
+            self.assertNotIn(f"Bug at {failing.start_line}\n", report)
+
+        with patch("src.core.chunked_analysis.query_llm", side_effect=HTTPStatusError(503, "down")), \
+                patch("src.core.chunked_analysis.chunk_tokens", return_value=400):
+            with self.assertRaises(HTTPStatusError):
+                analyze_chunks(self.code, "test", "You are a tester.", "bugs", HEADINGS, workers=2)
+
+    def test_throughput_scales_with_workers(self):
+        timings = {}
+        for workers in (1, 4):
+            with patch("src.core.chunked_analysis.query_llm", self._fake_llm(0.05)), \
+                    patch("src.core.chunked_analysis.chunk_tokens", return_value=400):
+                start = time.perf_counter()
+                analyze_chunks(self.code, "test", "You are a tester.", "bugs", HEADINGS, workers=workers)
+                timings[workers] = time.perf_counter() - start
+        self.assertGreaterEqual(len(self.chunks), 4)
+        self.assertLess(timings[4], timings[1] / 2.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
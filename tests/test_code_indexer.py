@@ -0,0 +1,143 @@
+# tests/test_code_indexer.py
+import os
+import re
+import sys
+import tempfile
+import textwrap
+import unittest
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.vector_store.code_indexer import CodeIndexer, extract_definitions
+from src.vector_store.faiss_index import VectorStore
+
+
+class CountingEmbedder:
+    def __init__(self):
+        self.embedded = 0
+
+    def __call__(self, texts):
+        self.embedded += len(texts)
+        vectors = np.zeros((len(texts), 64), dtype="float32")
+        for row, text in enumerate(texts):
+            for word in re.findall(r"[a-z]+", text.lower()):
+                vectors[row, sum(map(ord, word)) % 64] += 1
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+
+
+APP = textwrap.dedent('''
+    """Todo service."""
+    import json
+
+    MAX_TODOS = 100
+
+
+    def load_todos(path):
+        """Read todos from a JSON file."""
+        with open(path) as f:
+            return json.load(f)
+
+
+    class TodoStore:
+        """In-memory todo storage."""
+
+        def __init__(self):
+            self.items = []
+
+        @property
+        def count(self):
+            return len(self.items)
+
+        def add(self, title):
+            """Append a todo."""
+            self.items.append(title)
+''').lstrip()
+
+
+class TestExtractDefinitions(unittest.TestCase):
+
+    def test_functions_and_classes_with_spans_and_docstrings(self):
+        chunks = {c.name: c for c in extract_definitions(APP)}
+        self.assertEqual(list(chunks), ["<module>", "load_todos", "TodoStore"])
+        self.assertEqual((chunks["load_todos"].start_line, chunks["load_todos"].end_line), (7, 10))
+        self.assertEqual(chunks["load_todos"].docstring, "Read todos from a JSON file.")
+        self.assertEqual(chunks["<module>"].source.splitlines(), ['"""Todo service."""', "import json", "MAX_TODOS = 100"])
+
+    def test_large_classes_are_indexed_by_method(self):
+        chunks = {c.name: c for c in extract_definitions(APP, max_tokens=30)}
+        self.assertIn("TodoStore.add", chunks)
+        self.assertEqual(chunks["TodoStore.count"].kind, "method")
+        self.assertEqual(chunks["TodoStore.count"].start_line, 19)  # the decorator line
+        outline = chunks["TodoStore"].source
+        self.assertIn("def add(self, title): ...", outline)
+        self.assertNotIn("self.items.append", outline)
+
+    def test_unparseable_code_falls_back_to_lines(self):
+        chunks = extract_definitions("def broken(:\n    pass\n")
+        self.assertEqual([c.kind for c in chunks], ["lines"])
+
+
+class TestCodeIndexer(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.project = os.path.join(tmp.name, "todo_app")
+        os.makedirs(os.path.join(self.project, "__pycache__"))
+        self.write("app.py", APP)
+        self.write("util.py", "def slugify(text):\n    return text.lower().replace(' ', '-')\n")
+        self.write("__pycache__/app.py", "def ignored():\n    pass\n")
+        self.embedder = CountingEmbedder()
+        self.store_path = os.path.join(tmp.name, "index")
+
+    def write(self, rel_path, text):
+        with open(os.path.join(self.project, rel_path), "w", encoding="utf-8") as f:
+            f.write(text)
+
+    def indexer(self):
+        return CodeIndexer(VectorStore(embed_fn=self.embedder, path=self.store_path))
+
+    def test_reindexing_only_embeds_what_changed(self):
+        stats = self.indexer().index(self.project)
+        self.assertEqual((stats["files"], stats["chunks"], stats["embedded"]), (2, 4, 4))
+
+        # A fresh process: unchanged files are skipped without embedding anything
+        stats = self.indexer().index(self.project)
+        self.assertEqual((stats["unchanged_files"], stats["embedded"]), (2, 0))
+        self.assertEqual(self.embedder.embedded, 4)
+
+        # Moving a function only updates its line numbers; editing one re-embeds just that one
+        self.write("app.py", "\n\n" + APP.replace("return json.load(f)", "return json.load(f) or []"))
+        indexer = self.indexer()
+        stats = indexer.index(self.project)
+        self.assertEqual((stats["embedded"], stats["removed"]), (1, 1))
+        hit = indexer.search("todo storage append title", top_k=1)[0]
+        self.assertEqual((hit.metadata["name"], hit.metadata["start_line"]), ("TodoStore", 15))
+        self.assertEqual(hit.metadata["source"], "app.py")
+        self.assertEqual(len(indexer.store), 4)
+
+    def test_deleted_files_are_removed(self):
+        indexer = self.indexer()
+        indexer.index(self.project)
+        os.remove(os.path.join(self.project, "util.py"))
+        stats = indexer.index(self.project)
+        self.assertEqual(stats["removed"], 1)
+        self.assertEqual(sorted(hit.metadata["name"] for hit in indexer.search("slugify", top_k=10)),
+                         ["<module>", "TodoStore", "load_todos"])
+        self.assertEqual(indexer.search("slugify", project="other_project"), [])
+
+    def test_in_memory_source_is_indexed_without_pruning_the_project(self):
+        indexer = self.indexer()
+        indexer.index(self.project)
+        stats = indexer.index_source("def render(todos):\n    return len(todos)\n", "todo_app", "view.py")
+        self.assertEqual((stats["files"], stats["removed"]), (1, 0))
+        self.assertEqual(indexer.search("render todos", top_k=1)[0].metadata["source"], "view.py")
+        self.assertEqual(len(indexer.store), 5)
+        self.assertEqual(indexer.index_source("def render(todos):\n    return len(todos)\n", "todo_app",
+                                              "view.py")["embedded"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
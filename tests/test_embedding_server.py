@@ -0,0 +1,116 @@
+# tests/test_embedding_server.py
+import os
+import sys
+import socket
+import threading
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.vector_store import embedding_service
+from src.vector_store.embedding_service import EmbeddingService
+from src.vector_store.embedding_server import EmbeddingServer, EmbeddingClient, EmbeddingServerError
+
+
+def fake_vectors(texts):
+    return np.array([[len(text), text.count(" ") + 1, 1.0] for text in texts], dtype="float32")
+
+
+class FakeModel:
+    def __init__(self, name):
+        self.name = name
+
+    def encode(self, texts, **kwargs):
+        return fake_vectors(texts)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class TestEmbeddingServer(unittest.TestCase):
+
+    def setUp(self):
+        self.calls = []
+
+        def encode(model_name, texts):
+            self.calls.append((model_name, len(texts)))
+            if model_name == "missing-model":
+                raise ImportError("sentence-transformers is not installed.")
+            return fake_vectors(texts)
+
+        self.server = EmbeddingServer(port=0, encode_fn=encode, max_wait=0.05).start()
+        self.addCleanup(self.server.stop)
+        self.client = EmbeddingClient(self.server.url)
+
+    def test_round_trip_returns_normalized_vectors(self):
+        vectors = self.client.encode("m", ["a b", "hello"])
+        expected = fake_vectors(["a b", "hello"])
+        np.testing.assert_allclose(vectors, expected / np.linalg.norm(expected, axis=1, keepdims=True), rtol=1e-6)
+        self.assertEqual(self.client.encode("m", []).shape[0], 0)
+        self.assertIn("m", self.client.health()["models"])
+
+    def test_concurrent_requests_share_model_calls(self):
+        results = {}
+        threads = [threading.Thread(target=lambda i=i: results.update({i: self.client.encode("m", [f"text {i}"])}))
+                   for i in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(results), 8)
+        self.assertEqual(sum(size for _, size in self.calls), 8)
+        self.assertLess(len(self.calls), 8)
+        np.testing.assert_allclose(results[3], self.client.encode("m", ["text 3"]))
+
+    def test_errors_are_reported_to_the_client(self):
+        with self.assertRaises(EmbeddingServerError) as ctx:
+            self.client.encode("missing-model", ["x"])
+        self.assertIn("503", str(ctx.exception))
+
+    def test_service_uses_server_instead_of_loading_the_model(self):
+        service = EmbeddingService("m", client=self.client)
+        with patch.object(embedding_service, "load_model", side_effect=AssertionError("model loaded in process")):
+            service.load()
+            vectors = service.embed(["one", "two words"])
+        self.assertEqual(vectors.shape, (2, 3))
+        self.assertEqual(service.get_stats()["remote_batches"], 1)
+
+
+class TestFallback(unittest.TestCase):
+
+    def test_falls_back_to_in_process_model_when_server_is_down(self):
+        client = EmbeddingClient(f"http://127.0.0.1:{free_port()}", retry_interval=60)
+        service = EmbeddingService("fallback-model", client=client)
+        with patch.object(embedding_service, "SentenceTransformer", FakeModel), \
+                patch.dict(embedding_service._models, clear=True), \
+                patch.object(client, "health", wraps=client.health) as health:
+            service.load()
+            vectors = service.embed(["one", "two words"])
+            service.embed(["three"])
+            self.assertEqual(health.call_count, 1)  # a down server is not retried on every call
+            self.assertIn("fallback-model", embedding_service._models)
+        self.assertEqual(vectors.shape, (2, 3))
+        self.assertEqual(service.get_stats()["remote_batches"], 0)
+
+    def test_server_failure_mid_session_falls_back(self):
+        server = EmbeddingServer(port=0, encode_fn=lambda model_name, texts: fake_vectors(texts)).start()
+        client = EmbeddingClient(server.url)
+        service = EmbeddingService("m", client=client)
+        service.embed(["before"])
+        server.stop()
+        with patch.object(embedding_service, "SentenceTransformer", FakeModel), \
+                patch.dict(embedding_service._models, clear=True):
+            vectors = service.embed(["after the stop"])
+        self.assertEqual(vectors.shape, (1, 3))
+        self.assertFalse(client.available())
+        self.assertEqual(service.get_stats()["remote_batches"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+# tests/test_embedding_service.py
+import os
+import sys
+import tempfile
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.vector_store import embedding_service
+from src.vector_store.embedding_service import EmbeddingCache, EmbeddingService, get_embedding_service
+from src.vector_store.faiss_index import VectorStore
+
+
+class FakeEncoder:
+    """Records batch sizes; returns unnormalized vectors derived from the text."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, texts):
+        self.batches.append(len(texts))
+        return np.array([[len(t), sum(map(ord, t)) % 97, 1.0, 2.0] for t in texts], dtype="float32")
+
+
+class TestEmbeddingService(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.cache_path = os.path.join(tmp.name, "embeddings.sqlite3")
+        self.encoder = FakeEncoder()
+
+    def make_service(self, dtype="float32", batch_size=4):
+        return EmbeddingService("fake-model", batch_size=batch_size,
+                                cache=EmbeddingCache(self.cache_path, dtype), encode_fn=self.encoder)
+
+    def test_batches_and_deduplicates(self):
+        service = self.make_service()
+        texts = [f"chunk {i}" for i in range(10)] + ["chunk 0", "chunk 1"]
+        vectors = service.embed(texts)
+        self.assertEqual(vectors.shape, (12, 4))
+        self.assertEqual(self.encoder.batches, [4, 4, 2])
+        np.testing.assert_allclose(np.linalg.norm(vectors, axis=1), 1.0, rtol=1e-5)
+        np.testing.assert_array_equal(vectors[0], vectors[10])
+
+    def test_disk_cache_survives_new_instances(self):
+        first = self.make_service().embed(["def foo(): pass", "class Bar: pass"])
+        service = self.make_service()
+        second = service.embed(["def foo(): pass", "class Bar: pass", "new text"])
+        self.assertEqual(self.encoder.batches, [2, 1])
+        np.testing.assert_array_equal(first, second[:2])
+        self.assertEqual(service.get_stats()["cache_hits"], 2)
+
+    def test_cache_key_includes_model(self):
+        self.make_service().embed(["same text"])
+        other = EmbeddingService("other-model", cache=EmbeddingCache(self.cache_path), encode_fn=self.encoder)
+        other.embed(["same text"])
+        self.assertEqual(self.encoder.batches, [1, 1])
+
+    def test_float16_storage(self):
+        exact = self.make_service().embed(["text"])
+        os.remove(self.cache_path)
+        service = self.make_service(dtype="float16")
+        service.embed(["text"])
+        cached = self.make_service(dtype="float16").embed(["text"])
+        self.assertEqual(cached.dtype, np.float32)
+        np.testing.assert_allclose(cached, exact, atol=1e-3)
+        blob = service.cache._conn.execute("SELECT vector FROM embeddings").fetchone()[0]
+        self.assertEqual(len(blob), 4 * 2)
+
+    def test_shared_service_and_model(self):
+        with patch.dict(os.environ, {"EMBEDDING_CACHE_PATH": ""}), patch.dict(embedding_service._services, clear=True):
+            service = get_embedding_service("shared-model")
+            self.assertIs(get_embedding_service("shared-model"), service)
+            self.assertIsNone(service.cache)
+            store = VectorStore(model_name="shared-model")
+            self.assertIs(store.embed_fn, service)
+
+        loads = []
+        with patch.object(embedding_service, "SentenceTransformer", side_effect=lambda name: loads.append(name)), \
+                patch.dict(embedding_service._models, clear=True):
+            embedding_service.load_model("m")
+            embedding_service.load_model("m")
+        self.assertEqual(loads, ["m"])
+
+
+if __name__ == "__main__":
+    unittest.main()
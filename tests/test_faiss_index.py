@@ -0,0 +1,319 @@
+# tests/test_faiss_index.py
+import os
+import pickle
+import re
+import sys
+import tempfile
+import unittest
+
+import faiss
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from unittest.mock import patch
+
+from src.vector_store import faiss_index
+from src.vector_store.faiss_index import VectorStore, document_id, choose_index_type
+from src.vector_store.index_benchmark import synthetic_corpus, run_benchmark
+
+
+class CountingEmbedder:
+    """Hashed bag-of-words vectors; counts how many texts were embedded."""
+
+    def __init__(self):
+        self.embedded = 0
+
+    def __call__(self, texts):
+        self.embedded += len(texts)
+        vectors = np.zeros((len(texts), 32), dtype="float32")
+        for row, text in enumerate(texts):
+            for word in re.findall(r"[a-z]+", text.lower()):
+                vectors[row, sum(map(ord, word)) % 32] += 1
+        return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+
+
+DOCS = ["flask web server routes", "pandas dataframe cleaning", "docker image build", "pytest unit tests"]
+
+
+class TestIncrementalIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.embedder = CountingEmbedder()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "store")
+
+    def test_add_embeds_only_the_delta(self):
+        store = VectorStore(embed_fn=self.embedder)
+        ids = store.add_documents(DOCS)
+        self.assertEqual(ids, [document_id(d) for d in DOCS])
+        store.add_documents(DOCS + ["streamlit dashboard ui"])
+        self.assertEqual(self.embedder.embedded, 5)
+        self.assertEqual(len(store), 5)
+        self.assertEqual(store.search("dashboard ui streamlit", top_k=1), ["streamlit dashboard ui"])
+
+    def test_remove_and_replace_by_stable_id(self):
+        store = VectorStore(embed_fn=self.embedder)
+        store.add_documents(DOCS, ids=["a", "b", "c", "d"])
+        self.assertEqual(store.remove_documents(["b", "missing"]), 1)
+        self.assertNotIn("pandas dataframe cleaning", store.search("pandas dataframe cleaning", top_k=4))
+        store.add_documents(["kubernetes deployment manifests"], ids=["c"])
+        self.assertEqual(store.index.ntotal, 3)
+        hit = store.search_with_scores("kubernetes deployment", top_k=1)[0]
+        self.assertEqual(hit[0], "c")
+        self.assertGreater(hit[2], 0.5)
+
+    def test_write_ahead_log_survives_crash(self):
+        store = VectorStore(embed_fn=self.embedder, path=self.path)
+        store.add_documents(DOCS[:2], ids=["a", "b"])
+        store.remove_documents(["a"])
+        store.add_documents(DOCS[2:], ids=["c", "d"])
+        # No save(): a new process only has the log, plus a torn final line
+        with open(os.path.join(self.path, "wal.jsonl"), "a") as f:
+            f.write('{"op": "add", "id": "x", "te')
+        embedded = self.embedder.embedded
+
+        reopened = VectorStore(embed_fn=self.embedder, path=self.path)
+        self.assertEqual(sorted(reopened.documents), ["b", "c", "d"])
+        self.assertEqual(self.embedder.embedded, embedded)  # vectors come from the log
+        self.assertEqual(reopened.search("docker image build", top_k=1), ["docker image build"])
+
+    def test_writes_after_a_torn_record_survive_the_next_reload(self):
+        store = VectorStore(embed_fn=self.embedder, path=self.path)
+        store.add_documents(DOCS[:2], ids=["a", "b"])
+        with open(os.path.join(self.path, "wal.jsonl"), "a") as f:
+            f.write('{"op": "add", "id": "x", "te')
+
+        reopened = VectorStore(embed_fn=self.embedder, path=self.path)
+        reopened.add_documents(DOCS[2:3], ids=["c"])
+        self.assertEqual(len(reopened.documents), 3)
+        again = VectorStore(embed_fn=self.embedder, path=self.path)
+        self.assertEqual(sorted(again.documents), ["a", "b", "c"])
+
+    def test_rejected_embeddings_are_not_logged(self):
+        store = VectorStore(embed_fn=self.embedder, path=self.path)
+        store.add_documents(DOCS[:2], ids=["a", "b"])
+        with self.assertRaises(ValueError):
+            store.add_documents(["wrong size"], ids=["x"], embeddings=np.ones((1, 8), dtype="float32"))
+        with self.assertRaises(ValueError):
+            store.add_documents(DOCS[2:], ids=["c", "d"], embeddings=np.ones((1, 32), dtype="float32"))
+        store.add_documents(DOCS[2:3], ids=["c"])
+        reopened = VectorStore(embed_fn=self.embedder, path=self.path)
+        self.assertEqual(sorted(reopened.documents), ["a", "b", "c"])
+
+    def test_compaction_folds_log_into_snapshot(self):
+        store = VectorStore(embed_fn=self.embedder, path=self.path, compact_every=3)
+        store.add_documents(DOCS[:2])
+        self.assertFalse(os.path.exists(os.path.join(self.path, "CURRENT")))
+        store.add_documents(DOCS[2:])
+        self.assertTrue(os.path.exists(os.path.join(self.path, "CURRENT")))
+        self.assertEqual(os.path.getsize(os.path.join(self.path, "wal.jsonl")), 0)
+        store.remove_documents([document_id(DOCS[0])])
+
+        reopened = VectorStore(embed_fn=self.embedder, path=self.path)
+        self.assertEqual(len(reopened), 3)
+        self.assertEqual(reopened.index.ntotal, 3)
+
+    def test_loads_legacy_snapshot(self):
+        os.makedirs(self.path)
+        vectors = self.embedder(DOCS)
+        index = faiss.IndexFlatL2(vectors.shape[1])
+        index.add(vectors)
+        faiss.write_index(index, os.path.join(self.path, "faiss.index"))
+        with open(os.path.join(self.path, "documents.pkl"), "wb") as f:
+            pickle.dump(DOCS, f)
+
+        store = VectorStore(embed_fn=self.embedder)
+        with self.assertRaises(ValueError):
+            store.load(self.path)
+        store.load(self.path, allow_pickle=True)
+        self.assertEqual(store.search("pytest unit tests", top_k=1), ["pytest unit tests"])
+        store.remove_documents([document_id(DOCS[0])])
+        self.assertEqual(len(store), 3)
+
+        store.save(self.path)
+        self.assertEqual(len(VectorStore(embed_fn=self.embedder, path=self.path)), 3)
+
+    def test_snapshot_is_durable_before_the_log_is_dropped(self):
+        store = VectorStore(embed_fn=self.embedder, path=self.path)
+        store.add_documents(DOCS, ids=["a", "b", "c", "d"])
+        events = []
+        real_replace, real_truncate = os.replace, store._truncate_wal
+        with patch.object(faiss_index, "_fsync_file", side_effect=lambda p: events.append(("file", os.path.basename(p)))), \
+                patch.object(faiss_index, "_fsync_dir", side_effect=lambda p: events.append(("dir", p))), \
+                patch.object(faiss_index.os, "replace", side_effect=lambda a, b: (events.append(("replace", os.path.basename(b))),
+                                                                                 real_replace(a, b))), \
+                patch.object(store, "_truncate_wal", side_effect=lambda: (events.append(("truncate",)), real_truncate())):
+            store.save()
+        current = events.index(("replace", "CURRENT"))
+        synced = {name for kind, name in events[:current] if kind == "file"}
+        self.assertTrue({"faiss.index", "store.json", "int_ids.npy", "texts.bin"} <= synced)
+        self.assertIn(("dir", self.path), events[:current])
+        self.assertIn(("dir", self.path), events[current:events.index(("truncate",))])
+
+    def test_snapshot_is_memory_mapped_and_pickle_free(self):
+        store = VectorStore(embed_fn=self.embedder, path=self.path)
+        store.add_documents(DOCS, ids=["a", "b", "c", "d"])
+        store.save()
+        snapshot = os.path.join(self.path, open(os.path.join(self.path, "CURRENT")).read())
+        self.assertFalse(any(name.endswith(".pkl") for name in os.listdir(snapshot)))
+
+        reopened = VectorStore(embed_fn=self.embedder, path=self.path)
+        self.assertEqual(reopened.search_with_scores("docker image build", top_k=1)[0][:2],
+                         ("c", "docker image build"))
+        # Only the hit was decoded: no doc_id map or in-memory copies of the bodies
+        self.assertIsNone(reopened.documents._base_index)
+        self.assertEqual(reopened.documents._texts, {})
+
+        reopened.remove_documents(["a"])
+        reopened.add_documents(["kubernetes deployment manifests"], ids=["e"])
+        reopened.save()
+        self.assertEqual(len(os.listdir(self.path)), 3)  # CURRENT, wal.jsonl and one snapshot
+        again = VectorStore(embed_fn=self.embedder, path=self.path)
+        self.assertEqual(sorted(again.documents), ["b", "c", "d", "e"])
+        self.assertEqual(again.documents.get("e"), "kubernetes deployment manifests")
+
+
+class TestBatchSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.embedder = CountingEmbedder()
+        self.store = VectorStore(embed_fn=self.embedder)
+        self.store.add_documents(DOCS, ids=["a", "b", "c", "d"], metadata=[
+            {"source": "planner", "session_id": "s1", "timestamp": 100},
+            {"source": "writer", "session_id": "s1", "timestamp": 200},
+            {"source": "writer", "session_id": "s2", "timestamp": 300},
+            {"source": "planner", "session_id": "s2", "timestamp": 400},
+        ])
+
+    def test_batch_embeds_once_and_returns_structured_hits(self):
+        embedded = self.embedder.embedded
+        with patch.object(self.store.index, "search", wraps=self.store.index.search) as search:
+            results = self.store.search_batch(["docker image build", "pytest unit tests"], top_k=2)
+        self.assertEqual(self.embedder.embedded - embedded, 2)
+        self.assertEqual(search.call_count, 1)
+        self.assertEqual([hits[0].doc_id for hits in results], ["c", "d"])
+        self.assertEqual(results[0][0].metadata["session_id"], "s2")
+        self.assertGreater(results[0][0].score, results[0][1].score)
+
+    def test_filters_on_metadata(self):
+        hits = self.store.search_batch(["docker image build"], top_k=4, filter={"session_id": "s1"})[0]
+        self.assertEqual(sorted(hit.doc_id for hit in hits), ["a", "b"])
+        hits = self.store.search_batch(["docker"], top_k=4, filter={"source": ["writer"], "timestamp": {"gte": 250}})[0]
+        self.assertEqual([hit.doc_id for hit in hits], ["c"])
+        self.assertEqual(self.store.search_batch(["docker"], filter={"agent": "debugger"}), [[]])
+        with self.assertRaises(ValueError):
+            self.store.search_batch(["docker"], filter={"timestamp": {"after": 1}})
+
+    def test_filter_uses_faiss_selector_for_large_selections(self):
+        with patch.object(faiss_index, "FILTER_EXACT_LIMIT", 0):
+            hits = self.store.search_batch(["pandas dataframe"], top_k=3, filter={"source": "writer"})[0]
+        self.assertEqual([hit.doc_id for hit in hits][:1], ["b"])
+        self.assertEqual({hit.doc_id for hit in hits}, {"b", "c"})
+
+    def test_metadata_changes_and_survives_snapshots(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        store = VectorStore(embed_fn=self.embedder, path=tmp.name)
+        store.add_documents(DOCS, ids=["a", "b", "c", "d"], metadata={"session_id": "s1"})
+        store.save()
+        reopened = VectorStore(embed_fn=self.embedder, path=tmp.name)
+        embedded = self.embedder.embedded
+        reopened.add_documents(DOCS[:1], ids=["a"], metadata={"session_id": "s2"})
+        reopened.add_documents(DOCS[1:2], ids=["b"])  # no metadata: keeps what it has
+        self.assertEqual(self.embedder.embedded, embedded)
+
+        for store in (reopened, VectorStore(embed_fn=self.embedder, path=tmp.name)):
+            hits = store.search_batch(["flask"], top_k=4, filter={"session_id": "s2"})[0]
+            self.assertEqual([hit.doc_id for hit in hits], ["a"])
+            self.assertEqual(len(store.search_batch(["flask"], top_k=4, filter={"session_id": "s1"})[0]), 3)
+
+
+class TestIndexTypes(unittest.TestCase):
+
+    def setUp(self):
+        self.vectors = synthetic_corpus(3000, 32, clusters=20)
+        self.ids = [f"doc-{i}" for i in range(len(self.vectors))]
+
+    def make_store(self, index_type, **kwargs):
+        store = VectorStore(embed_fn=CountingEmbedder(), index_type=index_type, **kwargs)
+        store.add_documents(self.ids, ids=self.ids, embeddings=self.vectors)
+        return store
+
+    @patch.dict(faiss_index.MIN_TRAIN_SIZE, {"ivf_pq": 2000})
+    def test_approximate_indexes_find_exact_matches(self):
+        for index_type in ("ivf_flat", "ivf_pq", "hnsw"):
+            store = self.make_store(index_type)
+            self.assertEqual(store.active_index_type, index_type)
+            hits = store.search_with_scores(None, top_k=1, query_vec=self.vectors[42], nprobe=32, ef_search=128)
+            self.assertEqual(hits[0][0], "doc-42", index_type)
+            odd = {"parity": "odd"}
+            store.add_documents(self.ids[1::2], ids=self.ids[1::2], metadata=odd)
+            for limit in (0, 4096):
+                with patch.object(faiss_index, "FILTER_EXACT_LIMIT", limit):
+                    hits = store.search_batch(None, top_k=5, filter=odd, query_vecs=self.vectors[[42, 43]],
+                                              nprobe=32, ef_search=128)
+                self.assertTrue(all(int(hit.doc_id[4:]) % 2 for row in hits for hit in row), index_type)
+                self.assertEqual(hits[1][0].doc_id, "doc-43", index_type)
+
+    def test_ivf_waits_for_enough_training_data(self):
+        store = VectorStore(embed_fn=CountingEmbedder(), index_type="ivf_flat")
+        store.add_documents(self.ids[:500], ids=self.ids[:500], embeddings=self.vectors[:500])
+        self.assertEqual(store.active_index_type, "flat")
+        store.add_documents(self.ids[500:], ids=self.ids[500:], embeddings=self.vectors[500:])
+        self.assertEqual(store.active_index_type, "ivf_flat")
+        self.assertEqual(store.index.ntotal, 3000)
+
+    def test_hnsw_removal_skips_and_compaction_purges(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        store = self.make_store("hnsw", path=tmp.name)
+        store.remove_documents(["doc-42"])
+        self.assertEqual(store.dead_vectors, 1)
+        hits = store.search_with_scores(None, top_k=3, query_vec=self.vectors[42])
+        self.assertEqual(len(hits), 3)
+        self.assertNotIn("doc-42", [doc_id for doc_id, _, _ in hits])
+        store.compact()
+        self.assertEqual((store.dead_vectors, store.index.ntotal), (0, 2999))
+        self.assertEqual(VectorStore(embed_fn=CountingEmbedder(), path=tmp.name).active_index_type, "hnsw")
+
+    def test_memory_mapped_ivf_index_is_read_in_before_changes(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        store = self.make_store("ivf_flat", path=tmp.name)
+        store.save()
+        reopened = VectorStore(embed_fn=CountingEmbedder(), path=tmp.name, index_type="ivf_flat")
+        self.assertIsNotNone(reopened._mapped_index_path)
+        reopened.remove_documents(["doc-7"])
+        self.assertIsNone(reopened._mapped_index_path)
+        self.assertEqual((reopened.index.ntotal, len(reopened)), (2999, 2999))
+
+    def test_auto_moves_to_larger_index_as_corpus_grows(self):
+        self.assertEqual(choose_index_type(1_000), "flat")
+        self.assertEqual(choose_index_type(5_000_000), "ivf_pq")
+        with patch.object(faiss_index, "AUTO_INDEX_LIMITS", ((1000, "flat"), (2000, "hnsw"))), \
+                patch.dict(faiss_index.MIN_TRAIN_SIZE, {"ivf_pq": 2500}):
+            store = VectorStore(embed_fn=CountingEmbedder(), index_type="auto")
+            for start in range(0, 3000, 500):
+                end = start + 500
+                store.add_documents(self.ids[start:end], ids=self.ids[start:end], embeddings=self.vectors[start:end])
+                if end == 500:
+                    self.assertEqual(store.active_index_type, "flat")
+                if end == 1500:
+                    self.assertEqual(store.active_index_type, "hnsw")
+            self.assertEqual(store.active_index_type, "ivf_pq")
+            self.assertEqual(len(store), 3000)
+
+    def test_benchmark_reports_recall_against_flat(self):
+        queries = self.vectors[:20]
+        configs = [("flat", [{}]), ("ivf_flat", [{"nprobe": 1}, {"nprobe": 64}])]
+        results = run_benchmark(self.vectors, queries, k=5, configs=configs)
+        self.assertEqual([r["index"] for r in results], ["flat", "ivf_flat", "ivf_flat"])
+        self.assertEqual(results[0]["recall"], 1.0)
+        self.assertGreaterEqual(results[2]["recall"], results[1]["recall"])
+        self.assertTrue(all(r["memory_mb"] >= 0 and r["p95_ms"] >= 0 for r in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
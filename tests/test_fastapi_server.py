@@ -0,0 +1,125 @@
+# tests/test_fastapi_server.py
+import json
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+from fastapi.testclient import TestClient
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.interface import fastapi_server
+
+IDEA = {"idea": "flask todo list api"}
+
+
+def parse_sse(text: str) -> list:
+    """[(event, data)] for every event of a text/event-stream body; event is None for plain data."""
+    events = []
+    for block in text.strip().split("\n\n"):
+        event, data = None, None
+        for line in block.splitlines():
+            if line.startswith("event: "):
+                event = line[len("event: "):]
+            elif line.startswith("data: "):
+                data = json.loads(line[len("data: "):])
+        events.append((event, data))
+    return events
+
+
+def agents(fail: str = None):
+    """Patch every agent with an offline stub; the one named `fail` raises."""
+
+    def stub(name, value):
+        async def run(*args, **kwargs):
+            if name == fail:
+                raise RuntimeError(f"{name} agent down")
+            return value
+        return run
+
+    def stream(name, deltas):
+        async def run(*args, **kwargs):
+            for delta in deltas:
+                yield delta
+            if name == fail:
+                raise RuntimeError(f"{name} stream cut")
+        return run
+
+    return [
+        patch.object(fastapi_server, "agenerate_plan", stub("plan", {"goal": "todo", "tasks": ["Routes"]})),
+        patch.object(fastapi_server, "awrite_code", stub("write", "print('todo')")),
+        patch.object(fastapi_server, "agenerate_tests_for", stub("test", "def test_todo(): pass")),
+        patch.object(fastapi_server, "agenerate_readme_and_gitignore", stub("docs", "# Todo")),
+        patch.object(fastapi_server, "agenerate_dockerfile", stub("docker", "FROM python:3.11-slim")),
+        patch.object(fastapi_server, "astream_plan", stream("plan", ["1. ", "Routes"])),
+        patch.object(fastapi_server, "structure_plan", lambda idea, text, model: {"goal": "todo", "tasks": ["Routes"]}),
+        patch.object(fastapi_server, "astream_write_code", stream("write", ["print(", "'todo')"])),
+        patch.object(fastapi_server, "astream_tests_for", stream("test", ["def test_todo(): ", "pass"])),
+        patch.object(fastapi_server, "astream_readme_and_gitignore", stream("docs", ["# ", "Todo"])),
+        patch.object(fastapi_server, "astream_dockerfile", stream("docker", ["FROM python:3.11-slim", "\n"])),
+    ]
+
+
+class ServerTestCase(unittest.TestCase):
+
+    def use_agents(self, fail: str = None):
+        for patcher in agents(fail):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def setUp(self):
+        self.client = TestClient(fastapi_server.app)
+
+
+class TestGenerate(ServerTestCase):
+
+    def test_every_agent_answers(self):
+        self.use_agents()
+        body = self.client.post("/generate/", json=IDEA).json()
+        self.assertEqual(set(body), {"plan", "write", "test", "docs", "docker"})
+        self.assertTrue(all(result["success"] for result in body.values()))
+        self.assertEqual(body["write"]["code"], "print('todo')")
+        self.assertEqual(body["plan"]["plan"], {"goal": "todo", "tasks": ["Routes"]})
+
+    def test_one_failing_agent_gets_its_fallback(self):
+        self.use_agents(fail="test")
+        body = self.client.post("/generate/", json=IDEA).json()
+        self.assertEqual(body["test"], {"success": False, "tests": fastapi_server.fallback_tests(),
+                                        "error": "test agent down"})
+        self.assertTrue(all(body[name]["success"] for name in ("plan", "write", "docs", "docker")))
+
+    def test_stream_emits_a_result_per_agent_then_done(self):
+        self.use_agents()
+        response = self.client.post("/generate/stream/", json=IDEA)
+        self.assertTrue(response.headers["content-type"].startswith("text/event-stream"))
+        events = parse_sse(response.text)
+        results = {data["endpoint"]: data for event, data in events if event == "result"}
+        self.assertEqual(set(results), {"plan", "write", "test", "docs", "docker"})
+        self.assertEqual(results["docker"]["docker"], "FROM python:3.11-slim")
+        self.assertEqual(events[-1][0], "done")
+        self.assertEqual(set(events[-1][1]), set(results))
+        self.assertIn({"endpoint": "write", "delta": "print("}, [data for event, data in events if event is None])
+
+    def test_empty_idea_rejected(self):
+        self.assertEqual(self.client.post("/generate/", json={"idea": "  "}).status_code, 400)
+
+
+class TestSingleAgentStream(ServerTestCase):
+
+    def test_deltas_then_done_matching_the_plain_route(self):
+        self.use_agents()
+        events = parse_sse(self.client.post("/write/stream/", json=IDEA).text)
+        self.assertEqual(events[:-1], [(None, {"delta": "print("}), (None, {"delta": "'todo')"})])
+        self.assertEqual(events[-1], ("done", self.client.post("/write/", json=IDEA).json()))
+
+    def test_stream_cut_midway_ends_with_the_fallback(self):
+        self.use_agents(fail="write")
+        events = parse_sse(self.client.post("/write/stream/", json=IDEA).text)
+        self.assertEqual(events[0], (None, {"delta": "print("}))
+        self.assertEqual(events[-1], ("done", {"success": False, "code": fastapi_server.fallback_code(),
+                                               "error": "write stream cut"}))
+
+
+if __name__ == "__main__":
+    unittest.main()
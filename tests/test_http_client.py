@@ -0,0 +1,76 @@
+# tests/test_http_client.py
+import json
+import os
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.core.http_client import HTTPClient
+
+
+class _MockLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        body = json.dumps({"choices": [{"message": {"content": "ok"}}]}).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class TestHTTPClient(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _MockLLMHandler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/v1/chat/completions"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def test_connection_is_reused(self):
+        client = HTTPClient(http2=False)
+        for _ in range(5):
+            response = client.post(self.url, json={"prompt": "hi"})
+            self.assertEqual(response.status_code, 200)
+
+        stats = client.get_stats()
+        client.close()
+
+        self.assertEqual(stats["requests"], 5)
+        self.assertEqual(stats["pool_misses"], 1)
+        self.assertEqual(stats["pool_hits"], 4)
+        self.assertEqual(stats["per_host"]["127.0.0.1"]["requests"], 5)
+
+    def test_concurrent_requests_respect_per_host_limit(self):
+        client = HTTPClient(http2=False, per_host_limit=2)
+        threads = [
+            threading.Thread(target=client.post, args=(self.url,), kwargs={"json": {}})
+            for _ in range(8)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        stats = client.get_stats()
+        client.close()
+
+        self.assertEqual(stats["requests"], 8)
+        self.assertLessEqual(stats["pool_misses"], 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+# tests/test_hybrid_search.py
+import os
+import re
+import sys
+import tempfile
+import unittest
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.vector_store.faiss_index import VectorStore
+from src.vector_store.hybrid_search import BM25Index, HybridSearchEngine, tokenize
+
+
+def embed(texts):
+    """Plain-English bag of words: identifiers and error names carry no signal, like a generic sentence model."""
+    vectors = np.zeros((len(texts), 16), dtype="float32")
+    for row, text in enumerate(texts):
+        for word in re.findall(r"\b[a-z]+\b", text):
+            vectors[row, sum(map(ord, word)) % 16] += 1
+        vectors[row, 15] += 0.1
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+DOCS = {
+    "auth": "login handler checks the password and returns a session token",
+    "parse": "parse_config_file raises KeyError when the section is missing",
+    "db": "database connection pool retries when the server is busy",
+    "http": "fetchUserProfile calls the api and raises ValueError on bad json",
+}
+
+
+class TestBM25Index(unittest.TestCase):
+
+    def test_tokenize_splits_identifiers(self):
+        self.assertEqual(tokenize("fetchUserProfile raised ValueError"),
+                         ["fetchuserprofile", "fetch", "user", "profile", "raised", "valueerror", "value", "error"])
+        self.assertEqual(tokenize("parse_config_file"), ["parse_config_file", "parse", "config", "file"])
+
+    def test_incremental_updates_and_compact_round_trip(self):
+        index = BM25Index()
+        for doc_id, text in DOCS.items():
+            index.add(doc_id, text)
+        self.assertEqual(index.search("KeyError", top_k=1)[0][0], "parse")
+        index.add("parse", "now about something else entirely")
+        self.assertEqual(index.search("parse_config_file"), [])
+        index.remove("http")
+        self.assertNotIn("valueerror", index.postings)
+        self.assertEqual(index.total_length, sum(index.doc_lengths.values()))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "bm25.npz")
+            index.save(path, watermark=7)
+            loaded = BM25Index.load(path)
+        self.assertEqual((loaded.postings, loaded.doc_lengths, loaded.watermark), (index.postings, index.doc_lengths, 7))
+        self.assertEqual(loaded.search("session token"), index.search("session token"))
+
+
+class TestHybridSearchEngine(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = os.path.join(tmp.name, "store")
+        self.engine = HybridSearchEngine(self.path, vectorstore=VectorStore(embed_fn=embed, path=self.path))
+        self.engine.add_documents(list(DOCS.values()), ids=list(DOCS), metadata=[
+            {"session_id": "s1"}, {"session_id": "s1"}, {"session_id": "s2"}, {"session_id": "s2"}
+        ])
+
+    def test_identifier_queries_are_found_by_fusion(self):
+        self.assertEqual(self.engine.search("fetchUserProfile ValueError", top_k=1), [DOCS["http"]])
+        hits = self.engine.search_batch(["parse_config_file KeyError when section missing", "session token"], top_k=2)
+        self.assertEqual([row[0]["doc_id"] for row in hits], ["parse", "auth"])
+        self.assertGreater(hits[0][0]["score"], hits[0][1]["score"])
+
+    def test_filter_applies_to_both_retrievers(self):
+        hits = self.engine.search_hits(["parse_config_file KeyError"], top_k=4, filter={"session_id": "s2"})[0]
+        self.assertEqual({hit.doc_id for hit in hits}, {"db", "http"})
+        self.assertEqual(hits[0].metadata, {"session_id": "s2"})
+
+    def test_reload_catches_up_with_the_write_ahead_log(self):
+        self.engine.save()
+        self.engine.remove_documents(["db"])
+        self.engine.add_documents(["cache invalidation uses redis_flush_all"], ids=["cache"])
+        self.engine.add_documents(["parse_config_file now returns defaults"], ids=["parse"])
+
+        reopened = HybridSearchEngine(self.path, vectorstore=VectorStore(embed_fn=embed, path=self.path))
+        self.assertEqual(set(reopened.bm25.doc_lengths), {"auth", "parse", "http", "cache"})
+        self.assertEqual(reopened.bm25.postings, self.engine.bm25.postings)
+        self.assertEqual(reopened.search("redis_flush_all", top_k=1), ["cache invalidation uses redis_flush_all"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+# tests/test_llm_adapter.py
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.core import llm_adapter
+from src.core.llm_router import LLMRouter, Backend
+from src.core.rate_limiter import RateLimiter
+
+RESPONSE_DELAY = 0.3
+
+
+class _SlowLLMHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if payload.get("stream"):
+            return self._stream(payload["messages"][-1]["content"])
+        time.sleep(RESPONSE_DELAY)
+        body = json.dumps({
+            "choices": [{"message": {"content": f"echo: {payload['messages'][-1]['content']}"}}],
+            "usage": {"total_tokens": 10},
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _stream(self, prompt):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        for word in prompt.split():
+            chunk = {"choices": [{"delta": {"content": word + " "}}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.flush()
+        final = {"choices": [{"delta": {}}], "x_groq": {"usage": {"total_tokens": 7}}}
+        self.wfile.write(f"data: {json.dumps(final)}\n\ndata: [DONE]\n\n".encode())
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+class TestLLMAdapter(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _SlowLLMHandler)
+        cls.url = f"http://127.0.0.1:{cls.server.server_port}/openai/v1/chat/completions"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+
+    def setUp(self):
+        router = LLMRouter([Backend("mock", self.url, llm_adapter.SUPPORTED_MODEL)], explore=0)
+        patcher_router = patch.object(llm_adapter, "get_llm_router", lambda: router)
+        patcher_key = patch.object(llm_adapter, "api_key", "test-key")
+        patcher_cache = patch.object(llm_adapter, "get_response_cache", lambda: None)
+        unlimited = RateLimiter(rpm=0, tpm=0, max_concurrency=100)
+        patcher_limiter = patch.object(llm_adapter, "get_rate_limiter", lambda: unlimited)
+        for patcher in (patcher_router, patcher_key, patcher_cache, patcher_limiter):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_query_llm(self):
+        self.assertEqual(llm_adapter.query_llm("hello"), "echo: hello")
+
+    def test_async_query_llm_calls_overlap(self):
+        async def run_all():
+            prompts = [f"prompt {i}" for i in range(5)]
+            return await asyncio.gather(*(llm_adapter.async_query_llm(p) for p in prompts))
+
+        start = time.perf_counter()
+        results = asyncio.run(run_all())
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(results, [f"echo: prompt {i}" for i in range(5)])
+        self.assertLess(elapsed, RESPONSE_DELAY * 3)
+
+    def test_stream_llm_yields_deltas(self):
+        deltas = list(llm_adapter.stream_llm("one two three"))
+        self.assertEqual(deltas, ["one ", "two ", "three "])
+
+    def test_astream_llm_yields_deltas(self):
+        async def collect():
+            return [d async for d in llm_adapter.astream_llm("alpha beta")]
+
+        self.assertEqual(asyncio.run(collect()), ["alpha ", "beta "])
+
+    def test_empty_prompt_rejected(self):
+        with self.assertRaises(ValueError):
+            asyncio.run(llm_adapter.async_query_llm("   "))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,242 @@
+# tests/test_llm_router.py
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.core.http_client import HTTPStatusError
+from src.core.llm_router import LLMRouter, Backend, LatencyWindow, HedgePolicy
+from src.core.rate_limiter import RateLimiter
+from src.core.retry_handler import CircuitOpenError
+from src.utils.token_tracker import TokenTracker
+
+
+def make_server(delay: float = 0.0, status: int = 200, error_text: str = "boom"):
+    """
+    Mock OpenAI-compatible server answering every POST after `delay` seconds
+    (adjustable later through `server.handler.delay`).
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        calls = 0
+
+        def do_POST(self):
+            Handler.calls += 1
+            payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            time.sleep(Handler.delay)
+            if status == 200:
+                body = {"choices": [{"message": {"content": f"{payload['model']} answered"}}], "usage": {"total_tokens": 5}}
+            else:
+                body = {"error": {"message": error_text}}
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    Handler.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    server.handler = Handler
+    server.url = f"http://127.0.0.1:{server.server_port}/v1/chat/completions"
+    return server
+
+
+PAYLOAD = {"model": "any", "messages": [{"role": "user", "content": "hi"}], "temperature": 0.3, "max_tokens": 10}
+
+
+class TestLatencyWindow(unittest.TestCase):
+
+    def test_percentiles_and_error_rate(self):
+        window = LatencyWindow(size=100)
+        for ms in range(1, 101):
+            window.record(ms / 1000)
+        window.record(ok=False)
+        self.assertAlmostEqual(window.percentile(0.5), 0.051, places=3)
+        self.assertAlmostEqual(window.percentile(0.95), 0.096, places=3)
+        self.assertAlmostEqual(window.error_rate(), 0.01)
+
+
+class TestLLMRouter(unittest.TestCase):
+
+    def setUp(self):
+        self.servers = []
+
+    def tearDown(self):
+        for server in self.servers:
+            server.shutdown()
+            server.server_close()
+
+    def server(self, **kwargs):
+        server = make_server(**kwargs)
+        self.servers.append(server)
+        return server
+
+    def test_routes_to_faster_backend(self):
+        slow, fast = self.server(delay=0.25), self.server(delay=0.01)
+        router = LLMRouter([Backend("slow", slow.url, "m"), Backend("fast", fast.url, "m")],
+                           explore=0, min_samples=2)
+        # Warm up both backends, then the faster one should win every call
+        for _ in range(4):
+            router.post({}, dict(PAYLOAD, model="m"))
+        self.assertEqual(slow.handler.calls, 2)
+        slow_calls = slow.handler.calls
+        for _ in range(5):
+            response, backend, model = router.post({}, dict(PAYLOAD, model="m"))
+            self.assertEqual((backend.name, model), ("fast", "m"))
+            self.assertEqual(response.json()["choices"][0]["message"]["content"], "m answered")
+        self.assertEqual(slow.handler.calls, slow_calls)
+        stats = router.get_stats()
+        self.assertGreater(stats["slow"]["p50_ms"], stats["fast"]["p50_ms"])
+
+    def test_requested_model_preferred(self):
+        a, b = self.server(), self.server()
+        router = LLMRouter([Backend("a", a.url, "model-a"), Backend("b", b.url, "model-b")], explore=0)
+        _, backend, model = router.post({}, dict(PAYLOAD, model="model-b"))
+        self.assertEqual((backend.name, model), ("b", "model-b"))
+
+    def test_requested_model_is_kept_unless_pinned(self):
+        open_server, pinned_server = self.server(), self.server()
+        response, _, model = LLMRouter([Backend("any", open_server.url)]).post({}, dict(PAYLOAD, model="m-asked"))
+        self.assertEqual((model, response.json()["choices"][0]["message"]["content"]), ("m-asked", "m-asked answered"))
+        # A model no backend lists goes to the best backend unchanged
+        _, _, model = LLMRouter([Backend("a", open_server.url, "m-other")]).post({}, dict(PAYLOAD, model="m-asked"))
+        self.assertEqual(model, "m-asked")
+        _, _, model = LLMRouter([Backend("local", pinned_server.url, "m-local", pin_model=True)]).post(
+            {}, dict(PAYLOAD, model="m-asked"))
+        self.assertEqual(model, "m-local")
+
+    def test_falls_back_on_server_error_and_model_error(self):
+        broken, retired, healthy = self.server(status=503), self.server(status=400, error_text="model decommissioned"), self.server()
+        router = LLMRouter([
+            Backend("broken", broken.url, "m1"),
+            Backend("retired", retired.url, "m1"),
+            Backend("healthy", healthy.url, "m2"),
+        ], explore=0)
+        response, backend, model = router.post({}, dict(PAYLOAD, model="m1"))
+        self.assertEqual((backend.name, model), ("healthy", "m2"))
+        self.assertEqual(response.json()["choices"][0]["message"]["content"], "m2 answered")
+        self.assertEqual(router.get_stats()["broken"]["error_rate"], 1.0)
+
+    def test_other_models_only_after_a_model_error(self):
+        broken, healthy = self.server(status=503), self.server()
+        router = LLMRouter([Backend("broken", broken.url, "m1"), Backend("healthy", healthy.url, "m2")], explore=0)
+        with self.assertRaises(HTTPStatusError):
+            router.post({}, dict(PAYLOAD, model="m1"))
+        self.assertEqual(healthy.handler.calls, 0)
+
+    def test_decommissioned_model_does_not_open_the_circuit(self):
+        retired, healthy = self.server(status=400, error_text="model decommissioned"), self.server()
+        router = LLMRouter([Backend("retired", retired.url, "m1", failure_threshold=2),
+                            Backend("healthy", healthy.url, "m2")], explore=0)
+        for _ in range(5):
+            _, backend, model = router.post({}, dict(PAYLOAD, model="m1"))
+            self.assertEqual((backend.name, model), ("healthy", "m2"))
+        self.assertEqual(router.get_stats()["retired"]["circuit"], "closed")
+
+    def test_other_models_used_while_every_circuit_of_the_model_is_open(self):
+        broken, healthy = self.server(status=503), self.server()
+        router = LLMRouter([Backend("broken", broken.url, "m1", failure_threshold=1, reset_timeout=60),
+                            Backend("healthy", healthy.url, "m2")], explore=0)
+        with self.assertRaises(HTTPStatusError):
+            router.post({}, dict(PAYLOAD, model="m1"))
+        _, backend, model = router.post({}, dict(PAYLOAD, model="m1"))
+        self.assertEqual((backend.name, model), ("healthy", "m2"))
+        self.assertEqual(broken.handler.calls, 1)
+
+    def test_fatal_error_not_failed_over(self):
+        unauthorized, healthy = self.server(status=401, error_text="invalid api key"), self.server()
+        router = LLMRouter([Backend("a", unauthorized.url, "m1"), Backend("b", healthy.url, "m1")], explore=0)
+        with self.assertRaises(HTTPStatusError):
+            router.post({}, dict(PAYLOAD, model="m1"))
+        self.assertEqual(healthy.handler.calls, 0)
+
+    def test_open_circuits_fail_fast(self):
+        broken = self.server(status=500)
+        router = LLMRouter([Backend("a", broken.url, "m1", failure_threshold=1, reset_timeout=60)], explore=0)
+        with self.assertRaises(HTTPStatusError):
+            router.post({}, PAYLOAD)
+        with self.assertRaises(CircuitOpenError):
+            router.post({}, PAYLOAD)
+        self.assertEqual(broken.handler.calls, 1)
+
+    def test_async_post_falls_back(self):
+        broken, healthy = self.server(status=502), self.server()
+        router = LLMRouter([Backend("broken", broken.url, "m1"), Backend("healthy", healthy.url, "m1")], explore=0)
+        _, backend, _ = asyncio.run(router.apost({}, dict(PAYLOAD, model="m1")))
+        self.assertEqual(backend.name, "healthy")
+
+
+class TestHedging(unittest.TestCase):
+
+    def setUp(self):
+        self.flaky, self.steady = make_server(delay=0.02), make_server(delay=0.02)
+        self.router = LLMRouter([Backend("flaky", self.flaky.url, "m1"), Backend("steady", self.steady.url, "m1")],
+                                explore=0, min_samples=100)  # unscored, so "flaky" stays the primary
+        self.tracker = TokenTracker()
+        unlimited = RateLimiter(rpm=0, tpm=0, max_concurrency=100)
+        patcher = patch("src.core.llm_router.get_rate_limiter", lambda: unlimited)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        for server in (self.flaky, self.steady):
+            server.shutdown()
+            server.server_close()
+
+    def warm_up(self, policy: HedgePolicy):
+        self.router.hedge_policies["write"] = policy
+        for _ in range(policy.min_samples):
+            asyncio.run(self.router.apost({}, dict(PAYLOAD, model="m1"), hedge="write", tracker=self.tracker))
+        self.flaky.handler.delay = 1.0
+
+    def test_slow_call_is_hedged_and_hedge_wins(self):
+        self.warm_up(HedgePolicy("write", percentile=0.95, max_ratio=1.0))
+        flaky = self.router.backends[0]
+        p95_before = flaky.stats.percentile(0.95)
+        start = time.perf_counter()
+        _, backend, _ = asyncio.run(self.router.apost({}, dict(PAYLOAD, model="m1"), hedge="write", tracker=self.tracker))
+        self.assertLess(time.perf_counter() - start, 0.5)
+        self.assertEqual(backend.name, "steady")
+        self.assertEqual(self.tracker.get_summary()["hedging"], {"fired": 1, "wins": 1, "win_rate": 1.0})
+        self.assertEqual(self.router.get_stats()["hedging"]["write"]["wins"], 1)
+        # The cancelled primary still counts as a (lower-bound) latency sample
+        self.assertEqual(len(flaky.stats.latencies), 6)
+        self.assertGreater(flaky.stats.latencies[-1], p95_before)
+
+    def test_hedge_and_primary_share_one_ranking(self):
+        self.warm_up(HedgePolicy("write", percentile=0.95, max_ratio=1.0))
+        flaky, steady = self.router.backends
+        orders = iter([[flaky, steady]])
+        # Any ranking after the first one (e.g. an explore shuffle) would put "steady" first
+        with patch.object(self.router, "candidates", side_effect=lambda model=None: next(orders, [steady, flaky])):
+            _, backend, _ = asyncio.run(self.router.apost({}, dict(PAYLOAD, model="m1"), hedge="write"))
+        self.assertEqual(backend.name, "steady")
+        self.assertEqual(len(flaky.stats.latencies), 6)
+        self.assertEqual(self.flaky.handler.calls, 6)
+
+    def test_budget_caps_hedges(self):
+        self.warm_up(HedgePolicy("write", max_ratio=0.0))
+        _, backend, _ = asyncio.run(self.router.apost({}, dict(PAYLOAD, model="m1"), hedge="write", tracker=self.tracker))
+        self.assertEqual(backend.name, "flaky")
+        self.assertEqual(self.tracker.hedges_fired, 0)
+
+    def test_ratio_above_one_rejected(self):
+        with self.assertRaises(ValueError):
+            HedgePolicy("write", max_ratio=1.5)
+
+
+if __name__ == "__main__":
+    unittest.main()
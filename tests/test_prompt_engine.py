@@ -0,0 +1,79 @@
+# tests/test_prompt_engine.py
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.core import prompt_engine
+from src.core.prompt_engine import PromptEngine, count_tokens
+from src.agents.code_writer_agent import build_code_writer_prompt
+
+BIG_CODE = "\n".join(f"def func_{i}(x):\n    return x * {i}\n" for i in range(400))
+
+
+class TestPromptEngine(unittest.TestCase):
+
+    def setUp(self):
+        self.engine = PromptEngine(max_prompt_tokens=500)
+
+    def test_small_input_untouched_and_prefix_stable(self):
+        first = self.engine.assemble("security", "  Scan this code.\n", "print('a')")
+        second = self.engine.assemble("security", "  Scan this code.\n", "print('b')")
+        self.assertEqual(first[0], "Scan this code.")
+        self.assertEqual(first[0], second[0])
+        self.assertIn("print('a')", first[1])
+
+    def test_oversized_input_trimmed_to_budget(self):
+        system_prompt, user_prompt = self.engine.assemble("debugger", "Find bugs.", BIG_CODE)
+        self.assertLessEqual(count_tokens(system_prompt) + count_tokens(user_prompt), 500)
+        self.assertIn("def func_0", user_prompt)
+        self.assertIn("def func_399", user_prompt)
+        self.assertIn("trimmed to fit the context window", user_prompt)
+        self.assertEqual(self.engine.get_stats()["debugger"]["trimmed"], 1)
+
+    def test_chunks_cover_whole_input(self):
+        _, prompts = self.engine.assemble_chunks("reviewer", "Review.", BIG_CODE, label=None, language=None)
+        self.assertGreater(len(prompts), 1)
+        self.assertEqual("\n".join(prompts), "\n".join(BIG_CODE.splitlines()))
+        self.assertTrue(all(count_tokens(p) <= 500 for p in prompts))
+
+    def test_stats_per_agent(self):
+        self.engine.assemble("docs", "Document.", "x = 1")
+        self.engine.assemble("docs", "Document.", "y = 2")
+        self.engine.record("planner", "Plan.", "Build a todo app")
+        stats = self.engine.get_stats()
+        self.assertEqual(stats["docs"]["calls"], 2)
+        self.assertEqual(stats["planner"]["calls"], 1)
+        self.assertGreater(stats["docs"]["avg_tokens"], 0)
+
+    def test_check_fits_rejects_oversized_request(self):
+        messages = [{"role": "user", "content": BIG_CODE * 10}]
+        with self.assertRaises(ValueError):
+            PromptEngine().check_fits(messages, model=None, max_tokens=1500)
+        self.assertGreater(PromptEngine().check_fits([{"content": "hi"}], "llama-3.1-8b-instant"), 0)
+
+
+class StrictEncoding:
+    """Like tiktoken's Encoding: only accepts str."""
+
+    def encode(self, text, disallowed_special=()):
+        if not isinstance(text, str):
+            raise TypeError(f"expected str, got {type(text).__name__}")
+        return text.split()
+
+
+class TestCodeWriterPrompt(unittest.TestCase):
+
+    def test_structured_plan_is_rendered_as_text(self):
+        plan = {"goal": "Build a todo api", "tasks": ["Design routes", "Add storage"]}
+        with patch.object(prompt_engine, "_get_encoding", lambda: StrictEncoding()):
+            _, prompt = build_code_writer_prompt(plan)
+        self.assertIn("Goal: Build a todo api", prompt)
+        self.assertIn("- Add storage", prompt)
+        self.assertNotIn("{'goal'", prompt)
+
+
+if __name__ == "__main__":
+    unittest.main()
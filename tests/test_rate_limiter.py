@@ -0,0 +1,106 @@
+# tests/test_rate_limiter.py
+import asyncio
+import os
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.core.prompt_engine import count_tokens
+from src.core.rate_limiter import RateLimiter, estimate_request_tokens, llm_priority, current_priority
+
+
+class TestRateLimiter(unittest.TestCase):
+
+    def test_rpm_budget_delays_excess_requests(self):
+        # 120 RPM = a burst of 120, then 2 requests per second
+        limiter = RateLimiter(rpm=120, tpm=0)
+        limiter.requests.level = 1
+
+        start = time.perf_counter()
+        for _ in range(2):
+            with limiter.reserve(10):
+                pass
+        self.assertGreaterEqual(time.perf_counter() - start, 0.4)
+
+    def test_unused_tokens_are_refunded(self):
+        limiter = RateLimiter(rpm=0, tpm=6000)
+        with limiter.reserve(2000) as reservation:
+            reservation.actual_tokens = 500
+        self.assertGreater(limiter.tokens.level, 5400)
+        self.assertEqual(limiter.get_metrics()["refunded_tokens"], 1500)
+
+    def test_interactive_served_before_batch(self):
+        limiter = RateLimiter(rpm=0, tpm=0, max_concurrency=1)
+        order = []
+        gate = threading.Event()
+
+        def call(priority, delay):
+            time.sleep(delay)
+            with limiter.reserve(1, priority=priority):
+                order.append(priority)
+                gate.wait()
+
+        threads = [threading.Thread(target=call, args=("batch", 0))]
+        threads += [threading.Thread(target=call, args=("batch", 0.05)) for _ in range(2)]
+        threads += [threading.Thread(target=call, args=("interactive", 0.1))]
+        for t in threads:
+            t.start()
+        time.sleep(0.2)
+
+        metrics = limiter.get_metrics()
+        self.assertEqual(metrics["in_flight"], 1)
+        self.assertEqual(metrics["queue_depth_by_priority"], {"interactive": 1, "normal": 0, "batch": 2})
+
+        gate.set()
+        for t in threads:
+            t.join()
+        self.assertEqual(order, ["batch", "interactive", "batch", "batch"])
+
+    def test_async_reserve_respects_concurrency(self):
+        limiter = RateLimiter(rpm=0, tpm=0, max_concurrency=2)
+        peak = 0
+
+        async def call():
+            nonlocal peak
+            async with limiter.areserve(1):
+                peak = max(peak, limiter.in_flight)
+                await asyncio.sleep(0.05)
+
+        async def run_all():
+            await asyncio.gather(*(call() for _ in range(6)))
+
+        asyncio.run(run_all())
+        self.assertEqual(peak, 2)
+        self.assertEqual(limiter.get_metrics()["granted"], 6)
+
+    def test_budget_shared_through_state_file(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            state = os.path.join(tmp, "limits.json")
+            first = RateLimiter(rpm=60, tpm=0, state_file=state)
+            second = RateLimiter(rpm=60, tpm=0, state_file=state)
+            for _ in range(59):
+                with first.reserve(1):
+                    pass
+            with second.reserve(1):
+                pass
+            self.assertLess(second.requests.level, 1)
+
+    def test_priority_context(self):
+        self.assertEqual(current_priority(), "normal")
+        with llm_priority("batch"):
+            self.assertEqual(current_priority(), "batch")
+        with self.assertRaises(ValueError):
+            with llm_priority("urgent"):
+                pass
+
+    def test_estimate_includes_completion_budget(self):
+        payload = {"messages": [{"content": "x" * 400}], "max_tokens": 1500}
+        self.assertEqual(estimate_request_tokens(payload), count_tokens("x" * 400) + 1500)
+
+
+if __name__ == "__main__":
+    unittest.main()
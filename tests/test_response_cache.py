@@ -0,0 +1,124 @@
+# tests/test_response_cache.py
+import os
+import sys
+import tempfile
+import time
+import unittest
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.core import llm_adapter
+from src.core.response_cache import MemoryLRUCache, ResponseCache, SQLiteCache, TieredCache
+from src.utils.token_tracker import TokenTracker
+
+
+class TestResponseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        self.db_path = os.path.join(self.tmp.name, "cache.sqlite3")
+
+    def test_key_depends_on_every_field(self):
+        base = ResponseCache.make_key("m", 0.3, "system", "prompt")
+        self.assertEqual(base, ResponseCache.make_key("m", 0.3, "system", "prompt"))
+        self.assertNotEqual(base, ResponseCache.make_key("m2", 0.3, "system", "prompt"))
+        self.assertNotEqual(base, ResponseCache.make_key("m", 0.0, "system", "prompt"))
+        self.assertNotEqual(base, ResponseCache.make_key("m", 0.3, "other", "prompt"))
+        self.assertNotEqual(base, ResponseCache.make_key("m", 0.3, "system", "other"))
+
+    def test_memory_lru_eviction(self):
+        cache = ResponseCache(MemoryLRUCache(max_entries=2))
+        cache.set("a", "A")
+        cache.set("b", "B")
+        cache.get("a")
+        cache.set("c", "C")
+        self.assertIsNotNone(cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+
+    def test_ttl_expiry(self):
+        cache = ResponseCache(SQLiteCache(self.db_path), ttl=0.05)
+        cache.set("a", "A", tokens=5)
+        self.assertEqual(cache.get("a")["content"], "A")
+        time.sleep(0.1)
+        self.assertIsNone(cache.get("a"))
+
+    def test_disk_tier_survives_restart_and_promotes(self):
+        ResponseCache(SQLiteCache(self.db_path)).set("a", "A", tokens=7)
+
+        memory = MemoryLRUCache()
+        cache = ResponseCache(TieredCache(memory, SQLiteCache(self.db_path)))
+        self.assertEqual(cache.get("a")["tokens"], 7)
+        self.assertIsNotNone(memory.get("a"))
+
+    def test_disk_size_bound(self):
+        disk = SQLiteCache(self.db_path, max_entries=3)
+        cache = ResponseCache(disk)
+        for i in range(5):
+            cache.set(str(i), str(i))
+        self.assertEqual(len(disk), 3)
+
+    def test_bypass_nonzero_temperature(self):
+        self.assertTrue(ResponseCache(MemoryLRUCache(), bypass_nonzero_temperature=True).should_bypass(0.3))
+        self.assertFalse(ResponseCache(MemoryLRUCache(), bypass_nonzero_temperature=True).should_bypass(0.0))
+        self.assertFalse(ResponseCache(MemoryLRUCache()).should_bypass(0.3))
+
+    def test_shared_cache_skips_sampled_calls_unless_opted_in(self):
+        from src.core import response_cache
+        for env, bypass in (({}, True), ({"LLM_CACHE_SAMPLED": "1"}, False)):
+            with patch.dict(os.environ, dict(env, LLM_CACHE_PATH=self.db_path)), \
+                    patch.object(response_cache, "_shared_cache", None):
+                for name in {"LLM_CACHE", "LLM_CACHE_SAMPLED"} - set(env):
+                    os.environ.pop(name, None)
+                self.assertEqual(response_cache.get_response_cache().should_bypass(0.3), bypass)
+                self.assertFalse(response_cache.get_response_cache().should_bypass(0.0))
+
+    def test_query_llm_serves_repeat_prompts_from_cache(self):
+        cache = ResponseCache(MemoryLRUCache())
+        tracker = TokenTracker()
+
+        class FakeResponse:
+            status_code = 200
+            text = ""
+
+            def json(self):
+                return {"choices": [{"message": {"content": "answer"}}], "usage": {"total_tokens": 40}}
+
+        with patch.object(llm_adapter, "api_key", "test-key"), \
+                patch.object(llm_adapter, "tracker", tracker), \
+                patch.object(llm_adapter, "get_response_cache", lambda: cache), \
+                patch.object(llm_adapter, "get_llm_router") as get_router:
+            get_router.return_value.post.return_value = (FakeResponse(), None, llm_adapter.SUPPORTED_MODEL)
+            self.assertEqual(llm_adapter.query_llm("same idea"), "answer")
+            self.assertEqual(llm_adapter.query_llm("same idea"), "answer")
+            self.assertEqual(get_router.return_value.post.call_count, 1)
+
+        summary = tracker.get_summary()["cache"]
+        self.assertEqual(summary["hits"], 1)
+        self.assertEqual(summary["misses"], 1)
+        self.assertEqual(summary["tokens_saved"], 40)
+
+    def test_fallback_answers_are_cached_under_the_model_that_answered(self):
+        cache = ResponseCache(MemoryLRUCache())
+
+        class FakeResponse:
+            status_code = 200
+            text = ""
+
+            def json(self):
+                return {"choices": [{"message": {"content": "small model answer"}}], "usage": {"total_tokens": 10}}
+
+        with patch.object(llm_adapter, "api_key", "test-key"), \
+                patch.object(llm_adapter, "get_response_cache", lambda: cache), \
+                patch.object(llm_adapter, "get_llm_router") as get_router:
+            get_router.return_value.post.return_value = (FakeResponse(), None, "small-model")
+            llm_adapter.query_llm("same idea", model="big-model")
+            llm_adapter.query_llm("same idea", model="big-model")
+            self.assertEqual(get_router.return_value.post.call_count, 2)
+            self.assertEqual(llm_adapter.query_llm("same idea", model="small-model"), "small model answer")
+            self.assertEqual(get_router.return_value.post.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,142 @@
+# tests/test_retry_handler.py
+import asyncio
+import os
+import sys
+import unittest
+from unittest.mock import patch
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.core.http_client import HTTPStatusError
+from src.core.retry_handler import (
+    retry_on_exception, async_retry_on_exception, RetryBudget, CircuitBreaker,
+    RetryError, CircuitOpenError, is_retryable, get_retry_after
+)
+
+
+def flaky(errors, result="ok"):
+    """Return a function that raises each error in turn, then returns `result`."""
+    calls = []
+
+    def func():
+        calls.append(1)
+        if len(calls) <= len(errors):
+            raise errors[len(calls) - 1]
+        return result
+
+    func.calls = calls
+    return func
+
+
+class TestClassification(unittest.TestCase):
+
+    def test_status_codes(self):
+        self.assertTrue(is_retryable(HTTPStatusError(429, "slow down")))
+        self.assertTrue(is_retryable(HTTPStatusError(503, "unavailable")))
+        self.assertFalse(is_retryable(HTTPStatusError(400, "bad model")))
+        self.assertFalse(is_retryable(HTTPStatusError(401, "bad key")))
+        self.assertTrue(is_retryable(ConnectionError("reset")))
+
+    def test_retry_after(self):
+        self.assertEqual(get_retry_after(HTTPStatusError(429, "", {"Retry-After": "7"})), 7.0)
+        self.assertIsNone(get_retry_after(HTTPStatusError(429, "")))
+
+
+class TestRetryOnException(unittest.TestCase):
+
+    def setUp(self):
+        patcher = patch("src.core.retry_handler.time.sleep")
+        self.sleep = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_retries_transient_errors(self):
+        func = flaky([HTTPStatusError(503, "down"), HTTPStatusError(503, "down")])
+        wrapped = retry_on_exception(retries=3, delay=1, verbose=False, budget=None)(func)
+        self.assertEqual(wrapped(), "ok")
+        self.assertEqual(len(func.calls), 3)
+
+    def test_fatal_error_not_retried(self):
+        error = HTTPStatusError(400, "bad request")
+        func = flaky([error])
+        wrapped = retry_on_exception(retries=3, delay=1, verbose=False, budget=None)(func)
+        with self.assertRaises(HTTPStatusError) as ctx:
+            wrapped()
+        self.assertIs(ctx.exception, error)
+        self.assertEqual(len(func.calls), 1)
+
+    def test_gives_up_with_original_exception_chained(self):
+        func = flaky([HTTPStatusError(500, "boom")] * 3)
+        wrapped = retry_on_exception(retries=3, delay=1, verbose=False, budget=None)(func)
+        with self.assertRaises(RetryError) as ctx:
+            wrapped()
+        self.assertIsInstance(ctx.exception.__cause__, HTTPStatusError)
+        self.assertIs(ctx.exception.last_exception, ctx.exception.__cause__)
+
+    def test_honors_retry_after(self):
+        func = flaky([HTTPStatusError(429, "slow down", {"Retry-After": "5"})])
+        wrapped = retry_on_exception(retries=2, delay=0.1, verbose=False, budget=None)(func)
+        wrapped()
+        self.assertGreaterEqual(self.sleep.call_args[0][0], 5)
+
+    def test_jittered_delays_stay_in_bounds(self):
+        func = flaky([HTTPStatusError(503, "down")] * 6)
+        wrapped = retry_on_exception(retries=7, delay=1, backoff=3, max_delay=4, verbose=False, budget=None)(func)
+        wrapped()
+        delays = [c[0][0] for c in self.sleep.call_args_list]
+        self.assertEqual(len(delays), 6)
+        self.assertTrue(all(1 <= d <= 4 for d in delays))
+
+    def test_budget_limits_retries(self):
+        budget = RetryBudget(ratio=0.0, min_retries=1)
+        wrapped = retry_on_exception(retries=5, delay=1, verbose=False, budget=budget)(
+            flaky([HTTPStatusError(503, "down")] * 2)
+        )
+        with self.assertRaises(RetryError):
+            wrapped()
+
+    def test_circuit_breaker_fails_fast(self):
+        breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout=60)
+        func = flaky([HTTPStatusError(503, "down")] * 10)
+        wrapped = retry_on_exception(retries=2, delay=1, verbose=False, budget=None, breaker=breaker)(func)
+        with self.assertRaises(RetryError):
+            wrapped()
+        self.assertEqual(breaker.state, "open")
+        with self.assertRaises(CircuitOpenError):
+            wrapped()
+        self.assertEqual(len(func.calls), 2)
+
+    def test_circuit_breaker_half_open_recovers(self):
+        breaker = CircuitBreaker("test", failure_threshold=1, reset_timeout=0)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "open")
+        wrapped = retry_on_exception(retries=1, verbose=False, budget=None, breaker=breaker)(lambda: "ok")
+        self.assertEqual(wrapped(), "ok")
+        self.assertEqual(breaker.state, "closed")
+
+
+class TestAsyncRetryOnException(unittest.TestCase):
+
+    def test_async_retries_then_succeeds(self):
+        func = flaky([HTTPStatusError(502, "bad gateway")])
+
+        @async_retry_on_exception(retries=2, delay=0.01, verbose=False, budget=None)
+        async def call():
+            return func()
+
+        self.assertEqual(asyncio.run(call()), "ok")
+        self.assertEqual(len(func.calls), 2)
+
+    def test_async_fatal_error_not_retried(self):
+        func = flaky([HTTPStatusError(404, "missing")])
+
+        @async_retry_on_exception(retries=3, delay=0.01, verbose=False, budget=None)
+        async def call():
+            return func()
+
+        with self.assertRaises(HTTPStatusError):
+            asyncio.run(call())
+        self.assertEqual(len(func.calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+# tests/test_semantic_cache.py
+import os
+import re
+import sys
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.core.semantic_cache import SemanticCache
+from src.agents import writer_agent
+
+
+def bag_of_words(texts):
+    """Deterministic stand-in for a sentence embedding: normalized hashed word counts."""
+    vectors = np.zeros((len(texts), 64), dtype="float32")
+    for row, text in enumerate(texts):
+        for word in re.findall(r"[a-z]+", text.lower()):
+            vectors[row, sum(map(ord, word)) % 64] += 1
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.maximum(norms, 1e-9)
+
+
+class TestSemanticCache(unittest.TestCase):
+
+    def make_cache(self, **kwargs):
+        kwargs.setdefault("audit_rate", 0.0)
+        return SemanticCache(bag_of_words, thresholds={"planner": 0.6, "writer": 0.9}, **kwargs)
+
+    def test_reworded_prompt_hits(self):
+        cache = self.make_cache()
+        cache.store("planner", "Build an AI assistant", "PLAN")
+        self.assertEqual(cache.lookup("planner", "build a AI assistant app"), "PLAN")
+        self.assertIsNone(cache.lookup("planner", "Write a weather dashboard in Flask"))
+        stats = cache.get_stats()["planner"]
+        self.assertEqual((stats["lookups"], stats["hits"], stats["misses"]), (2, 1, 1))
+
+    def test_per_agent_thresholds_and_isolation(self):
+        cache = self.make_cache()
+        cache.store("planner", "Build an AI assistant", "PLAN")
+        cache.store("writer", "Build an AI assistant", "CODE")
+        self.assertEqual(cache.lookup("writer", "Build an AI assistant"), "CODE")
+        # Close enough for the planner's 0.6 threshold, not for the writer's 0.9
+        self.assertEqual(cache.lookup("planner", "build a AI assistant app"), "PLAN")
+        self.assertIsNone(cache.lookup("writer", "build a AI assistant app"))
+
+    def test_context_must_match(self):
+        cache = self.make_cache()
+        cache.store("planner", "Build an AI assistant", "PLAN", context="model-a")
+        self.assertIsNone(cache.lookup("planner", "Build an AI assistant", context="model-b"))
+        self.assertEqual(cache.lookup("planner", "Build an AI assistant", context="model-a"), "PLAN")
+
+    def test_ttl_and_size_eviction(self):
+        cache = self.make_cache(ttl=0.05, max_entries=3)
+        cache.store("planner", "Build an AI assistant", "PLAN")
+        time.sleep(0.06)
+        self.assertIsNone(cache.lookup("planner", "Build an AI assistant"))
+
+        cache.ttl = 60
+        for i, idea in enumerate(["alpha service", "beta parser", "gamma crawler", "delta scheduler"]):
+            cache.store("writer", idea, f"CODE {i}")
+        self.assertLessEqual(cache.get_stats()["writer"]["entries"], 3)
+        self.assertIsNone(cache.lookup("writer", "alpha service"))
+        self.assertEqual(cache.lookup("writer", "delta scheduler"), "CODE 3")
+        self.assertGreater(cache.get_stats()["writer"]["evictions"], 0)
+
+    def test_audit_detects_false_hit(self):
+        cache = self.make_cache(audit_rate=1.0)
+        cache.store("planner", "Build an AI assistant", "a chatbot plan with intents and memory")
+        self.assertIsNone(cache.lookup("planner", "build a AI assistant app"))
+        cache.store("planner", "build a AI assistant app", "kubernetes deployment for image classifier")
+        stats = cache.get_stats()["planner"]
+        self.assertEqual((stats["audits"], stats["false_hits"], stats["false_hit_rate"]), (1, 1, 1.0))
+
+    def test_audit_confirms_true_hit(self):
+        cache = self.make_cache(audit_rate=1.0)
+        cache.store("planner", "Build an AI assistant", "a chatbot plan with intents and memory")
+        cache.lookup("planner", "build a AI assistant app")
+        cache.store("planner", "build a AI assistant app", "a chatbot plan with memory and intents")
+        self.assertEqual(cache.get_stats()["planner"]["false_hits"], 0)
+
+    def test_writer_agent_uses_cache(self):
+        cache = self.make_cache()
+        with patch.object(writer_agent, "get_semantic_cache", return_value=cache), \
+                patch.object(writer_agent, "query_llm", return_value="print('hi')") as query:
+            self.assertEqual(writer_agent.write_code("Build an AI assistant"), "print('hi')")
+            self.assertEqual(writer_agent.write_code("build an AI assistant"), "print('hi')")
+        self.assertEqual(query.call_count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
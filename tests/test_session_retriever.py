@@ -0,0 +1,107 @@
+# tests/test_session_retriever.py
+import os
+import re
+import sys
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.core.prompt_engine import count_tokens
+from src.core.session_retriever import SessionRetriever
+from src.vector_store.code_indexer import CodeIndexer
+from src.vector_store.faiss_index import VectorStore
+from src.agents.code_writer_agent import build_code_writer_prompt
+
+
+def bag_of_words(texts):
+    vectors = np.zeros((len(texts), 64), dtype="float32")
+    for row, text in enumerate(texts):
+        idea = text.split("\n\n")[0]  # like a sentence model, dominated by the leading idea
+        for word in re.findall(r"[a-z]+", idea.lower()):
+            vectors[row, sum(map(ord, word)) % 64] += 1
+    return vectors / np.maximum(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-9)
+
+
+TODO_CODE = "from flask import Flask\napp = Flask(__name__)\n\n@app.route('/todos')\ndef todos():\n    return []\n"
+
+
+class TestSessionRetriever(unittest.TestCase):
+
+    def setUp(self):
+        self.store = VectorStore(embed_fn=bag_of_words)
+        self.retriever = SessionRetriever(self.store, top_k=2, token_budget=300, min_similarity=0.5)
+        self.retriever.record("flask todo list api", {"goal": "x", "tasks": ["Design routes", "Add storage"]},
+                              TODO_CODE, session_id="s1")
+        self.retriever.record("pandas csv report generator", {"tasks": ["Load csv"]}, "import pandas as pd\n", "s2")
+
+    def test_returns_similar_runs_of_the_requested_kind(self):
+        plans = self.retriever.references("a todo list api with flask", "plan")
+        self.assertIn("Design routes", plans)
+        self.assertNotIn("Load csv", plans)
+        self.assertNotIn("from flask", plans)
+        self.assertIn("@app.route('/todos')", self.retriever.references("a todo list api with flask", "code"))
+        self.assertEqual(self.retriever.references("kubernetes operator in go", "code"), "")
+
+    def test_retrieval_is_cached_per_idea_until_a_new_run_is_recorded(self):
+        with patch.object(self.store, "search_batch", wraps=self.store.search_batch) as search:
+            self.retriever.references("flask todo list api", "code")
+            self.retriever.references("Flask  todo list API", "code")
+            self.assertEqual(search.call_count, 1)
+            self.retriever.record("flask notes api", {"tasks": ["Notes"]}, "notes = []\n")
+            self.retriever.references("flask todo list api", "code")
+            self.assertEqual(search.call_count, 2)
+        self.assertEqual(self.retriever.get_stats()["cache_hits"], 1)
+
+    def test_references_fit_the_token_budget(self):
+        self.retriever.record("flask todo list api v2", {"tasks": ["Routes"]}, TODO_CODE * 40)
+        for budget in (120, 300):
+            text = self.retriever.references("flask todo list api", "code", token_budget=budget)
+            self.assertTrue(text)
+            self.assertLessEqual(count_tokens(text), budget)
+
+    def test_code_writer_prompt_includes_references(self):
+        references = self.retriever.references("flask todo list api", "code")
+        _, prompt = build_code_writer_prompt("Build a flask todo list api", references)
+        self.assertIn("📚 Code from similar past projects", prompt)
+        self.assertTrue(prompt.rstrip().endswith("💻 Write the Python code below:"))
+
+
+class TestSessionMemoryStage(unittest.TestCase):
+
+    def test_recording_only_waits_for_the_debugged_code(self):
+        from src.core import chain_orchestrator
+        graph = chain_orchestrator.build_project_graph()
+        self.assertEqual(graph.dependencies("session_memory"), ["debug"])
+
+        retriever = SessionRetriever(VectorStore(embed_fn=bag_of_words), min_similarity=0.5)
+        indexer = CodeIndexer(VectorStore(embed_fn=bag_of_words))
+        with patch.object(chain_orchestrator, "get_session_retriever", lambda: retriever), \
+                patch.object(chain_orchestrator, "get_code_indexer", lambda: indexer):
+            chain_orchestrator.session_memory_stage("flask todo list api", {"tasks": ["Routes"]}, TODO_CODE, "s1")
+        self.assertIn("@app.route('/todos')", retriever.references("flask todo list api", "code"))
+        # Nothing was written under generated/, so the debugged code itself is indexed
+        self.assertEqual({hit.metadata["name"] for hit in indexer.search("todos route", top_k=5)}, {"<module>", "todos"})
+
+        with patch.object(retriever, "record", side_effect=OSError("disk full")), \
+                patch.object(indexer, "index_source", side_effect=OSError("disk full")), \
+                patch.object(chain_orchestrator, "get_session_retriever", lambda: retriever), \
+                patch.object(chain_orchestrator, "get_code_indexer", lambda: indexer):
+            chain_orchestrator.session_memory_stage("flask notes api", {"tasks": ["Notes"]}, "notes = []\n", "s2")
+
+
+
+class TestPlanCacheContext(unittest.TestCase):
+
+    def test_cached_plans_are_keyed_on_the_references(self):
+        from src.agents.planner_agent import plan_cache_context
+        plain = plan_cache_context("m", 0.3)
+        self.assertEqual(plain, plan_cache_context("m", 0.3, ""))
+        with_references = plan_cache_context("m", 0.3, "📚 Plans from similar past projects: Design routes")
+        self.assertNotEqual(plain, with_references)
+        self.assertEqual(with_references, plan_cache_context("m", 0.3, "📚 Plans from similar past projects: Design routes"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,83 @@
+# tests/test_stage_graph.py
+import os
+import sys
+import time
+import unittest
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.core.stage_graph import Stage, StageGraph, StageError, StageTimeoutError
+
+
+def sleeper(seconds, value):
+    def run(**inputs):
+        time.sleep(seconds)
+        return value
+    return run
+
+
+class TestStageGraph(unittest.TestCase):
+
+    def test_independent_stages_run_concurrently(self):
+        graph = StageGraph([
+            Stage("debug", sleeper(0.1, "code"), ["generated"], ["debugged"]),
+            Stage("security", sleeper(0.3, "sec"), ["debugged"], ["security"]),
+            Stage("perf", sleeper(0.3, "perf"), ["debugged"], ["perf"]),
+            Stage("docs", sleeper(0.3, "docs"), ["debugged"], ["docs"]),
+            Stage("docker", sleeper(0.5, "docker"), ["debugged"], ["dockerfile"]),
+        ], max_concurrency=4)
+
+        start = time.perf_counter()
+        values = graph.run({"generated": "raw"})
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual(values["dockerfile"], "docker")
+        self.assertEqual(values["security"], "sec")
+        self.assertLess(elapsed, 0.1 + 0.3 * 4)
+        self.assertEqual(graph.critical_path(), ["debug", "docker"])
+
+    def test_inputs_are_passed_by_name(self):
+        graph = StageGraph([
+            Stage("split", lambda text: (text.upper(), len(text)), ["text"], ["upper", "length"]),
+            Stage("join", lambda upper, length: f"{upper}:{length}", ["upper", "length"], ["joined"]),
+        ])
+        self.assertEqual(graph.run({"text": "abc"})["joined"], "ABC:3")
+
+    def test_concurrency_cap(self):
+        graph = StageGraph(
+            [Stage(f"s{i}", sleeper(0.1, i), [], [f"out{i}"]) for i in range(4)],
+            max_concurrency=1,
+        )
+        start = time.perf_counter()
+        graph.run()
+        self.assertGreaterEqual(time.perf_counter() - start, 0.4)
+
+    def test_stage_timeout(self):
+        graph = StageGraph([Stage("slow", sleeper(1.0, None), [], ["x"], timeout=0.1)])
+        with self.assertRaises(StageTimeoutError):
+            graph.run()
+
+    def test_stage_failure_is_wrapped(self):
+        def boom():
+            raise RuntimeError("bad")
+
+        graph = StageGraph([Stage("boom", boom, [], ["x"])])
+        with self.assertRaises(StageError) as ctx:
+            graph.run()
+        self.assertIsInstance(ctx.exception.__cause__, RuntimeError)
+
+    def test_cycle_rejected(self):
+        with self.assertRaises(ValueError):
+            StageGraph([
+                Stage("a", lambda b: b, ["b"], ["a"]),
+                Stage("b", lambda a: a, ["a"], ["b"]),
+            ])
+
+    def test_missing_input_rejected(self):
+        graph = StageGraph([Stage("a", lambda missing: missing, ["missing"], ["a"])])
+        with self.assertRaises(ValueError):
+            graph.run()
+
+
+if __name__ == "__main__":
+    unittest.main()
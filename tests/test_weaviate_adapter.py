@@ -0,0 +1,101 @@
+# tests/test_weaviate_adapter.py
+import os
+import sys
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.vector_store import weaviate_adapter
+from src.vector_store.embedding_service import EmbeddingService
+from src.vector_store.fake_weaviate import FakeWeaviateClient
+from src.vector_store.weaviate_adapter import WeaviateAdapter, get_weaviate_adapter, store_context_vector
+from src.vector_store.weaviate_benchmark import run_ingest_benchmark
+
+
+def encode(texts):
+    return np.array([[len(t), sum(map(ord, t)) % 97, 1.0] for t in texts], dtype="float32")
+
+
+def make_adapter(client=None, **kwargs):
+    return WeaviateAdapter(client=client or FakeWeaviateClient(),
+                           embedder=EmbeddingService("test", encode_fn=encode), **kwargs)
+
+
+CHUNKS = [{"content": f"chunk {i}", "source": "test"} for i in range(25)]
+
+
+class TestWeaviateAdapter(unittest.TestCase):
+
+    def test_batches_requests_and_creates_schema_once(self):
+        client = FakeWeaviateClient()
+        adapter = make_adapter(client, batch_size=10)
+        requests = client.requests
+        report = adapter.add_documents(CHUNKS)
+        self.assertEqual((report["added"], report["failed"]), (25, []))
+        self.assertEqual(client.requests - requests, 3)
+        self.assertEqual(client.count("CodeChunk"), 25)
+        make_adapter(client)
+        self.assertEqual(len(client.classes), 1)
+        self.assertEqual(adapter.search("chunk 7", top_k=1), ["test:\nchunk 7"])
+
+    def test_reports_rejected_objects(self):
+        client = FakeWeaviateClient(reject=lambda obj: "content too long" if obj["content"].endswith("3") else None)
+        adapter = make_adapter(client, batch_size=10)
+        report = adapter.add_documents(CHUNKS)
+        self.assertEqual(report["added"], 22)
+        self.assertEqual([f["content"] for f in report["failed"]], ["chunk 3", "chunk 13", "chunk 23"])
+        self.assertEqual(report["failed"][0]["error"], "content too long")
+        self.assertEqual(adapter.get_stats()["failed"], 3)
+
+        with patch.object(client.batch, "create_objects", side_effect=ConnectionError("connection refused")):
+            report = adapter.add_documents(CHUNKS[:5])
+        self.assertEqual(len(report["failed"]), 5)
+        self.assertIn("connection refused", report["failed"][0]["error"])
+
+    def test_background_queue_flushes_by_size_and_interval(self):
+        client = FakeWeaviateClient()
+        adapter = make_adapter(client, batch_size=10, flush_interval=0.05)
+        self.addCleanup(adapter.close)
+        adapter.enqueue(CHUNKS[:20])
+        adapter.enqueue(CHUNKS[20:])
+        deadline = time.monotonic() + 2
+        while client.count("CodeChunk") < 25 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(client.count("CodeChunk"), 25)  # the last 5 went out on the interval
+
+        adapter.flush_interval = 60
+        adapter.enqueue(CHUNKS[:3])
+        self.assertTrue(adapter.flush(timeout=2))
+        self.assertEqual(adapter.get_stats(), {"added": 28, "failed": 0, "requests": 4, "queued": 0})
+        adapter.close()
+        with self.assertRaises(RuntimeError):
+            adapter.enqueue(CHUNKS)
+
+    def test_store_context_vector_reuses_one_adapter(self):
+        client = FakeWeaviateClient()
+        with patch.dict(weaviate_adapter._adapters, clear=True), \
+                patch.object(weaviate_adapter, "weaviate") as module, \
+                patch.object(weaviate_adapter, "get_embedding_service", return_value=EmbeddingService("test", encode_fn=encode)):
+            module.Client.return_value = client
+            store_context_vector({"idea": "todo app", "tasks": ["api", "ui"], "meta": {"lang": "python"}})
+            self.assertEqual(store_context_vector({"idea": "chat bot"}), 1)
+            adapter = get_weaviate_adapter()
+            adapter.close()
+        self.assertEqual(module.Client.call_count, 1)
+        self.assertEqual(client.count("CodeChunk"), 5)
+
+    def test_benchmark_batches_beat_per_object(self):
+        results = run_ingest_benchmark(200, batch_sizes=(50,), dim=8, latency=0.001)
+        by_path = {r["path"]: r for r in results}
+        self.assertEqual(by_path["per_object"]["requests"], 200)
+        self.assertEqual(by_path["batch"]["requests"], 4)
+        self.assertGreater(by_path["batch"]["docs_per_s"], by_path["per_object"]["docs_per_s"])
+        self.assertTrue(all(r["failed"] == 0 for r in results))
+
+
+if __name__ == "__main__":
+    unittest.main()